@@ -0,0 +1,197 @@
+# Benchmarks whole runs of the script in batch mode against the fake Duolingo API in the test tree, so
+# the throughput and the latency of the accounts can be measured offline, including the start of the
+# interpreter. The first round fetches the whole history, and the later rounds are incremental. Every
+# round is forced, as the later ones would otherwise find today's run already recorded.
+#
+#   uv run python3 -m benchmarks.e2e --accounts 50 --days 3650 --latency 0.05 --jitter 0.05
+#   uv run python3 -m benchmarks.e2e --accounts 20 --error-rate 0.05 --error-status 403
+
+from argparse import ArgumentParser
+from json import dumps
+from os import environ, makedirs, path
+from subprocess import run
+from sys import executable
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Any
+
+from src.database import Database
+from src.telemetry import percentile, read_run_records, summarize_spans
+from tests.fake_api import FakeAPIConfig, serve_fake_api
+
+MAIN_PATH = path.join(path.dirname(path.dirname(path.abspath(__file__))), "main.py")
+
+
+def run_round(
+    directory: str,
+    api_url: str,
+    usernames: list[str],
+    max_workers: int,
+    extra_arguments: list[str],
+) -> float:
+    # The entry point runs in its own process, exactly as in the workflow.
+    environment = {
+        **{key: value for key, value in environ.items() if key != "GITHUB_OUTPUT"},
+        "DUOLINGO_ACCOUNTS": dumps(
+            [{"username": username, "password": "password"} for username in usernames]
+        ),
+    }
+    start_time = perf_counter()
+    run(
+        [
+            executable,
+            MAIN_PATH,
+            "--batch",
+            "--force",
+            "--api-url",
+            api_url,
+            "--max-workers",
+            str(max_workers),
+            "--token-store",
+            path.join(directory, "tokens.json"),
+            *extra_arguments,
+        ],
+        cwd=directory,
+        env=environment,
+        check=True,
+        capture_output=True,
+    )
+
+    return perf_counter() - start_time
+
+
+def run_benchmark(
+    config: FakeAPIConfig,
+    accounts: int,
+    rounds: int,
+    max_workers: int,
+    extra_arguments: list[str],
+) -> dict[str, Any]:
+    usernames = [f"learner_{index}" for index in range(accounts)]
+    results: dict[str, Any] = {"rounds": []}
+    with TemporaryDirectory() as directory, serve_fake_api(config) as api:
+        makedirs(path.join(directory, "data", "accounts"))
+        report_database = Database(
+            filename=path.join(directory, "data", "accounts", "report.json")
+        )
+        for _ in range(rounds):
+            seconds = run_round(
+                directory, api.url, usernames, max_workers, extra_arguments
+            )
+            report = report_database.get()
+            durations = [result["duration"] for result in report.values()]
+            results["rounds"].append(
+                {
+                    "seconds": seconds,
+                    "accounts_per_second": accounts / seconds,
+                    "failed": sum(
+                        not result["succeeded"] for result in report.values()
+                    ),
+                    **{
+                        f"p{rank}": percentile(durations, rank) for rank in (50, 90, 99)
+                    },
+                }
+            )
+
+        # The phases of every account across all of the rounds, from their run statistics.
+        results["phases"] = summarize_spans(
+            [
+                record
+                for username in usernames
+                for record in read_run_records(
+                    path.join(
+                        directory,
+                        "data",
+                        "accounts",
+                        username,
+                        "run-statistics.jsonl",
+                    )
+                )
+            ]
+        )
+        results["requests"] = {
+            f"{endpoint} {status}": count
+            for (endpoint, status), count in sorted(api.requests.items())
+        }
+
+    return results
+
+
+def main():
+    parser = ArgumentParser(
+        description="Benchmark batch runs of the script against the fake Duolingo API."
+    )
+    parser.add_argument("--accounts", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--max-workers", type=int, default=4)
+    parser.add_argument(
+        "--days", type=int, default=365, help="history of every account (default: 365)"
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        help="seconds before every response (default: 0)",
+    )
+    parser.add_argument(
+        "--jitter",
+        type=float,
+        default=0.0,
+        help="random extra seconds before every response (default: 0)",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="share of the requests that fail (default: 0)",
+    )
+    parser.add_argument(
+        "--error-status",
+        type=int,
+        choices=[401, 403, 404],
+        default=401,
+        help="status of the failing requests, 403 being a captcha (default: 401)",
+    )
+    parser.add_argument("--output", help="file to store the results in")
+    arguments, extra_arguments = parser.parse_known_args()
+
+    config = FakeAPIConfig(
+        days=arguments.days,
+        latency=arguments.latency,
+        jitter=arguments.jitter,
+        error_rate=arguments.error_rate,
+        error_status=arguments.error_status,
+    )
+    results = run_benchmark(
+        config,
+        arguments.accounts,
+        arguments.rounds,
+        arguments.max_workers,
+        extra_arguments,
+    )
+
+    print(
+        f"{arguments.accounts} accounts, {arguments.days} days, {arguments.latency * 1000:.0f} ms latency, {arguments.max_workers} workers"
+    )
+    for index, result in enumerate(results["rounds"], start=1):
+        print(
+            f"  round {index}: {result['seconds']:.2f}s, {result['accounts_per_second']:.1f} accounts/s, "
+            f"p50={result['p50'] * 1000:.1f} ms p90={result['p90'] * 1000:.1f} ms p99={result['p99'] * 1000:.1f} ms, "
+            f"{result['failed']} failed"
+        )
+    print("Phases:")
+    for name, summary in results["phases"].items():
+        print(
+            f"  {name:<16} n={summary['count']:<5.0f} p50={summary['p50'] * 1000:>9.1f} ms"
+            f" p90={summary['p90'] * 1000:>9.1f} ms p99={summary['p99'] * 1000:>9.1f} ms"
+        )
+    print("Requests:")
+    for name, count in results["requests"].items():
+        print(f"  {name:<16} {count}")
+
+    if arguments.output:
+        Database(filename=arguments.output).set(results)
+
+
+if __name__ == "__main__":
+    main()
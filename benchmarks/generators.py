@@ -0,0 +1,92 @@
+from collections.abc import Callable
+from datetime import date, timedelta
+from random import Random
+from typing import Any
+
+
+def daily_activity(random: Random) -> Callable[[date], bool]:
+    # The learner never misses a day.
+    return lambda day: True
+
+
+def random_activity(random: Random) -> Callable[[date], bool]:
+    # Roughly one missed day every ten days, at random.
+    return lambda day: random.random() < 0.9
+
+
+def weekend_activity(random: Random) -> Callable[[date], bool]:
+    # The learner always skips Sundays, so streaks reset every week.
+    return lambda day: day.weekday() != 6
+
+
+def bursty_activity(random: Random) -> Callable[[date], bool]:
+    # Long active periods followed by breaks of up to two weeks.
+    remaining, active = random.randint(30, 120), True
+
+    def is_active(day: date) -> bool:
+        nonlocal remaining, active
+        if remaining == 0:
+            active = not active
+            remaining = random.randint(30, 120) if active else random.randint(1, 14)
+        remaining -= 1
+        return active
+
+    return is_active
+
+
+GAP_PATTERNS: dict[str, Callable[[Random], Callable[[date], bool]]] = {
+    "daily": daily_activity,
+    "random": random_activity,
+    "weekends": weekend_activity,
+    "bursty": bursty_activity,
+}
+
+
+def generate_raw_database(
+    years: int,
+    seed: int = 0,
+    start: date = date(2000, 1, 1),
+    gap_pattern: str = "random",
+) -> dict[str, dict[str, int]]:
+    # A synthetic, synchronized history in the same layout as `data/duolingo-progress.json`. The gap
+    # pattern decides on which days the learner is active, and the streak resets on the other days.
+    random = Random(seed)
+    is_active = GAP_PATTERNS[gap_pattern](random)
+    database: dict[str, dict[str, int]] = {}
+    streak = 0
+    for offset in range(years * 365):
+        day = start + timedelta(days=offset)
+        active = is_active(day)
+        streak = streak + 1 if active else 0
+        database[day.strftime("%Y/%m/%d")] = {
+            "number_of_sessions": random.randint(1, 40) if active else 0,
+            "session_time": random.randint(60, 10000) if active else 0,
+            "streak": streak,
+            "xp_today": random.randint(10, 1500) if active else 0,
+        }
+
+    return database
+
+
+def generate_raw_databases(
+    users: int, years: int, gap_pattern: str = "random"
+) -> list[dict[str, dict[str, int]]]:
+    # Every user gets their own seed, so their histories differ but stay reproducible.
+    return [
+        generate_raw_database(years, seed=seed, gap_pattern=gap_pattern)
+        for seed in range(users)
+    ]
+
+
+def generate_raw_summaries(raw_database: dict[str, dict[str, int]]) -> list[Any]:
+    # The summaries that the API would return for the synthetic history, newest first.
+    return [
+        {
+            "date": date,
+            "gainedXp": entry["xp_today"],
+            "numSessions": entry["number_of_sessions"],
+            "totalSessionTime": entry["session_time"],
+        }
+        for date, entry in reversed(raw_database.items())
+        if entry["streak"] > 0
+    ]
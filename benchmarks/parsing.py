@@ -0,0 +1,37 @@
+# Compares the per-entry parsing of the stored history in `src.runner` with the bulk adapter path.
+# To run the benchmark: `uv run python3 -m benchmarks.parsing` from the root folder.
+
+from timeit import repeat
+
+from benchmarks.generators import generate_raw_database
+from src.schema import DatabaseEntry, dump_database_entries, parse_database_entries
+
+
+def measure(statement, number: int = 5) -> float:
+    return min(repeat(statement, number=number, repeat=3)) / number
+
+
+def main():
+    raw_database = generate_raw_database(years=20)
+    entries = parse_database_entries(raw_database)
+
+    results = {
+        "load": (
+            measure(lambda: {k: DatabaseEntry(**v) for k, v in raw_database.items()}),
+            measure(lambda: parse_database_entries(raw_database)),
+        ),
+        "dump": (
+            measure(lambda: {k: v.model_dump() for k, v in entries.items()}),
+            measure(lambda: dump_database_entries(entries)),
+        ),
+    }
+
+    print(f"Synthetic history: {len(raw_database)} days")
+    for stage, (per_entry, bulk) in results.items():
+        print(
+            f"{stage}: per-entry {per_entry * 1000:.2f} ms, bulk {bulk * 1000:.2f} ms, speedup {per_entry / bulk:.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
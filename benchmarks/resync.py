@@ -0,0 +1,55 @@
+# Measures how the offline re-synchronization scales with the number of processes, on synthetic
+# accounts written to a temporary directory. The speedup is relative to a single process.
+#
+#   uv run python3 -m benchmarks.resync
+#   uv run python3 -m benchmarks.resync --users 2000 --years 5 --workers 1 2 4 8
+
+from argparse import ArgumentParser
+from os import cpu_count, makedirs, path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from benchmarks.generators import generate_raw_database
+from src.database import Database
+from src.resync import DATABASE_NAME, resync_directories
+
+
+def main():
+    parser = ArgumentParser(description="Benchmark the offline re-synchronization.")
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=sorted({1, 2, cpu_count() or 1}),
+        help="numbers of processes to compare (default: 1, 2 and the number of cores)",
+    )
+    arguments = parser.parse_args()
+
+    with TemporaryDirectory() as directory:
+        directories = []
+        for user in range(arguments.users):
+            user_directory = path.join(directory, str(user))
+            makedirs(user_directory)
+            Database(filename=path.join(user_directory, f"{DATABASE_NAME}.json")).set(
+                generate_raw_database(arguments.years, seed=user)
+            )
+            directories.append(user_directory)
+
+        timings = {}
+        for workers in arguments.workers:
+            start_time = perf_counter()
+            results = list(resync_directories(directories, workers, check=True))
+            timings[workers] = perf_counter() - start_time
+            assert all(result.succeeded for result in results)
+
+    print(f"{arguments.users} accounts of {arguments.years} years")
+    for workers, seconds in timings.items():
+        print(
+            f"  {workers:>3} processes {seconds:>8.2f} s {arguments.users / seconds:>9.1f} databases/s {timings[arguments.workers[0]] / seconds:>6.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# Measures how long the script takes to start, compared to the bare interpreter, and which imports the
+# time goes to. The no-op run is a run after today's synchronization has already been recorded, which
+# should not import more than the standard library and the databases.
+#
+#   uv run python3 -m benchmarks.startup
+#   uv run python3 -m benchmarks.startup --repeats 20 --top 15
+
+from argparse import ArgumentParser
+from os import environ, makedirs, path
+from subprocess import run
+from sys import executable
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from src.database import Database
+from src.startup import today
+
+ROOT_PATH = path.dirname(path.dirname(path.abspath(__file__)))
+MAIN_PATH = path.join(ROOT_PATH, "main.py")
+
+
+def measure(command: list[str], directory: str, repeats: int) -> float:
+    # The fastest of the runs, as the others only add noise from the rest of the system.
+    environment = {
+        **{key: value for key, value in environ.items() if key != "GITHUB_OUTPUT"},
+        "DUOLINGO_USERNAME": "learner",
+        "DUOLINGO_JWT": "token",
+        "PYTHONPATH": ROOT_PATH,
+    }
+    timings = []
+    for _ in range(repeats):
+        start_time = perf_counter()
+        run(command, cwd=directory, env=environment, check=True, capture_output=True)
+        timings.append(perf_counter() - start_time)
+
+    return min(timings)
+
+
+def find_slowest_imports(
+    command: list[str], directory: str, count: int
+) -> list[tuple[str, int]]:
+    # The top-level imports of the command with their cumulative time in microseconds, as printed by
+    # `python -X importtime` to the standard error.
+    output = run(
+        [executable, "-X", "importtime", *command],
+        cwd=directory,
+        env={**environ, "PYTHONPATH": ROOT_PATH},
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stderr
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        if not name.startswith("  "):
+            imports.append((name.strip(), int(cumulative)))
+
+    return sorted(imports, key=lambda item: item[1], reverse=True)[:count]
+
+
+def main():
+    parser = ArgumentParser(description="Measure the startup time of the script.")
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=10,
+        help="number of the slowest imports of the no-op run to print (default: 10)",
+    )
+    arguments = parser.parse_args()
+
+    with TemporaryDirectory() as directory:
+        makedirs(path.join(directory, "data"))
+        Database(filename=path.join(directory, "data", "statistics.json")).set(
+            {today(): "00:00:00"}
+        )
+        commands = {
+            "interpreter": [executable, "-c", "pass"],
+            "no-op run": [executable, MAIN_PATH],
+            "full imports": [executable, "-c", "import src.runner"],
+        }
+        timings = {
+            name: measure(command, directory, arguments.repeats)
+            for name, command in commands.items()
+        }
+        slowest_imports = find_slowest_imports([MAIN_PATH], directory, arguments.top)
+
+    for name, seconds in timings.items():
+        print(
+            f"{name:<14} {seconds * 1000:>8.1f} ms {(seconds - timings['interpreter']) * 1000:>+8.1f} ms"
+        )
+    print("Slowest imports of the no-op run:")
+    for name, microseconds in slowest_imports:
+        print(f"  {name:<32} {microseconds / 1000:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+# Benchmarks every stage of the synchronization pipeline on synthetic histories, and compares the
+# results with a baseline. To run the suite: `uv run python3 -m benchmarks.suite` from the root folder.
+#
+#   uv run python3 -m benchmarks.suite --output benchmarks/baseline.json
+#   uv run python3 -m benchmarks.suite --baseline benchmarks/baseline.json --threshold 1.25
+
+from argparse import ArgumentParser
+from collections.abc import Callable
+from dataclasses import dataclass
+from itertools import cycle
+from os import path
+from platform import python_version
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from tracemalloc import get_traced_memory, start, stop
+from typing import Any
+
+from benchmarks.generators import generate_raw_databases, generate_raw_summaries
+from src.binary_store import BinaryDatabase, write_binary_database
+from src.database import Database
+from src.schema import dump_database_entries, parse_database_entries, parse_summaries
+from src.synchronizer import (
+    find_overlap_start_date,
+    sync_database_incrementally,
+    sync_database_with_summaries,
+)
+
+
+@dataclass
+class Scenario:
+    users: int
+    years: int
+    gap_pattern: str
+
+
+SCENARIOS = {
+    "single-1y": Scenario(users=1, years=1, gap_pattern="random"),
+    "single-20y": Scenario(users=1, years=20, gap_pattern="bursty"),
+    "single-50y": Scenario(users=1, years=50, gap_pattern="weekends"),
+    "group-100x5y": Scenario(users=100, years=5, gap_pattern="random"),
+    "group-1000x1y": Scenario(users=1000, years=1, gap_pattern="daily"),
+}
+
+
+def prepare_stages(scenario: Scenario, directory: str) -> dict[str, Callable[[], Any]]:
+    # Inputs of every stage are prepared up front, so each stage only measures its own work. Every
+    # stage processes all of the users of the scenario.
+    raw_databases = generate_raw_databases(
+        scenario.users, scenario.years, scenario.gap_pattern
+    )
+    raw_summaries = [generate_raw_summaries(raw) for raw in raw_databases]
+    entries = [parse_database_entries(raw) for raw in raw_databases]
+    summaries = [parse_summaries(raw) for raw in raw_summaries]
+    windows = [
+        (since, [summary for summary in user_summaries if summary.date >= since])
+        for user_entries, user_summaries in zip(entries, summaries, strict=True)
+        if (since := find_overlap_start_date(user_entries, 14)) is not None
+    ]
+    databases = [
+        Database(filename=path.join(directory, f"{user}.json"))
+        for user in range(scenario.users)
+    ]
+    binary_filenames = [
+        path.join(directory, f"{user}.bin") for user in range(scenario.users)
+    ]
+    for database, binary_filename, raw in zip(
+        databases, binary_filenames, raw_databases, strict=True
+    ):
+        database.set(raw)
+        write_binary_database(binary_filename, raw.items())
+
+    def read_binary_latest(filename: str) -> dict[str, Any]:
+        with BinaryDatabase.open(filename) as binary_database:
+            return dict(binary_database.latest(30))
+
+    # Identical content is not written again, so every write alternates between the stored databases and
+    # a copy with one more XP on the newest day, and always replaces the file.
+    def change_newest_day(raw: dict[str, Any]) -> dict[str, Any]:
+        newest = max(raw)
+        return {**raw, newest: {**raw[newest], "xp_today": raw[newest]["xp_today"] + 1}}
+
+    changed_databases = [change_newest_day(raw) for raw in raw_databases]
+    database_versions = cycle([changed_databases, raw_databases])
+
+    return {
+        "parse_summaries": lambda: [parse_summaries(raw) for raw in raw_summaries],
+        "parse_database": lambda: [
+            parse_database_entries(raw) for raw in raw_databases
+        ],
+        "sync_full": lambda: [
+            sync_database_with_summaries(user_entries, user_summaries)
+            for user_entries, user_summaries in zip(entries, summaries, strict=True)
+        ],
+        # The entries are synchronized in place, which gives the same entries on every repeat.
+        "sync_incremental": lambda: [
+            sync_database_incrementally(user_entries, window, since)
+            for user_entries, (since, window) in zip(entries, windows, strict=True)
+        ],
+        "dump_database": lambda: [
+            dump_database_entries(user_entries) for user_entries in entries
+        ],
+        "database_get": lambda: [database.get() for database in databases],
+        "database_set": lambda: [
+            database.set(raw)
+            for database, raw in zip(databases, next(database_versions), strict=True)
+        ],
+        "binary_write": lambda: [
+            write_binary_database(binary_filename, raw.items())
+            for binary_filename, raw in zip(
+                binary_filenames, raw_databases, strict=True
+            )
+        ],
+        "binary_latest": lambda: [
+            read_binary_latest(binary_filename) for binary_filename in binary_filenames
+        ],
+    }
+
+
+def measure(stage: Callable[[], Any], repeats: int) -> dict[str, float]:
+    # Timing and memory are measured in separate runs, as tracing allocations slows the stage down.
+    timings = []
+    for _ in range(repeats):
+        start_time = perf_counter()
+        stage()
+        timings.append(perf_counter() - start_time)
+
+    start()
+    stage()
+    _, peak_bytes = get_traced_memory()
+    stop()
+
+    return {"seconds": min(timings), "peak_bytes": peak_bytes}
+
+
+def run_suite(scenario_names: list[str], repeats: int) -> dict[str, Any]:
+    results: dict[str, Any] = {"python": python_version(), "scenarios": {}}
+    for name in scenario_names:
+        with TemporaryDirectory() as directory:
+            stages = prepare_stages(SCENARIOS[name], directory)
+            results["scenarios"][name] = {
+                stage_name: measure(stage, repeats)
+                for stage_name, stage in stages.items()
+            }
+
+    return results
+
+
+def compare_results(
+    results: dict[str, Any], baseline: dict[str, Any], threshold: float
+) -> list[str]:
+    # A stage regresses if it is slower, or its peak memory is higher, than the baseline by more than the
+    # threshold factor. Stages that are not in the baseline are not compared.
+    regressions = []
+    for name, stages in results["scenarios"].items():
+        for stage_name, measurement in stages.items():
+            expected = baseline["scenarios"].get(name, {}).get(stage_name)
+            if expected is None:
+                continue
+
+            for metric, description in (
+                ("seconds", "slower than"),
+                ("peak_bytes", "more memory than"),
+            ):
+                if not expected[metric]:
+                    continue
+
+                ratio = measurement[metric] / expected[metric]
+                if ratio > threshold:
+                    regressions.append(
+                        f"{name}/{stage_name}: {ratio:.2f}x {description} the baseline"
+                    )
+
+    return regressions
+
+
+def main():
+    parser = ArgumentParser(description="Benchmark the synchronization pipeline.")
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=list(SCENARIOS),
+        help="scenario to run, can be repeated (default: all of them)",
+    )
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", help="file to store the results in")
+    parser.add_argument("--baseline", help="file with the results to compare with")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.25,
+        help="factor of time or peak memory against the baseline that fails the run (default: 1.25)",
+    )
+    arguments = parser.parse_args()
+
+    results = run_suite(arguments.scenario or list(SCENARIOS), arguments.repeats)
+    for name, stages in results["scenarios"].items():
+        scenario = SCENARIOS[name]
+        print(
+            f"{name} ({scenario.users} users, {scenario.years} years, {scenario.gap_pattern} gaps)"
+        )
+        for stage_name, measurement in stages.items():
+            print(
+                f"  {stage_name:<18} {measurement['seconds'] * 1000:>10.2f} ms {measurement['peak_bytes'] / 1024 / 1024:>10.2f} MiB"
+            )
+
+    if arguments.output:
+        Database(filename=arguments.output).set(results)
+
+    if arguments.baseline:
+        regressions = compare_results(
+            results, Database(filename=arguments.baseline).get(), arguments.threshold
+        )
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,134 +1,323 @@
-from datetime import datetime
+from argparse import ArgumentParser, Namespace
+from collections.abc import Iterator
+from contextlib import ExitStack, contextmanager
 from os import environ, path
+from shutil import copytree
+from tempfile import TemporaryDirectory
 from traceback import format_exc
+from typing import TYPE_CHECKING
 
-from pydantic import ValidationError
-
-from src.api import (
-    APIClient,
-    CaptchaException,
-    LoginException,
-    NotFoundException,
-    UnauthorizedException,
+from src.startup import (
+    BASE_API_URL,
+    TOKEN_STORE_PATH,
+    find_batch_directories,
+    is_synchronized_today,
 )
-from src.database import Database
-from src.schema import DatabaseEntry, Summary, User
-from src.synchronizer import check_database_change, sync_database_with_summaries
+
+# The cassette is only imported when the script synchronizes, after the early exit.
+if TYPE_CHECKING:
+    from src.cassette import Cassette
 
 
 def log(message: str) -> None:
     print(f"[JDV] {message}")
 
 
-def run() -> tuple[bool, bool]:
-    # Initialize environment.
-    base_api_url = "https://www.duolingo.com"
-    username = environ["DUOLINGO_USERNAME"]
-    credential, passwordless = (
-        (credential, True)
-        if (credential := environ.get("DUOLINGO_JWT")) is not None
-        else (environ["DUOLINGO_PASSWORD"], False)
+def parse_arguments() -> Namespace:
+    parser = ArgumentParser(description="Synchronize your Duolingo progress.")
+    parser.add_argument(
+        "--full-resync",
+        action="store_true",
+        help="fetch the whole history from Duolingo instead of only the recent days",
+    )
+    parser.add_argument(
+        "--overlap-days",
+        type=int,
+        default=14,
+        help="number of days before the newest stored date to fetch again (default: 14)",
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="synchronize every account in the DUOLINGO_ACCOUNTS environment variable",
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=4,
+        help="maximum number of accounts to synchronize at once in batch mode (default: 4)",
+    )
+    parser.add_argument(
+        "--storage",
+        choices=["json", "journal", "sqlite"],
+        default="json",
+        help="how the databases are stored, 'journal' only appends the changed days and 'sqlite' only upserts them (default: json)",
+    )
+    parser.add_argument(
+        "--http-cache",
+        metavar="DIRECTORY",
+        help="cache the API responses in this directory and revalidate them with conditional requests",
+    )
+    parser.add_argument(
+        "--no-telemetry",
+        action="store_false",
+        dest="telemetry",
+        help="do not record the duration of each phase in 'run-statistics.jsonl'",
+    )
+    parser.add_argument(
+        "--token-store",
+        metavar="FILE",
+        default=TOKEN_STORE_PATH,
+        help="keep the tokens of password logins in this file and reuse them until they expire (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--api-url",
+        default=BASE_API_URL,
+        help="base URL of the Duolingo API, for example a local stand-in for testing (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="synchronize even if today's run has already been recorded in the statistics",
+    )
+    parser.add_argument(
+        "--timezone",
+        help="IANA timezone of the days, for example 'Asia/Jakarta' (default: the local time of the machine)",
+    )
+    cassette_group = parser.add_mutually_exclusive_group()
+    cassette_group.add_argument(
+        "--record-cassette",
+        metavar="FILE",
+        help="record every request and response into this archive, without the credentials and tokens, together with the data directory it starts from, which implies '--no-token-store'",
+    )
+    cassette_group.add_argument(
+        "--replay-cassette",
+        metavar="FILE",
+        help="answer every request from this archive instead of the API, which implies '--force' and '--no-token-store'",
+    )
+    parser.add_argument(
+        "--replay-latency",
+        action="store_true",
+        help="wait as long as each recorded request took when replaying",
+    )
+    parser.add_argument(
+        "--data-dir",
+        metavar="DIRECTORY",
+        help="directory of the databases (default: 'data', or a temporary directory with the data of the recording when replaying)",
+    )
+    parser.add_argument(
+        "--export",
+        metavar="FILE",
+        help="write the full progress database as one JSON file after the run, whatever the storage, for example for the website build",
+    )
+    parser.add_argument(
+        "--no-token-store",
+        action="store_const",
+        const=None,
+        dest="token_store",
+        help="login with the password on every run",
     )
 
-    # Declare paths.
-    progression_database_path = path.join("data", "duolingo-progress.json")
-    statistics_database_path = path.join("data", "statistics.json")
+    arguments = parser.parse_args()
+    if arguments.batch and arguments.export:
+        parser.error("argument --export: not allowed with argument --batch")
 
-    # Initialize required infrastructures.
-    api = APIClient(base_url=base_api_url)
-    progression_database = Database(filename=progression_database_path)
-    statistics_database = Database(filename=statistics_database_path)
+    return arguments
 
-    # If the supplied credential is the password, login to Duolingo first.
-    token, passwordless = (
-        (credential, True) if passwordless else (api.login(username, credential), False)
-    )
 
-    # Get the possible data.
-    raw_user, raw_summary = api.fetch_data(username, token)
+def export_github_output(name: str, value: str) -> None:
+    # Let the following steps of a GitHub Actions workflow use the result of the run.
+    if (output_path := environ.get("GITHUB_OUTPUT")) is not None:
+        with open(output_path, "a", encoding="UTF-8") as file:
+            file.write(f"{name}={value}\n")
 
-    # Transform them into our internal schema.
-    user = User(**raw_user)
-    summaries = [Summary(**summary) for summary in raw_summary["summaries"]]
 
-    # Get all existing data from the database. Add the new data to the end of the database
-    # declaratively. `0` means the first entry, or today (when the script is run). Initially,
-    # we try to transform the existing data from the database into our own structure so it's easier
-    # to process.
-    current_progression = progression_database.get()
-    database_entries: dict[str, DatabaseEntry] = {
-        **{key: DatabaseEntry(**entry) for key, entry in current_progression.items()},
-        **{summaries[0].date: DatabaseEntry.create(summaries[0], user.site_streak)},
-    }
+def export_progress(arguments: Namespace, data_directory: str) -> None:
+    # The export only needs the databases, so it is done even if the run is skipped or fails, and the
+    # website is built from the newest stored data.
+    if arguments.export is None:
+        return
 
-    # Synchronize the database with the summaries.
-    synchronized_database = sync_database_with_summaries(database_entries, summaries)
+    from src.database import export_database
+
+    try:
+        export_database(
+            data_directory, "duolingo-progress", arguments.storage, arguments.export
+        )
+        log(f"Script exported your progress to '{arguments.export}'.")
+    except (OSError, ValueError) as error:
+        log(f"Script could not export your progress: {error}")
 
-    # Check whether we have synchronized the data or not.
-    is_database_changed = check_database_change(synchronized_database, database_entries)
 
-    # Store the synchronized database in our repository.
-    progression_database.set(
-        {key: value.model_dump() for key, value in synchronized_database.items()}
+def is_already_synchronized(arguments: Namespace, data_directory: str) -> bool:
+    # Retried or manually dispatched runs after a successful one have nothing to do. This only reads
+    # the statistics, so it is decided before importing the rest of the script.
+    if arguments.force or arguments.replay_cassette:
+        return False
+    if not arguments.batch:
+        return is_synchronized_today(
+            data_directory, arguments.storage, arguments.timezone
+        )
+
+    directories = find_batch_directories(
+        environ.get("DUOLINGO_ACCOUNTS", ""), path.join(data_directory, "accounts")
+    )
+    return bool(directories) and all(
+        is_synchronized_today(directory, arguments.storage, arguments.timezone)
+        for directory in directories
     )
 
-    # On the other hand, get all of the statistics of the cron run, and then immutably
-    # add the current cron statistics.
-    current_date = datetime.now().strftime("%Y/%m/%d")
-    current_time = datetime.now().strftime("%H:%M:%S")
-    current_statistics = statistics_database.get()
-    statistics_entries: dict[str, str] = {
-        **current_statistics,
-        **{current_date: current_time},
-    }
 
-    # Store the statistics in our repository.
-    statistics_database.set(statistics_entries)
+@contextmanager
+def prepare_data_directory(
+    arguments: Namespace, cassette: "Cassette | None"
+) -> Iterator[str]:
+    # The recorded responses belong to the data of the recording, so a replay never writes into the real
+    # data directory, unless it is given explicitly. It runs in a temporary directory instead, starting
+    # from the data of the recording, so it sends the same requests. Recordings without that data start
+    # from a copy of the current data directory.
+    if cassette is None or not cassette.replaying or arguments.data_dir is not None:
+        yield arguments.data_dir or "data"
+        return
 
-    # Return flags from the program to consolidate the print statements in the outer loop,
-    # minimizing side effects.
-    return passwordless, is_database_changed
+    with TemporaryDirectory() as directory:
+        data_directory = path.join(directory, "data")
+        if cassette.restore_snapshot(data_directory):
+            log("Script is replaying from the data directory of the recording.")
+        else:
+            if path.isdir("data"):
+                copytree("data", data_directory)
+            log("Script is replaying into a temporary copy of the data directory.")
+        yield data_directory
 
 
 def main() -> None:
+    arguments = parse_arguments()
     log("Script is starting and running now.")
-    try:
-        passwordless, is_database_changed = run()
-        match passwordless:
-            case True:
-                log("Script authenticated with your JWT.")
-            case False:
-                log("Script authenticated with your password. Please change it to JWT.")
-
-        match is_database_changed:
-            case True:
-                log(
-                    "Script found discrepancies between current data and online data. Synchronization is done automatically."
-                )
-            case False:
-                log(
-                    "Script did not find discrepancies between current data and online data. Synchronization not required."
-                )
-
+    if is_already_synchronized(arguments, arguments.data_dir or "data"):
+        export_github_output("changed-months", "")
         log(
-            "Script run successfully! Please check the specified path to see your newly updated data."
+            "Script has already synchronized your data today. Use '--force' to synchronize again."
         )
-    except ValidationError as error:
-        log(
-            f"Error encountered when parsing data. Potentially, a breaking API change: {error}"
-        )
-    except (
+        export_progress(arguments, arguments.data_dir or "data")
+        return
+
+    synchronize(arguments)
+
+
+def synchronize(arguments: Namespace) -> None:
+    from pydantic import ValidationError
+
+    from src.api import (
         CaptchaException,
         LoginException,
         NotFoundException,
         UnauthorizedException,
-    ) as error:
-        log(f"{error.__class__.__name__}: {error}")
-    except Exception as error:
-        log(f"Unexpected Exception: {error.__class__.__name__}: {error}")
-        log(format_exc())
-    finally:
-        log("Japanese Duolingo Visualizer script has finished running.")
+    )
+    from src.cassette import Cassette
+    from src.runner import run, run_batch
+
+    # A recording has to contain the login, so it does not reuse a stored token, and a replayed login
+    # returns a redacted token, which must not replace a stored one.
+    token_store_path = (
+        None
+        if arguments.record_cassette or arguments.replay_cassette
+        else arguments.token_store
+    )
+
+    data_directory = arguments.data_dir or "data"
+    with ExitStack() as stack:
+        try:
+            cassette = (
+                Cassette.record(arguments.record_cassette, data_directory)
+                if arguments.record_cassette
+                else Cassette.replay(
+                    arguments.replay_cassette, arguments.replay_latency
+                )
+                if arguments.replay_cassette
+                else None
+            )
+            data_directory = stack.enter_context(
+                prepare_data_directory(arguments, cassette)
+            )
+            if arguments.batch:
+                results = run_batch(
+                    full_resync=arguments.full_resync,
+                    overlap_days=arguments.overlap_days,
+                    max_workers=arguments.max_workers,
+                    storage=arguments.storage,
+                    telemetry=arguments.telemetry,
+                    cache_directory=arguments.http_cache,
+                    token_store_path=token_store_path,
+                    base_url=arguments.api_url,
+                    force=arguments.force or arguments.replay_cassette is not None,
+                    timezone=arguments.timezone,
+                    cassette=cassette,
+                    data_directory=data_directory,
+                )
+                for result in results:
+                    status = "succeeded" if result.succeeded else "failed"
+                    log(
+                        f"Account '{result.username}' {status} in {result.duration:.2f}s: {result.message}"
+                    )
+
+                succeeded = sum(result.succeeded for result in results)
+                log(
+                    f"Script synchronized {succeeded} out of {len(results)} accounts successfully."
+                )
+                return
+
+            passwordless, changed_months = run(
+                full_resync=arguments.full_resync,
+                overlap_days=arguments.overlap_days,
+                storage=arguments.storage,
+                telemetry=arguments.telemetry,
+                cache_directory=arguments.http_cache,
+                token_store_path=token_store_path,
+                base_url=arguments.api_url,
+                timezone=arguments.timezone,
+                cassette=cassette,
+                data_directory=data_directory,
+            )
+            match passwordless:
+                case True:
+                    log("Script authenticated with your JWT.")
+                case False:
+                    log(
+                        "Script authenticated with your password. Please change it to JWT."
+                    )
+
+            export_github_output("changed-months", ",".join(changed_months))
+            match bool(changed_months):
+                case True:
+                    log(
+                        f"Script found discrepancies between current data and online data in {', '.join(changed_months)}. Synchronization is done automatically."
+                    )
+                case False:
+                    log(
+                        "Script did not find discrepancies between current data and online data. Synchronization not required."
+                    )
+
+            log(
+                "Script run successfully! Please check the specified path to see your newly updated data."
+            )
+        except ValidationError as error:
+            log(
+                f"Error encountered when parsing data. Potentially, a breaking API change: {error}"
+            )
+        except (
+            CaptchaException,
+            LoginException,
+            NotFoundException,
+            UnauthorizedException,
+        ) as error:
+            log(f"{error.__class__.__name__}: {error}")
+        except Exception as error:
+            log(f"Unexpected Exception: {error.__class__.__name__}: {error}")
+            log(format_exc())
+        finally:
+            export_progress(arguments, data_directory)
+            log("Japanese Duolingo Visualizer script has finished running.")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,32 @@
+# This is a script used to import the JSON databases into the SQLite database used by `--storage sqlite`.
+# To run the import script: `uv run python3 -m scripts.import-sqlite` from the root folder.
+
+from os import path
+from pathlib import Path
+
+from src.database import connect_sqlite, import_json_databases
+from src.runner import DATABASE_NAMES
+
+
+def main():
+    # Define constants.
+    file_path = Path(__file__).parent.absolute()
+    data_directory = path.join(file_path, "..", "data")
+
+    # Every database of the synchronization that exists as JSON becomes a namespace in the SQLite
+    # database. Other JSON files in the data directory, such as the digest index, are left alone.
+    filenames = [
+        filename
+        for name in DATABASE_NAMES
+        if path.exists(filename := path.join(data_directory, f"{name}.json"))
+    ]
+    connection = connect_sqlite(path.join(data_directory, "duolingo.sqlite3"))
+    import_json_databases(filenames, connection)
+    connection.close()
+
+    # Print success screen.
+    print(f"Import script has been successfully run for {len(filenames)} databases!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+from argparse import ArgumentParser
+from dataclasses import dataclass
+from itertools import accumulate
+from typing import Any
+
+from src.database import Database
+from src.date_index import DateIndex
+from src.schema import DatabaseEntry, parse_database_entries
+from src.synchronizer import date_to_ordinal, ordinal_to_date
+from src.telemetry import percentile
+
+FIELDS = ("xp_today", "session_time", "number_of_sessions")
+
+
+@dataclass
+class Analytics:
+    start: int
+    end: int
+    prefix_sums: dict[str, list[int]]
+    streaks: list[int]
+
+    @staticmethod
+    def create(database: dict[str, DatabaseEntry]) -> "Analytics":
+        if not database:
+            raise ValueError("Cannot analyze an empty database.")
+
+        # Every day between the first and the last date gets a slot, and days that are not in the
+        # database count as zero. The prefix sums start with a zero, so the sum of the days from `i`
+        # to `j` (inclusive) is `sums[j + 1] - sums[i]`.
+        start, end = date_to_ordinal(min(database)), date_to_ordinal(max(database))
+        entries = [
+            database.get(ordinal_to_date(ordinal)) for ordinal in range(start, end + 1)
+        ]
+        return Analytics(
+            start=start,
+            end=end,
+            prefix_sums={
+                field: list(
+                    accumulate(
+                        (
+                            getattr(entry, field) if entry is not None else 0
+                            for entry in entries
+                        ),
+                        initial=0,
+                    )
+                )
+                for field in FIELDS
+            },
+            streaks=[entry.streak if entry is not None else 0 for entry in entries],
+        )
+
+    @property
+    def days(self) -> int:
+        return self.end - self.start + 1
+
+    def clamp(self, start_date: str, end_date: str) -> tuple[int, int]:
+        # Convert an inclusive date range into slot offsets, limited to the analyzed days.
+        first = max(date_to_ordinal(start_date), self.start) - self.start
+        last = min(date_to_ordinal(end_date), self.end) - self.start
+        return first, last
+
+    def total(self, field: str, start_date: str, end_date: str) -> int:
+        first, last = self.clamp(start_date, end_date)
+        if first > last:
+            return 0
+
+        sums = self.prefix_sums[field]
+        return sums[last + 1] - sums[first]
+
+    def average(self, field: str, start_date: str, end_date: str) -> float:
+        # The average per day, counting the days without any sessions.
+        first, last = self.clamp(start_date, end_date)
+        if first > last:
+            return 0.0
+
+        return self.total(field, start_date, end_date) / (last - first + 1)
+
+    def rolling_means(self, field: str, window: int) -> list[float]:
+        # The mean of every day and the days before it. The first days average over the days there are.
+        sums = self.prefix_sums[field]
+        return [
+            (sums[index + 1] - sums[max(index + 1 - window, 0)])
+            / min(index + 1, window)
+            for index in range(self.days)
+        ]
+
+    def report(
+        self,
+        windows: tuple[int, ...] = (7, 30, 90),
+        ranks: tuple[float, ...] = (50, 90, 99),
+    ) -> dict[str, Any]:
+        # The longest streak is found in one pass over the streaks, and the percentiles only consider
+        # the days with a streak, as the others are always zero. A streak that started before the first
+        # analyzed day, for example with `--from`, only counts its days from then on.
+        longest_end = max(
+            range(self.days), key=lambda index: min(self.streaks[index], index + 1)
+        )
+        longest_length = min(self.streaks[longest_end], longest_end + 1)
+        active_days = [index for index, streak in enumerate(self.streaks) if streak > 0]
+        daily_values = {
+            field: [sums[index + 1] - sums[index] for index in active_days]
+            for field, sums in self.prefix_sums.items()
+        }
+        start_date, end_date = ordinal_to_date(self.start), ordinal_to_date(self.end)
+
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            "days": self.days,
+            "active_days": len(active_days),
+            "totals": {
+                field: self.total(field, start_date, end_date) for field in FIELDS
+            },
+            "averages": {
+                field: self.average(field, start_date, end_date) for field in FIELDS
+            },
+            "rolling_means": {
+                str(window): {
+                    field: self.average(
+                        field, ordinal_to_date(self.end - window + 1), end_date
+                    )
+                    for field in FIELDS
+                }
+                for window in windows
+            },
+            "current_streak": self.streaks[-1],
+            "longest_streak": {
+                "length": longest_length,
+                "start_date": ordinal_to_date(
+                    self.start + longest_end - longest_length + 1
+                ),
+                "end_date": ordinal_to_date(self.start + longest_end),
+            },
+            "percentiles": {
+                field: {
+                    f"p{rank:g}": (percentile(values, rank) if values else 0)
+                    for rank in ranks
+                }
+                for field, values in daily_values.items()
+            },
+        }
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        description="Write totals, averages, rolling means, streaks, and percentiles of the progress."
+    )
+    parser.add_argument("filename", nargs="?", default="data/duolingo-progress.json")
+    parser.add_argument(
+        "--output",
+        default="data/analytics.json",
+        help="file to write the report to (default: data/analytics.json)",
+    )
+    parser.add_argument(
+        "--from",
+        dest="start_date",
+        default="0001/01/01",
+        help="first day to analyze, as YYYY/MM/DD (default: the first stored day)",
+    )
+    parser.add_argument(
+        "--to",
+        dest="end_date",
+        default="9999/12/31",
+        help="last day to analyze, as YYYY/MM/DD (default: the last stored day)",
+    )
+    arguments = parser.parse_args()
+
+    # Only the days in the window are turned into entries.
+    index = DateIndex.create(Database(filename=arguments.filename).get())
+    analytics = Analytics.create(
+        parse_database_entries(
+            index.range(arguments.start_date, arguments.end_date).to_dict()
+        )
+    )
+    Database(filename=arguments.output).set(analytics.report())
+    print(f"Analyzed {analytics.days} days into '{arguments.output}'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,22 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
 from dataclasses import dataclass
+from hashlib import sha256
+from json import dumps, loads
+from os import listdir, makedirs, path, remove, replace, utime
+from tempfile import NamedTemporaryFile
 from typing import Any, Optional
 
 from pydantic import JsonValue
 from requests import Request, Response, Session
+from requests.adapters import HTTPAdapter
+
+from src.cassette import Cassette, create_response
+from src.streaming import iterate_array_items
+from src.telemetry import Recorder
+
+# Size of the chunks that streamed response bodies are read in.
+STREAM_CHUNK_SIZE = 64 * 1024
 
 
 class CaptchaException(Exception):
@@ -21,30 +35,227 @@ class UnauthorizedException(Exception):
     pass
 
 
+def create_session(adapter: HTTPAdapter) -> Session:
+    # Sessions that are mounted with the same adapter share its pool of keep-alive connections,
+    # while keeping their own cookies.
+    session = Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    return session
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    headers: dict[str, str]
+    content: bytes
+
+
+@dataclass
+class ResponseCache:
+    directory: str
+    max_bytes: int = 64 * 1024 * 1024
+
+    def key(self, url: str, token: Optional[str]) -> str:
+        # Responses are private to the token that fetched them. Only a hash of the token is used,
+        # so the token itself never ends up on disk.
+        token_identity = sha256((token or "").encode()).hexdigest()
+        return sha256(f"{token_identity}\n{url}".encode()).hexdigest()
+
+    def load(self, key: str) -> Optional[CachedResponse]:
+        metadata_path = path.join(self.directory, f"{key}.json")
+        try:
+            with open(metadata_path, "r", encoding="UTF-8") as file:
+                metadata = loads(file.read())
+            with open(path.join(self.directory, f"{key}.body"), "rb") as file:
+                content = file.read()
+        except FileNotFoundError:
+            return None
+
+        # Mark the entry as recently used for the eviction.
+        utime(metadata_path)
+        return CachedResponse(
+            url=metadata["url"], headers=metadata["headers"], content=content
+        )
+
+    def store(self, key: str, response: Response) -> None:
+        # The body is written before its metadata, so a half-written entry is never loaded.
+        makedirs(self.directory, exist_ok=True)
+        self.write(f"{key}.body", response.content)
+        self.store_metadata(key, response)
+
+    def store_chunks(
+        self, key: str, response: Response, chunks: Iterator[bytes]
+    ) -> Iterator[bytes]:
+        # A streamed body is passed on chunk by chunk, and written into a temporary file on the way. The
+        # entry is only stored once the whole body has been read, so a stream that is interrupted or
+        # abandoned leaves nothing behind.
+        makedirs(self.directory, exist_ok=True)
+        with NamedTemporaryFile(
+            dir=self.directory, suffix=".tmp", delete=False
+        ) as file:
+            try:
+                for chunk in chunks:
+                    file.write(chunk)
+                    yield chunk
+            except BaseException:
+                file.close()
+                remove(file.name)
+                raise
+
+        replace(file.name, path.join(self.directory, f"{key}.body"))
+        self.store_metadata(key, response)
+
+    def store_metadata(self, key: str, response: Response) -> None:
+        # Only the headers that are needed to revalidate and to decode the body are kept.
+        headers = {
+            name: value
+            for name in ("Content-Type", "ETag", "Last-Modified")
+            if (value := response.headers.get(name)) is not None
+        }
+        self.write(
+            f"{key}.json", dumps({"url": response.url, "headers": headers}).encode()
+        )
+        self.evict()
+
+    def write(self, filename: str, content: bytes) -> None:
+        with NamedTemporaryFile(
+            dir=self.directory, suffix=".tmp", delete=False
+        ) as file:
+            file.write(content)
+        replace(file.name, path.join(self.directory, filename))
+
+    def evict(self) -> None:
+        # Remove the least recently used entries until the cache fits in its size limit again.
+        keys = [
+            filename.removesuffix(".json")
+            for filename in listdir(self.directory)
+            if filename.endswith(".json")
+        ]
+        sizes = {key: self.size(key) for key in keys}
+        total_size = sum(sizes.values())
+        for key in sorted(
+            keys,
+            key=lambda key: path.getmtime(path.join(self.directory, f"{key}.json")),
+        ):
+            if total_size <= self.max_bytes:
+                break
+
+            for extension in ("json", "body"):
+                if path.exists(
+                    entry_path := path.join(self.directory, f"{key}.{extension}")
+                ):
+                    remove(entry_path)
+            total_size -= sizes[key]
+
+    def size(self, key: str) -> int:
+        return sum(
+            path.getsize(entry_path)
+            for extension in ("json", "body")
+            if path.exists(
+                entry_path := path.join(self.directory, f"{key}.{extension}")
+            )
+        )
+
+
 @dataclass
 class APIClient:
     base_url: str
     session: Session = Session()
     user_agent: str = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"
+    recorder: Optional[Recorder] = None
+    cache: Optional[ResponseCache] = None
+    cassette: Optional[Cassette] = None
 
-    def request(
+    @contextmanager
+    def span(self, name: str) -> Iterator[dict[str, int | str]]:
+        if self.recorder is None:
+            yield {}
+            return
+
+        with self.recorder.span(name) as attributes:
+            yield attributes
+
+    def send(
         self,
         url: str,
-        token: Optional[str] = None,
-        data: Optional[dict[str, Any]] = None,
-    ) -> Response:
-        response = self.session.send(
-            Request(
+        token: Optional[str],
+        data: Optional[dict[str, Any]],
+        name: str,
+        use_cache: bool,
+        stream: bool,
+    ) -> tuple[Response, dict[str, int | str], Optional[str]]:
+        # Only reads can be cached. If there is a cached response, ask the server whether it is still
+        # up to date, instead of downloading it again. A cassette records or replays the full responses
+        # instead, so the cache is skipped with it. Returns the response, the attributes of its span, and
+        # the cache key that its body should be stored under, if any.
+        cache = self.cache if use_cache and not data and self.cassette is None else None
+        cache_key = cache.key(url, token) if cache is not None else None
+        cached_response = (
+            cache.load(cache_key)
+            if cache is not None and cache_key is not None
+            else None
+        )
+        conditional_headers = (
+            {
+                header: value
+                for header, validator in (
+                    ("If-None-Match", "ETag"),
+                    ("If-Modified-Since", "Last-Modified"),
+                )
+                if (value := cached_response.headers.get(validator)) is not None
+            }
+            if cached_response is not None
+            else {}
+        )
+
+        # The bytes are the size of the body that came over the network. A streamed body is only counted
+        # while it is read, after the span of the request, unless it is the empty body of a revalidation.
+        with self.span(name) as attributes:
+            prepared_request = Request(
                 method="POST" if data else "GET",
                 url=url,
                 json=data,
                 headers={
                     "Authorization": f"Bearer {token}" if token else "",
                     "User-Agent": self.user_agent,
+                    **conditional_headers,
                 },
                 cookies=self.session.cookies,
             ).prepare()
-        )
+            response = (
+                self.session.send(prepared_request, stream=stream)
+                if self.cassette is None
+                else self.cassette.send(self.session, prepared_request, stream)
+            )
+            attributes["status"] = response.status_code
+            if not stream or response.status_code == 304:
+                attributes["bytes"] = len(response.content)
+
+        # Reuse the cached body if it has not been modified, and cache new bodies that can be revalidated.
+        # The empty body of the revalidation is released, and the cached one is answered instead, with
+        # the validators of the revalidation.
+        if cached_response is not None and response.status_code == 304:
+            response.close()
+            response = create_response(
+                prepared_request,
+                200,
+                {
+                    **cached_response.headers,
+                    **{
+                        name: value
+                        for name in ("ETag", "Last-Modified")
+                        if (value := response.headers.get(name)) is not None
+                    },
+                },
+                cached_response.content,
+            )
+            cache_key = None
+        elif response.status_code != 200 or not (
+            "ETag" in response.headers or "Last-Modified" in response.headers
+        ):
+            cache_key = None
 
         match response.status_code:
             case 401:
@@ -60,11 +271,59 @@ class APIClient:
                     "The resource that you are looking for is not found."
                 )
 
+        return response, attributes, cache_key
+
+    def request(
+        self,
+        url: str,
+        token: Optional[str] = None,
+        data: Optional[dict[str, Any]] = None,
+        name: str = "request",
+        use_cache: bool = True,
+    ) -> Response:
+        response, _, cache_key = self.send(url, token, data, name, use_cache, False)
+        if self.cache is not None and cache_key is not None:
+            self.cache.store(cache_key, response)
+
         return response
 
+    def stream(
+        self,
+        url: str,
+        token: Optional[str] = None,
+        name: str = "request",
+        use_cache: bool = True,
+    ) -> Iterator[bytes]:
+        # The request is sent right away, so its errors are raised here, but the body is only read in
+        # chunks while they are consumed. The chunks are counted as they are read, and written into the
+        # cache on the way, so the body is never held in memory as a whole.
+        response, attributes, cache_key = self.send(
+            url, token, None, name, use_cache, True
+        )
+        counted = "bytes" not in attributes
+        if counted:
+            attributes["bytes"] = 0
+
+        def iterate_chunks() -> Iterator[bytes]:
+            consumed = 0
+            with response:
+                for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+                    if counted:
+                        consumed += len(chunk)
+                        attributes["bytes"] = consumed
+                    yield chunk
+
+        return (
+            self.cache.store_chunks(cache_key, response, iterate_chunks())
+            if self.cache is not None and cache_key is not None
+            else iterate_chunks()
+        )
+
     def login(self, username: str, password: str) -> str:
         url = f"{self.base_url}/login"
-        response = self.request(url, data={"login": username, "password": password})
+        response = self.request(
+            url, data={"login": username, "password": password}, name="login"
+        )
         if "failure" in response.json():
             raise LoginException(
                 "Failed to log in with your current credentials. Please check and try again."
@@ -72,11 +331,34 @@ class APIClient:
 
         return response.headers["jwt"]
 
-    def fetch_data(self, username: str, token: str) -> tuple[JsonValue, JsonValue]:
+    def fetch_data(
+        self, username: str, token: str, start_date: str = "1970-01-01"
+    ) -> tuple[JsonValue, JsonValue]:
         user_url = f"{self.base_url}/users/{username}"
-        user_response_data = self.request(user_url, token).json()
+        user_response_data = self.request(user_url, token, name="user").json()
 
-        summary_url = f"{self.base_url}/2017-06-30/users/{user_response_data['id']}/xp_summaries?startDate=1970-01-01"
-        summary_response_data = self.request(summary_url, token).json()
+        summary_url = f"{self.base_url}/2017-06-30/users/{user_response_data['id']}/xp_summaries?startDate={start_date}"
+        summary_response_data = self.request(
+            summary_url, token, name="summaries"
+        ).json()
 
         return (user_response_data, summary_response_data)
+
+    def stream_data(
+        self, username: str, token: str, start_date: str = "1970-01-01"
+    ) -> tuple[JsonValue, Iterator[Any]]:
+        # Same as `fetch_data`, but the raw summaries are yielded one by one while the response body
+        # is still being downloaded, instead of holding the whole body and all of its items at once.
+        user_url = f"{self.base_url}/users/{username}"
+        user_response_data = self.request(user_url, token, name="user").json()
+
+        summary_url = f"{self.base_url}/2017-06-30/users/{user_response_data['id']}/xp_summaries?startDate={start_date}"
+        summary_chunks = self.stream(summary_url, token, name="summaries")
+
+        def iterate_summaries() -> Iterator[Any]:
+            # The rest of the body after the summaries is read as well, so it is counted and cached whole.
+            yield from iterate_array_items(summary_chunks, "summaries")
+            for _ in summary_chunks:
+                pass
+
+        return (user_response_data, iterate_summaries())
@@ -0,0 +1,40 @@
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from time import perf_counter
+
+from src.schema import Account
+
+
+@dataclass
+class BatchResult:
+    username: str
+    succeeded: bool
+    message: str
+    duration: float
+
+
+def run_concurrently(
+    accounts: list[Account], task: Callable[[Account], str], max_workers: int
+) -> list[BatchResult]:
+    def run_task(account: Account) -> BatchResult:
+        # Every failure is isolated to its own account, so one bad credential does not
+        # stop the rest of the batch. Any exception counts, so an unexpected one does not
+        # stop it either.
+        start = perf_counter()
+        try:
+            message, succeeded = task(account), True
+        except Exception as error:  # noqa: BLE001
+            message, succeeded = f"{error.__class__.__name__}: {error}", False
+
+        return BatchResult(
+            username=account.username,
+            succeeded=succeeded,
+            message=message,
+            duration=perf_counter() - start,
+        )
+
+    # At most `max_workers` accounts are synchronized at once. The results keep the order
+    # of the accounts.
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(run_task, accounts))
@@ -0,0 +1,221 @@
+from argparse import ArgumentParser
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from mmap import ACCESS_READ, mmap
+from os import path
+from struct import Struct
+from types import TracebackType
+from typing import Any, Self
+
+from src.database import open_atomically
+from src.migration import CHUNK_SIZE, JSONObjectWriter, iterate_database_entries
+from src.synchronizer import date_to_ordinal, ordinal_to_date
+
+# The header holds the magic bytes, the format version, the size of a record, the day ordinal of the
+# first record and the number of records. Every record is one day, starting from the first one.
+HEADER = Struct("<4sHHiI")
+RECORD = Struct("<iiii")
+MAGIC = b"JDVP"
+VERSION = 1
+
+# Fields of a `DatabaseEntry`, in the order of the record. Days without an entry are stored as a record
+# of negative values, which no real entry has, so the records stay addressable by their offset.
+FIELDS = ("xp_today", "number_of_sessions", "session_time", "streak")
+MISSING = (-1,) * len(FIELDS)
+MISSING_RECORD = RECORD.pack(*MISSING)
+
+SOURCE_FILENAME = "duolingo-progress.json"
+BINARY_FILENAME = "duolingo-progress.bin"
+
+
+def write_binary_database(
+    filename: str, entries: Iterable[tuple[str, dict[str, int]]]
+) -> int:
+    # The entries are written in one pass, in order of their date, and the header is filled in at the
+    # end, once the first day and the number of records are known. Returns the number of entries.
+    with open_atomically(filename, binary=True) as file:
+        file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, 0, 0))
+        first_ordinal = last_ordinal = 0
+        entry_count = 0
+        buffer = bytearray()
+        for date, entry in entries:
+            ordinal = date_to_ordinal(date)
+            if entry_count == 0:
+                first_ordinal = last_ordinal = ordinal - 1
+            elif ordinal <= last_ordinal:
+                raise ValueError(
+                    f"Entries have to be ordered by date, but '{date}' came after '{ordinal_to_date(last_ordinal)}'."
+                )
+
+            try:
+                values = [entry[field] for field in FIELDS]
+            except KeyError as error:
+                raise ValueError(
+                    f"Entry of '{date}' has no {error}, run the migrations first."
+                ) from error
+
+            buffer += MISSING_RECORD * (ordinal - last_ordinal - 1)
+            buffer += RECORD.pack(*values)
+            last_ordinal = ordinal
+            entry_count += 1
+            if len(buffer) >= CHUNK_SIZE:
+                file.write(buffer)
+                buffer.clear()
+
+        file.write(buffer)
+        file.seek(0)
+        file.write(
+            HEADER.pack(
+                MAGIC,
+                VERSION,
+                RECORD.size,
+                first_ordinal + 1 if entry_count else 0,
+                last_ordinal - first_ordinal,
+            )
+        )
+
+    return entry_count
+
+
+@dataclass
+class BinaryDatabase:
+    buffer: mmap
+    first_ordinal: int
+    count: int
+
+    @staticmethod
+    def open(filename: str) -> "BinaryDatabase":
+        # The mapping stays valid after the file is closed. Pages are only read once they are accessed,
+        # so opening the database does not depend on its size.
+        with open(filename, "rb") as file:
+            buffer = mmap(file.fileno(), 0, access=ACCESS_READ)
+
+        if len(buffer) < HEADER.size:
+            buffer.close()
+            raise ValueError(f"'{filename}' is too short to be a binary database.")
+
+        magic, version, record_size, first_ordinal, count = HEADER.unpack_from(buffer)
+        if (magic, version, record_size) != (MAGIC, VERSION, RECORD.size):
+            buffer.close()
+            raise ValueError(
+                f"'{filename}' is not a binary database of version {VERSION}."
+            )
+        if len(buffer) < HEADER.size + count * RECORD.size:
+            buffer.close()
+            raise ValueError(f"'{filename}' is cut off after the header.")
+
+        return BinaryDatabase(buffer, first_ordinal, count)
+
+    def close(self) -> None:
+        self.buffer.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exception_type: type[BaseException] | None,
+        exception: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        # Number of days from the first to the last entry, including the days without an entry.
+        return self.count
+
+    def __iter__(self) -> Iterator[tuple[str, dict[str, int]]]:
+        return self.iterate(0, self.count)
+
+    def iterate(self, start: int, stop: int) -> Iterator[tuple[str, dict[str, int]]]:
+        # Only the bytes of the requested records are copied out of the mapping, and decoded at once.
+        start, stop = max(start, 0), min(stop, self.count)
+        if start >= stop:
+            return
+
+        records = self.buffer[
+            HEADER.size + start * RECORD.size : HEADER.size + stop * RECORD.size
+        ]
+        for ordinal, values in enumerate(
+            RECORD.iter_unpack(records), self.first_ordinal + start
+        ):
+            if values != MISSING:
+                yield ordinal_to_date(ordinal), dict(zip(FIELDS, values, strict=True))
+
+    def at(self, date_str: str) -> dict[str, int] | None:
+        position = date_to_ordinal(date_str) - self.first_ordinal
+        if not 0 <= position < self.count:
+            return None
+
+        values = RECORD.unpack_from(self.buffer, HEADER.size + position * RECORD.size)
+        return None if values == MISSING else dict(zip(FIELDS, values, strict=True))
+
+    def range(
+        self, start_date: str, end_date: str
+    ) -> Iterator[tuple[str, dict[str, int]]]:
+        # Both ends are inclusive, and do not have to exist in the database.
+        return self.iterate(
+            date_to_ordinal(start_date) - self.first_ordinal,
+            date_to_ordinal(end_date) - self.first_ordinal + 1,
+        )
+
+    def latest(self, count: int) -> Iterator[tuple[str, dict[str, int]]]:
+        # The entries of the last `count` days up to the last entry.
+        return self.iterate(self.count - count, self.count)
+
+    def to_dict(self) -> dict[str, Any]:
+        return dict(self)
+
+
+def convert_to_binary(json_filename: str, binary_filename: str) -> int:
+    # The JSON database is streamed, so only one entry is held in memory at a time.
+    return write_binary_database(
+        binary_filename, iterate_database_entries(json_filename)
+    )
+
+
+def convert_to_json(binary_filename: str, json_filename: str) -> int:
+    # The output is the same as the one of `write_atomically`, so converting back and forth does not
+    # change the JSON database.
+    entry_count = 0
+    with (
+        BinaryDatabase.open(binary_filename) as database,
+        open_atomically(json_filename) as file,
+    ):
+        writer = JSONObjectWriter(file)
+        for date, entry in database:
+            writer.write(date, entry)
+            entry_count += 1
+        writer.close()
+
+    return entry_count
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        description="Convert the progress databases between JSON and the fixed-width binary format."
+    )
+    parser.add_argument("direction", choices=["to-binary", "to-json"])
+    parser.add_argument(
+        "directories",
+        nargs="*",
+        default=["data"],
+        help="data directories to convert, for example 'data data/accounts/*' (default: data)",
+    )
+    arguments = parser.parse_args()
+
+    for directory in arguments.directories:
+        json_filename = path.join(directory, SOURCE_FILENAME)
+        binary_filename = path.join(directory, BINARY_FILENAME)
+        if arguments.direction == "to-binary":
+            entry_count = convert_to_binary(json_filename, binary_filename)
+        else:
+            entry_count = convert_to_json(binary_filename, json_filename)
+
+        print(
+            f"{directory}: converted {entry_count} days, {path.getsize(json_filename)} bytes of JSON and {path.getsize(binary_filename)} bytes of binary."
+        )
+
+
+if __name__ == "__main__":
+    main()
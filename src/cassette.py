@@ -0,0 +1,233 @@
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from gzip import open as open_gzip
+from io import BytesIO
+from json import dumps, loads
+from os import makedirs, path, walk
+from threading import Lock
+from time import perf_counter, sleep
+from typing import Any
+from urllib.parse import urlsplit
+
+from requests import PreparedRequest, Response, Session
+from requests.structures import CaseInsensitiveDict
+
+# Values that are replaced before anything is written to the archive. The `Authorization` header of the
+# requests is never recorded at all.
+REDACTED = "REDACTED"
+REDACTED_FIELDS = {"password"}
+RECORDED_HEADERS = ("Content-Type", "ETag", "Last-Modified", "jwt")
+REDACTED_HEADERS = {"jwt"}
+
+
+class CassetteException(Exception):
+    pass
+
+
+@dataclass
+class Interaction:
+    method: str
+    target: str
+    body: Any
+    status: int
+    headers: dict[str, str]
+    content: bytes
+    duration: float
+
+    def key(self) -> str:
+        # Requests are matched by the method, the path with the query, and the redacted body. The host is
+        # ignored, so a recording of the real API can be replayed against any base URL.
+        return f"{self.method} {self.target} {dumps(self.body, sort_keys=True)}"
+
+    def encode(self) -> str:
+        # Bodies of the API are UTF-8, but any byte survives the round trip through the archive.
+        return dumps(
+            {
+                "method": self.method,
+                "target": self.target,
+                "body": self.body,
+                "status": self.status,
+                "headers": self.headers,
+                "content": self.content.decode("UTF-8", "surrogateescape"),
+                "duration": round(self.duration, 6),
+            },
+            separators=(",", ":"),
+        )
+
+    @staticmethod
+    def decode(record: dict[str, Any]) -> "Interaction":
+        return Interaction(
+            method=record["method"],
+            target=record["target"],
+            body=record["body"],
+            status=record["status"],
+            headers=record["headers"],
+            content=record["content"].encode("UTF-8", "surrogateescape"),
+            duration=record["duration"],
+        )
+
+
+def create_response(
+    request: PreparedRequest, status_code: int, headers: dict[str, str], content: bytes
+) -> Response:
+    # A response that is answered from memory instead of the network. Its body is read from the raw
+    # stream, just like a downloaded one, so it can be streamed as well.
+    response = Response()
+    response.status_code = status_code
+    response.url = request.url or ""
+    response.headers = CaseInsensitiveDict(headers)
+    response.request = request
+    response.raw = BytesIO(content)
+    return response
+
+
+def take_snapshot(directory: str) -> dict[str, str]:
+    # Every file of the data directory, keyed by its path relative to the directory. Any byte survives
+    # the round trip through the archive, just like the bodies of the interactions.
+    snapshot = {}
+    for root, _, filenames in walk(directory):
+        for filename in filenames:
+            full_path = path.join(root, filename)
+            with open(full_path, "rb") as file:
+                snapshot[path.relpath(full_path, directory)] = file.read().decode(
+                    "UTF-8", "surrogateescape"
+                )
+
+    return snapshot
+
+
+def redact(body: Any) -> Any:
+    if isinstance(body, dict):
+        return {
+            key: REDACTED if key in REDACTED_FIELDS else redact(value)
+            for key, value in body.items()
+        }
+
+    return body
+
+
+def describe_request(request: PreparedRequest) -> tuple[str, str, Any]:
+    url = urlsplit(request.url or "")
+    target = f"{url.path}?{url.query}" if url.query else url.path
+    raw_body = (
+        request.body.decode() if isinstance(request.body, bytes) else request.body
+    )
+    return (
+        request.method or "GET",
+        target,
+        redact(loads(raw_body) if raw_body else None),
+    )
+
+
+@dataclass
+class Cassette:
+    # In record mode, every request is sent and appended to a gzipped archive of JSON lines as soon as
+    # its response has been read. In replay mode, the archive is read once, and every request is answered
+    # from it, without touching the network. The cassette is shared by the accounts of a batch. The data
+    # directory as it was before the recording is kept as well, so the replay starts from the same data
+    # and sends the same requests.
+    filename: str
+    replaying: bool
+    latency: bool = False
+    snapshot: dict[str, str] | None = None
+    interactions: list[Interaction] = field(default_factory=list)
+    consumed: list[bool] = field(default_factory=list)
+    positions: dict[str, list[int]] = field(default_factory=dict)
+    lock: Lock = field(default_factory=Lock, repr=False, compare=False)
+    wait: Callable[[float], None] = sleep
+
+    @staticmethod
+    def record(filename: str, data_directory: str | None = None) -> "Cassette":
+        # An earlier recording in the same file is replaced. The snapshot of the data directory is the
+        # first line of the archive.
+        with open_gzip(filename, "wt", encoding="UTF-8") as file:
+            if data_directory is not None and path.isdir(data_directory):
+                snapshot = {"snapshot": take_snapshot(data_directory)}
+                file.write(dumps(snapshot, separators=(",", ":")) + "\n")
+
+        return Cassette(filename=filename, replaying=False)
+
+    @staticmethod
+    def replay(filename: str, latency: bool = False) -> "Cassette":
+        # Every interaction is kept once, and is marked as consumed when it answers a request. Identical
+        # requests are answered in the order they were recorded, and the last answer is repeated once
+        # the others are used up, so the same recording can be replayed over and over.
+        cassette = Cassette(filename=filename, replaying=True, latency=latency)
+        with open_gzip(filename, "rt", encoding="UTF-8") as file:
+            for line in file:
+                record = loads(line)
+                if "snapshot" in record:
+                    cassette.snapshot = record["snapshot"]
+                else:
+                    cassette.interactions.append(Interaction.decode(record))
+        cassette.consumed = [False] * len(cassette.interactions)
+        for index, interaction in enumerate(cassette.interactions):
+            cassette.positions.setdefault(interaction.key(), []).append(index)
+
+        return cassette
+
+    def restore_snapshot(self, directory: str) -> bool:
+        # Write the recorded data directory into an empty one. Returns whether there was any snapshot.
+        if self.snapshot is None:
+            return False
+
+        for relative_path, content in self.snapshot.items():
+            filename = path.join(directory, relative_path)
+            makedirs(path.dirname(filename), exist_ok=True)
+            with open(filename, "wb") as file:
+                file.write(content.encode("UTF-8", "surrogateescape"))
+
+        return True
+
+    def send(
+        self, session: Session, request: PreparedRequest, stream: bool
+    ) -> Response:
+        if self.replaying:
+            return self.play(request)
+
+        # The body is read right away, even if it is streamed, so the recorded duration covers it.
+        start = perf_counter()
+        response = session.send(request, stream=stream)
+        content = response.content
+        method, target, body = describe_request(request)
+        interaction = Interaction(
+            method=method,
+            target=target,
+            body=body,
+            status=response.status_code,
+            headers={
+                name: REDACTED if name in REDACTED_HEADERS else value
+                for name in RECORDED_HEADERS
+                if (value := response.headers.get(name)) is not None
+            },
+            content=content,
+            duration=perf_counter() - start,
+        )
+        with self.lock, open_gzip(self.filename, "at", encoding="UTF-8") as file:
+            file.write(interaction.encode() + "\n")
+
+        return response
+
+    def play(self, request: PreparedRequest) -> Response:
+        # A request with another query, for example another start date because the data has changed
+        # since the recording, is not answered with a response that was recorded for another one.
+        method, target, body = describe_request(request)
+        key = Interaction(method, target, body, 0, {}, b"", 0.0).key()
+        with self.lock:
+            matches = self.positions.get(key)
+            if not matches:
+                raise CassetteException(
+                    f"Request '{method} {target}' was not recorded in '{self.filename}'."
+                )
+            index = next(
+                (index for index in matches if not self.consumed[index]), matches[-1]
+            )
+            self.consumed[index] = True
+            interaction = self.interactions[index]
+
+        if self.latency:
+            self.wait(interaction.duration)
+
+        return create_response(
+            request, interaction.status, interaction.headers, interaction.content
+        )
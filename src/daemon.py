@@ -0,0 +1,229 @@
+from argparse import ArgumentParser
+from collections.abc import Callable
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from heapq import heapify, heappop, heappush
+from json import loads
+from math import ceil
+from os import environ, path
+from random import Random
+from signal import SIGINT, SIGTERM, signal
+from threading import Event
+from time import monotonic
+
+from requests.adapters import HTTPAdapter
+
+from src.api import APIClient, create_session
+from src.database import create_missing_databases, open_databases
+from src.runner import DATABASE_NAMES, AccountState, sync_account
+from src.schema import Account
+from src.startup import BASE_API_URL, TOKEN_STORE_PATH
+from src.token_store import TokenStore
+
+
+def log(message: str) -> None:
+    print(f"[JDV] {message}", flush=True)
+
+
+def spread_offsets(count: int, interval: float) -> list[float]:
+    # The accounts are spread evenly across the interval, so they never all start at once.
+    return [interval * index / count for index in range(count)]
+
+
+@dataclass
+class Scheduler:
+    interval: float
+    jitter: float = 0.0
+    random: Random = field(default_factory=Random)
+    clock: Callable[[], float] = monotonic
+
+    def run(self, tasks: list[Callable[[], None]], stop: Event) -> None:
+        # Every task runs once per interval at its own offset, delayed by up to `jitter` seconds. A task
+        # that is late, because the one before it took too long, runs right away, but missed runs are
+        # skipped instead of being caught up on. The running task is always finished before stopping.
+        start = self.clock()
+        offsets = spread_offsets(len(tasks), self.interval)
+        queue = [
+            (start + offset + self.random.uniform(0, self.jitter), index, 0)
+            for index, offset in enumerate(offsets)
+        ]
+        heapify(queue)
+        while queue:
+            due, index, cycle = queue[0]
+            if stop.wait(max(due - self.clock(), 0)):
+                return
+
+            heappop(queue)
+            tasks[index]()
+            cycle = max(
+                cycle + 1,
+                ceil((self.clock() - start - offsets[index]) / self.interval),
+            )
+            heappush(
+                queue,
+                (
+                    start
+                    + offsets[index]
+                    + cycle * self.interval
+                    + self.random.uniform(0, self.jitter),
+                    index,
+                    cycle,
+                ),
+            )
+
+
+def handle_signals(stop: Event) -> None:
+    # SIGTERM (for example from systemd or Docker) and SIGINT stop the daemon once the current
+    # synchronization is written, so no database is left half-written.
+    for signal_number in (SIGINT, SIGTERM):
+        signal(signal_number, lambda number, frame: stop.set())
+
+
+@dataclass
+class DaemonAccount:
+    account: Account
+    data_directory: str
+    api: APIClient
+    state: AccountState = field(default_factory=AccountState)
+
+
+def create_task(
+    daemon_account: DaemonAccount,
+    overlap_days: int,
+    storage: str,
+    telemetry: bool,
+    token_store: TokenStore | None,
+    timezone: str | None = None,
+) -> Callable[[], None]:
+    def task() -> None:
+        # A failing account is logged and tried again in the next interval. Its state is read from the
+        # data directory again, as the failure might have happened in the middle of writing it. Any
+        # exception counts, as an unexpected one would otherwise stop the daemon for every account.
+        username = daemon_account.account.username
+        credential, passwordless = daemon_account.account.credential()
+        try:
+            _, changed_months = sync_account(
+                daemon_account.api,
+                username,
+                credential,
+                passwordless,
+                daemon_account.data_directory,
+                overlap_days=overlap_days,
+                storage=storage,
+                telemetry=telemetry,
+                token_store=token_store,
+                state=daemon_account.state,
+                timezone=timezone,
+            )
+        except Exception as error:  # noqa: BLE001
+            daemon_account.state = AccountState(
+                databases=daemon_account.state.databases
+            )
+            log(f"Account '{username}' failed: {error.__class__.__name__}: {error}")
+            return
+
+        log(
+            f"Account '{username}' synchronized {', '.join(changed_months)}."
+            if changed_months
+            else f"Account '{username}' is already synchronized."
+        )
+
+    return task
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        description="Keep synchronizing your Duolingo progress on a schedule, until stopped."
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=24 * 60 * 60,
+        help="seconds between the synchronizations of every account (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--jitter",
+        type=float,
+        default=10 * 60,
+        help="up to this many seconds are added to every synchronization at random (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="synchronize every account in the DUOLINGO_ACCOUNTS environment variable",
+    )
+    parser.add_argument("--overlap-days", type=int, default=14)
+    parser.add_argument(
+        "--storage", choices=["json", "journal", "sqlite"], default="json"
+    )
+    parser.add_argument("--no-telemetry", action="store_false", dest="telemetry")
+    parser.add_argument("--token-store", metavar="FILE", default=TOKEN_STORE_PATH)
+    parser.add_argument(
+        "--no-token-store", action="store_const", const=None, dest="token_store"
+    )
+    parser.add_argument("--api-url", default=BASE_API_URL)
+    parser.add_argument("--timezone")
+    arguments = parser.parse_args()
+
+    # Every account keeps its own session, and with it its keep-alive connections, for as long as the
+    # daemon runs. The sessions share one pool, just like in batch mode.
+    accounts = (
+        [
+            (Account(**account), path.join("data", "accounts", account["username"]))
+            for account in loads(environ["DUOLINGO_ACCOUNTS"])
+        ]
+        if arguments.batch
+        else [
+            (
+                Account(
+                    username=environ["DUOLINGO_USERNAME"],
+                    jwt=environ.get("DUOLINGO_JWT"),
+                    password=environ.get("DUOLINGO_PASSWORD"),
+                ),
+                "data",
+            )
+        ]
+    )
+    # The databases of every account stay open until the daemon stops.
+    adapter = HTTPAdapter(pool_maxsize=len(accounts))
+    token_store = TokenStore(arguments.token_store) if arguments.token_store else None
+    tasks = []
+    with ExitStack() as stack:
+        for account, data_directory in accounts:
+            create_missing_databases(data_directory, DATABASE_NAMES, arguments.storage)
+            daemon_account = DaemonAccount(
+                account=account,
+                data_directory=data_directory,
+                api=APIClient(
+                    base_url=arguments.api_url, session=create_session(adapter)
+                ),
+                state=AccountState(
+                    databases=stack.enter_context(
+                        open_databases(
+                            data_directory, DATABASE_NAMES, arguments.storage
+                        )
+                    )
+                ),
+            )
+            tasks.append(
+                create_task(
+                    daemon_account,
+                    arguments.overlap_days,
+                    arguments.storage,
+                    arguments.telemetry,
+                    token_store,
+                    arguments.timezone,
+                )
+            )
+
+        stop = Event()
+        handle_signals(stop)
+        log(
+            f"Daemon is synchronizing {len(tasks)} accounts every {arguments.interval:g} seconds."
+        )
+        Scheduler(interval=arguments.interval, jitter=arguments.jitter).run(tasks, stop)
+    log("Daemon has stopped.")
+
+
+if __name__ == "__main__":
+    main()
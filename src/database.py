@@ -1,8 +1,63 @@
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
 from dataclasses import dataclass
-from json import dump, load
-from typing import Any
+from json import JSONDecodeError, dumps, load, loads
+from os import chmod, fsync, makedirs, path, remove, replace, stat
+from sqlite3 import Connection, connect
+from tempfile import NamedTemporaryFile
+from typing import IO, TYPE_CHECKING, Any, Protocol
 
-from pydantic import JsonValue
+# Pydantic is only needed for type checking, so the entry point can read the databases before it
+# decides to import anything else.
+if TYPE_CHECKING:
+    from pydantic import JsonValue
+
+
+class Storage(Protocol):
+    def get(self) -> Any: ...
+
+    def set(self, data: "JsonValue") -> None: ...
+
+    def write_changes(self, data: dict[str, Any], keys: Iterable[str]) -> None: ...
+
+
+@contextmanager
+def open_atomically(filename: str, binary: bool = False) -> Iterator[IO[Any]]:
+    # Write to a temporary file in the same directory first, and then rename it over the real file.
+    # A crash in the middle of writing leaves the old file intact. Temporary files are only readable
+    # by the owner, so the permissions of the original file are copied over, if there is any.
+    mode = stat(filename).st_mode if path.exists(filename) else 0o644
+    with NamedTemporaryFile(
+        "wb" if binary else "w",
+        encoding=None if binary else "UTF-8",
+        dir=path.dirname(path.abspath(filename)),
+        prefix=f".{path.basename(filename)}.",
+        suffix=".tmp",
+        delete=False,
+    ) as file:
+        try:
+            yield file
+            file.flush()
+            fsync(file.fileno())
+            chmod(file.name, mode)
+        except BaseException:
+            file.close()
+            remove(file.name)
+            raise
+
+    replace(file.name, filename)
+
+
+def write_atomically(filename: str, data: "JsonValue") -> None:
+    # If the content is byte-for-byte the same, the file is not touched at all.
+    content = dumps(data, ensure_ascii=False, indent=2, sort_keys=True)
+    if path.exists(filename):
+        with open(filename, "r", encoding="UTF-8") as existing_file:
+            if existing_file.read() == content:
+                return
+
+    with open_atomically(filename) as file:
+        file.write(content)
 
 
 @dataclass
@@ -13,6 +68,328 @@ class Database:
         with open(self.filename, "r", encoding="UTF-8") as file:
             return load(file)
 
-    def set(self, data: JsonValue) -> None:
-        with open(self.filename, "w", encoding="UTF-8") as file:
-            dump(data, file, ensure_ascii=False, indent=2, sort_keys=True)
+    def set(self, data: "JsonValue") -> None:
+        write_atomically(self.filename, data)
+
+    def write_changes(self, data: dict[str, Any], keys: Iterable[str]) -> None:
+        # A JSON file can only be written as a whole, so the changed keys do not help. The existing file
+        # is still read to skip writing identical content.
+        write_atomically(self.filename, data)
+
+
+@dataclass
+class JournaledDatabase:
+    filename: str
+    compaction_threshold: int = 64 * 1024
+
+    @property
+    def journal_filename(self) -> str:
+        return f"{self.filename}.journal"
+
+    def get(self) -> Any:
+        # Start from the snapshot and replay every journal record on top of it in order.
+        data = Database(filename=self.filename).get()
+        for record in self.read_journal():
+            if record.get("deleted"):
+                data.pop(record["key"], None)
+            else:
+                data[record["key"]] = record["value"]
+
+        return data
+
+    def set(self, data: "JsonValue") -> None:
+        if not isinstance(data, dict):
+            raise TypeError("A journaled database can only store a JSON object.")
+
+        # Only the keys that are new, changed, or removed are appended to the journal.
+        current_data = self.get()
+        self.write_changes(
+            data,
+            [
+                key
+                for key, value in data.items()
+                if key not in current_data or current_data[key] != value
+            ]
+            + [key for key in current_data if key not in data],
+        )
+
+    def write_changes(self, data: dict[str, Any], keys: Iterable[str]) -> None:
+        # The caller already knows which keys differ from the stored data, so the journal is appended to
+        # without replaying it first. Keys that are not in the data are removed.
+        records = [
+            {"key": key, "value": data[key]}
+            if key in data
+            else {"key": key, "deleted": True}
+            for key in keys
+        ]
+        if not records:
+            return
+
+        self.truncate_torn_record()
+        with open(self.journal_filename, "a", encoding="UTF-8") as file:
+            file.writelines(
+                f"{dumps(record, ensure_ascii=False, sort_keys=True)}\n"
+                for record in records
+            )
+            file.flush()
+            fsync(file.fileno())
+
+        if path.getsize(self.journal_filename) >= self.compaction_threshold:
+            self.compact()
+
+    def read_journal(self) -> list[dict[str, Any]]:
+        if not path.exists(self.journal_filename):
+            return []
+
+        # A crash while appending can only tear the last record, which is then ignored.
+        records = []
+        with open(self.journal_filename, "r", encoding="UTF-8") as file:
+            for line in file:
+                try:
+                    records.append(loads(line))
+                except JSONDecodeError:
+                    break
+
+        return records
+
+    def truncate_torn_record(self) -> None:
+        # Drop the remains of a record that was torn by a crash, so new records start on their own line.
+        if not path.exists(self.journal_filename):
+            return
+
+        with open(self.journal_filename, "rb+") as file:
+            content = file.read()
+            if content and not content.endswith(b"\n"):
+                file.truncate(content.rfind(b"\n") + 1)
+
+    def compact(self) -> None:
+        # The snapshot is replaced before the journal is removed. If the process dies in between,
+        # replaying the journal on top of the new snapshot gives the same result.
+        write_atomically(self.filename, self.get())
+        if path.exists(self.journal_filename):
+            remove(self.journal_filename)
+
+    def export(self, filename: str) -> None:
+        # Write the full data in the same layout as `Database`, for example for the website build.
+        write_atomically(filename, self.get())
+
+
+def connect_sqlite(filename: str) -> Connection:
+    # Transactions are managed explicitly with `transaction`, so the driver must not open them implicitly.
+    # The primary key doubles as the date index for every namespace.
+    connection = connect(filename, isolation_level=None, timeout=30)
+    connection.execute(
+        """
+        CREATE TABLE IF NOT EXISTS records (
+            namespace TEXT NOT NULL,
+            date TEXT NOT NULL,
+            value TEXT NOT NULL,
+            PRIMARY KEY (namespace, date)
+        ) WITHOUT ROWID
+        """
+    )
+
+    return connection
+
+
+@contextmanager
+def transaction(*databases: Storage) -> Iterator[None]:
+    # Group the writes of all SQLite databases that share a connection into one transaction. File based
+    # databases are written one by one, as there is nothing to group them with.
+    connections = list(
+        {
+            id(database.connection): database.connection
+            for database in databases
+            if isinstance(database, SQLiteDatabase)
+            and not database.connection.in_transaction
+        }.values()
+    )
+    for connection in connections:
+        connection.execute("BEGIN")
+
+    try:
+        yield
+    except BaseException:
+        for connection in connections:
+            connection.execute("ROLLBACK")
+        raise
+
+    for connection in connections:
+        connection.execute("COMMIT")
+
+
+@dataclass
+class SQLiteDatabase:
+    connection: Connection
+    namespace: str
+
+    def get(self) -> Any:
+        rows = self.connection.execute(
+            "SELECT date, value FROM records WHERE namespace = ? ORDER BY date",
+            (self.namespace,),
+        )
+        return {date: loads(value) for date, value in rows}
+
+    def set(self, data: "JsonValue") -> None:
+        if not isinstance(data, dict):
+            raise TypeError("A SQLite database can only store a JSON object.")
+
+        # Just like the other databases, `set` replaces the whole content, but only the changed rows
+        # are actually written.
+        current_rows = dict(
+            self.connection.execute(
+                "SELECT date, value FROM records WHERE namespace = ?",
+                (self.namespace,),
+            ).fetchall()
+        )
+        new_rows = {
+            date: dumps(value, ensure_ascii=False, sort_keys=True)
+            for date, value in data.items()
+        }
+
+        with transaction(self):
+            self.connection.executemany(
+                "DELETE FROM records WHERE namespace = ? AND date = ?",
+                ((self.namespace, date) for date in current_rows.keys() - new_rows),
+            )
+            self.upsert_rows(
+                (date, value)
+                for date, value in new_rows.items()
+                if current_rows.get(date) != value
+            )
+
+    def write_changes(self, data: dict[str, Any], keys: Iterable[str]) -> None:
+        # Only the rows of the changed keys are written, without reading the others first. Keys that
+        # are not in the data are removed.
+        keys = list(keys)
+        with transaction(self):
+            self.connection.executemany(
+                "DELETE FROM records WHERE namespace = ? AND date = ?",
+                ((self.namespace, date) for date in keys if date not in data),
+            )
+            self.upsert_rows(
+                (date, dumps(data[date], ensure_ascii=False, sort_keys=True))
+                for date in keys
+                if date in data
+            )
+
+    def upsert_rows(self, rows: Iterable[tuple[str, str]]) -> None:
+        self.connection.executemany(
+            """
+            INSERT INTO records (namespace, date, value) VALUES (?, ?, ?)
+            ON CONFLICT (namespace, date) DO UPDATE SET value = excluded.value
+            """,
+            ((self.namespace, date, value) for date, value in rows),
+        )
+
+    def upsert(self, date: str, value: "JsonValue") -> None:
+        with transaction(self):
+            self.connection.execute(
+                """
+                INSERT INTO records (namespace, date, value) VALUES (?, ?, ?)
+                ON CONFLICT (namespace, date) DO UPDATE SET value = excluded.value
+                """,
+                (
+                    self.namespace,
+                    date,
+                    dumps(value, ensure_ascii=False, sort_keys=True),
+                ),
+            )
+
+    def range(self, start_date: str, end_date: str) -> dict[str, Any]:
+        # Both ends are inclusive, and the lookup is served by the primary key index.
+        rows = self.connection.execute(
+            """
+            SELECT date, value FROM records
+            WHERE namespace = ? AND date BETWEEN ? AND ?
+            ORDER BY date
+            """,
+            (self.namespace, start_date, end_date),
+        )
+        return {date: loads(value) for date, value in rows}
+
+
+def import_json_databases(filenames: list[str], connection: Connection) -> None:
+    # Every JSON file becomes its own namespace, named after the file without its extension, in a
+    # single transaction.
+    databases = [
+        SQLiteDatabase(
+            connection=connection,
+            namespace=path.splitext(path.basename(filename))[0],
+        )
+        for filename in filenames
+    ]
+    with transaction(*databases):
+        for filename, database in zip(filenames, databases):
+            database.set(Database(filename=filename).get())
+
+
+def open_database(filename: str, storage: str = "json") -> Storage:
+    match storage:
+        case "json":
+            return Database(filename=filename)
+        case "journal":
+            return JournaledDatabase(filename=filename)
+        case _:
+            raise ValueError(f"Unknown storage backend: '{storage}'.")
+
+
+@contextmanager
+def open_databases(
+    directory: str, names: list[str], storage: str
+) -> Iterator[list[Storage]]:
+    # File based databases live in one JSON file per name, while SQLite keeps all of them in one file,
+    # so they can be written in one transaction. The connection is closed when the block is left.
+    if storage != "sqlite":
+        yield [
+            open_database(path.join(directory, f"{name}.json"), storage)
+            for name in names
+        ]
+        return
+
+    connection = connect_sqlite(path.join(directory, "duolingo.sqlite3"))
+    try:
+        yield [SQLiteDatabase(connection=connection, namespace=name) for name in names]
+    finally:
+        connection.close()
+
+
+def create_missing_databases(directory: str, names: list[str], storage: str) -> None:
+    # New data directories start with empty databases. SQLite creates its table when it is connected.
+    makedirs(directory, exist_ok=True)
+    if storage == "sqlite":
+        return
+
+    for name in names:
+        filename = path.join(directory, f"{name}.json")
+        if not path.exists(filename):
+            Database(filename=filename).set({})
+
+
+def list_database_files(directory: str, name: str, storage: str) -> list[str]:
+    # Files that hold the content of a database, the main one first. SQLite keeps every database in
+    # the same file, and a journal only exists once something was appended to it.
+    if storage == "sqlite":
+        return [path.join(directory, "duolingo.sqlite3")]
+
+    filename = path.join(directory, f"{name}.json")
+    return [filename, f"{filename}.journal"] if storage == "journal" else [filename]
+
+
+def check_database_exists(directory: str, name: str, storage: str) -> None:
+    # Opening a SQLite database creates its file, so tools that only read or rewrite existing data check
+    # for it first.
+    source = list_database_files(directory, name, storage)[0]
+    if not path.exists(source):
+        raise FileNotFoundError(f"There is no database at '{source}'.")
+
+
+def export_database(directory: str, name: str, storage: str, filename: str) -> None:
+    # Write the full content of a database in the layout of `Database`, whatever the storage, for example
+    # for the website build while the newest days are still in a journal or in SQLite. A missing SQLite
+    # file is not created just to export nothing.
+    check_database_exists(directory, name, storage)
+    with open_databases(directory, [name], storage) as [database]:
+        data = database.get()
+    makedirs(path.dirname(path.abspath(filename)), exist_ok=True)
+    write_atomically(filename, data)
@@ -0,0 +1,86 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import Any
+
+from src.synchronizer import date_to_ordinal, ordinal_to_date
+
+
+@dataclass
+class DateIndex:
+    ordinals: "array[int]"
+    columns: dict[str, "array[int]"]
+
+    @staticmethod
+    def create(raw: dict[str, dict[str, int]]) -> "DateIndex":
+        # The dates are sorted once, and every field of the entries becomes its own column, aligned with
+        # the day ordinals. All entries are expected to have the same fields, like the progress database.
+        dates = sorted(raw)
+        fields = sorted(raw[dates[0]]) if dates else []
+        return DateIndex(
+            ordinals=array("l", (date_to_ordinal(date_str) for date_str in dates)),
+            columns={
+                field: array("q", (raw[date_str][field] for date_str in dates))
+                for field in fields
+            },
+        )
+
+    def __len__(self) -> int:
+        return len(self.ordinals)
+
+    def view(self) -> "DateView":
+        return DateView(self, 0, len(self))
+
+    def range(self, start_date: str, end_date: str) -> "DateView":
+        # Both ends are inclusive, and do not have to exist in the index.
+        return DateView(
+            self,
+            bisect_left(self.ordinals, date_to_ordinal(start_date)),
+            bisect_right(self.ordinals, date_to_ordinal(end_date)),
+        )
+
+    def latest(self, count: int) -> "DateView":
+        # The last `count` stored days, which are the last `count` days of a synchronized database.
+        return DateView(self, max(len(self) - count, 0), len(self))
+
+    def at(self, date_str: str) -> dict[str, int] | None:
+        ordinal = date_to_ordinal(date_str)
+        position = bisect_left(self.ordinals, ordinal)
+        if position == len(self) or self.ordinals[position] != ordinal:
+            return None
+
+        return {field: column[position] for field, column in self.columns.items()}
+
+
+@dataclass
+class DateView:
+    index: DateIndex
+    start: int
+    stop: int
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def __iter__(self) -> Iterator[tuple[str, dict[str, int]]]:
+        for position in range(self.start, self.stop):
+            yield (
+                ordinal_to_date(self.index.ordinals[position]),
+                {
+                    field: column[position]
+                    for field, column in self.index.columns.items()
+                },
+            )
+
+    def dates(self) -> Iterator[str]:
+        return (
+            ordinal_to_date(ordinal)
+            for ordinal in memoryview(self.index.ordinals)[self.start : self.stop]
+        )
+
+    def column(self, field: str) -> memoryview:
+        # A slice of a memory view shares the memory of the index instead of copying the values.
+        return memoryview(self.index.columns[field])[self.start : self.stop]
+
+    def to_dict(self) -> dict[str, Any]:
+        return dict(self)
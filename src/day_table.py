@@ -0,0 +1,191 @@
+from bisect import bisect_right, insort
+from collections.abc import Container, Iterable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, tzinfo
+from functools import cache
+from operator import itemgetter
+from threading import Lock
+from time import localtime
+from zoneinfo import ZoneInfo
+
+# One day in the table, as the timestamp of its first second, the timestamp right after its last second,
+# and its date in the `%Y/%m/%d` format.
+Day = tuple[float, float, str]
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+@dataclass
+class DayTable:
+    # Without a timezone, the days are the ones of the local time of the machine. The table is shared by
+    # the threads of the process, so days are only inserted while holding the lock.
+    timezone: tzinfo | None = None
+    days: list[Day] = field(default_factory=list)
+    lock: Lock = field(default_factory=Lock, repr=False, compare=False)
+
+    def lookup(self, timestamp: float) -> Day | None:
+        days = self.days
+        position = locate(days, timestamp)
+        return days[position] if position >= 0 else None
+
+    def offset(self, timestamp: float) -> int:
+        # Seconds that the clocks of the timezone are ahead of UTC at the given moment.
+        if self.timezone is None:
+            return localtime(timestamp).tm_gmtoff
+
+        offset = datetime.fromtimestamp(timestamp, self.timezone).utcoffset()
+        return int((offset or timedelta()).total_seconds())
+
+    def compute(self, timestamp: float) -> tuple[Day, int]:
+        # The date and the offset come from a single look at the clocks of the timezone. Midnight is found
+        # from the offset, which gives the right range unless the clocks change on that day.
+        if self.timezone is None:
+            time = localtime(timestamp)
+            date_str = f"{time.tm_year:04}/{time.tm_mon:02}/{time.tm_mday:02}"
+            offset = time.tm_gmtoff
+        else:
+            moment = datetime.fromtimestamp(timestamp, self.timezone)
+            date_str = f"{moment.year:04}/{moment.month:02}/{moment.day:02}"
+            offset = int((moment.utcoffset() or timedelta()).total_seconds())
+
+        start = (timestamp + offset) // SECONDS_PER_DAY * SECONDS_PER_DAY - offset
+        return (start, start + SECONDS_PER_DAY, date_str), offset
+
+    def has_midnights(
+        self, day: Day, offset: int, neighbours: Container[float] = ()
+    ) -> bool:
+        # The offset must be the same at both ends of the day. A boundary that is shared with a stored
+        # neighbour, or with one of the given starts of new neighbours, is a midnight already, so
+        # consecutive days only check one end.
+        start, end, _ = day
+        return (
+            start - SECONDS_PER_DAY in neighbours
+            or (
+                (previous_day := self.lookup(start - 1)) is not None
+                and previous_day[1] == start
+            )
+            or self.offset(start) == offset
+        ) and (
+            end in neighbours
+            or ((next_day := self.lookup(end)) is not None and next_day[0] == end)
+            or self.offset(end) == offset
+        )
+
+    def add(self, timestamp: float) -> Day:
+        # Only days with the same offset at both of their ends are stored, the others are returned
+        # without a range, and are computed again.
+        day, offset = self.compute(timestamp)
+        with self.lock:
+            if not self.has_midnights(day, offset):
+                return (0.0, 0.0, day[2])
+
+            if self.lookup(timestamp) is None:
+                insort(self.days, day, key=itemgetter(0))
+
+        return day
+
+    def find(self, timestamp: float) -> str:
+        # The timezone is only consulted for the first timestamp of every day.
+        return (self.lookup(timestamp) or self.add(timestamp))[2]
+
+    def convert(self, timestamps: Iterable[float]) -> list[str]:
+        # Converts a whole array at once, see `DayBatch`.
+        batch = DayBatch(self)
+        dates = [batch.find(timestamp) for timestamp in timestamps]
+        batch.store()
+        return dates
+
+
+@dataclass
+class DayBatch:
+    # Converts the timestamps of one array, such as the summaries of a response, in order. The API orders
+    # them, so the day of a timestamp is usually the one of the previous timestamp, or a stored day next
+    # to it, which skips the search. A new day costs a single look at the clocks: a boundary that it shares
+    # with another new day of the same offset is a midnight, as the clocks never change twice within two
+    # days. The other boundaries are checked once the day is used again or stored, and the new days are
+    # stored all at once at the end.
+    table: DayTable
+    current: Day = (0.0, 0.0, "")
+    checked: bool = False
+    found: dict[float, tuple[Day, int]] = field(default_factory=dict)
+    # The stored days that the current day was found in, and its position there.
+    days: list[Day] = field(default_factory=list)
+    position: int = -1
+
+    def find(self, timestamp: float) -> str:
+        start, end, date_str = self.current
+        if start <= timestamp < end:
+            if self.checked or self.check(self.current):
+                return date_str
+            return self.table.find(timestamp)
+
+        if self.table.days:
+            days = self.days
+            for position in (self.position - 1, self.position + 1):
+                if (
+                    0 <= position < len(days)
+                    and days[position][0] <= timestamp < days[position][1]
+                ):
+                    break
+            else:
+                days = self.table.days
+                position = locate(days, timestamp)
+
+            if position >= 0:
+                self.current, self.checked = days[position], True
+                self.days, self.position = days, position
+                return self.current[2]
+
+        day, offset = self.table.compute(timestamp)
+        self.found.setdefault(day[0], (day, offset))
+        self.current, self.checked = day, False
+        return day[2]
+
+    def check(self, day: Day) -> bool:
+        # Days on which the clocks change are dropped, and their timestamps are left to the table.
+        _, offset = self.found[day[0]]
+        if self.table.has_midnights(day, offset, self.found):
+            self.checked = True
+            return True
+
+        del self.found[day[0]]
+        self.current = (0.0, 0.0, "")
+        return False
+
+    def store(self) -> None:
+        # The new days are merged into a new list, which replaces the one of the table at once. Days in
+        # the middle of a run of new days share both of their boundaries.
+        with self.table.lock:
+            stored_starts = {start for start, _, _ in self.table.days}
+            new_days = [
+                day
+                for start, (day, offset) in self.found.items()
+                if start not in stored_starts
+                and (
+                    (
+                        start - SECONDS_PER_DAY in self.found
+                        and start + SECONDS_PER_DAY in self.found
+                    )
+                    or self.table.has_midnights(day, offset, self.found)
+                )
+            ]
+            if new_days:
+                self.table.days = sorted([*self.table.days, *new_days])
+        self.found.clear()
+
+
+def locate(days: list[Day], timestamp: float) -> int:
+    # Position of the day of the timestamp in the sorted days, or -1. Days are only ever inserted, or the
+    # whole list is replaced, so a search that races with an insert from another thread at worst finds a
+    # neighbouring day, which fails the check and is computed again.
+    position = bisect_right(days, timestamp, key=itemgetter(0)) - 1
+    return (
+        position
+        if position >= 0 and days[position][0] <= timestamp < days[position][1]
+        else -1
+    )
+
+
+@cache
+def get_day_table(timezone: str | None = None) -> DayTable:
+    # One table per timezone name for the whole process, so the days are shared by every account.
+    return DayTable(ZoneInfo(timezone) if timezone else None)
@@ -0,0 +1,101 @@
+from dataclasses import dataclass
+from hashlib import sha256
+from itertools import takewhile
+from json import dumps
+from os import path, stat
+from typing import Any
+
+from pydantic import JsonValue
+
+from src.database import Database
+
+
+def compute_month_digests(
+    raw: dict[str, Any], since_month: str | None = None
+) -> dict[str, str]:
+    # Group the days by their `%Y/%m` prefix, and hash the canonical JSON of every month. With
+    # `since_month`, only the months from then on are hashed, walking backwards from the newest date,
+    # so the database has to be ordered by date.
+    dates = (
+        raw
+        if since_month is None
+        else takewhile(lambda date_str: date_str[:7] >= since_month, reversed(raw))
+    )
+    months: dict[str, list[str]] = {}
+    for date_str in dates:
+        months.setdefault(date_str[:7], []).append(date_str)
+
+    return {
+        month: sha256(
+            dumps(
+                [[date_str, raw[date_str]] for date_str in sorted(dates_in_month)],
+                ensure_ascii=False,
+                separators=(",", ":"),
+                sort_keys=True,
+            ).encode()
+        ).hexdigest()
+        for month, dates_in_month in sorted(months.items())
+    }
+
+
+def compute_root_digest(month_digests: dict[str, str]) -> str:
+    return sha256(
+        "".join(
+            f"{month}:{digest}\n" for month, digest in sorted(month_digests.items())
+        ).encode()
+    ).hexdigest()
+
+
+def update_month_digests(
+    raw: dict[str, Any], previous: dict[str, str], since_month: str | None
+) -> dict[str, str]:
+    # Months before `since_month` are not touched by the synchronization, so their previous digests
+    # are kept, and only the recent months are hashed again.
+    if since_month is None or not previous:
+        return compute_month_digests(raw)
+
+    return {
+        **{month: digest for month, digest in previous.items() if month < since_month},
+        **compute_month_digests(raw, since_month),
+    }
+
+
+def find_changed_months(old: dict[str, str], new: dict[str, str]) -> list[str]:
+    # Months that were added, removed, or modified, in chronological order.
+    return sorted(
+        month for month in old.keys() | new.keys() if old.get(month) != new.get(month)
+    )
+
+
+@dataclass
+class DigestIndex:
+    # The index belongs to the files of the database that it was computed from, so it records their
+    # modification times and sizes, and it is ignored once they were changed by anything else.
+    filename: str
+    database_filenames: list[str]
+
+    def fingerprint(self) -> list[JsonValue]:
+        return [
+            [(status := stat(filename)).st_mtime_ns, status.st_size]
+            if path.exists(filename)
+            else None
+            for filename in self.database_filenames
+        ]
+
+    def get(self) -> dict[str, Any] | None:
+        if not path.exists(self.filename):
+            return None
+
+        index: dict[str, Any] = Database(filename=self.filename).get()
+        return index if index.get("fingerprint") == self.fingerprint() else None
+
+    def set(self, month_digests: dict[str, str]) -> None:
+        # Called once the database was written. An index that did not change is not written again.
+        months: dict[str, JsonValue] = {**month_digests}
+        Database(filename=self.filename).set(
+            {
+                "root": compute_root_digest(month_digests),
+                "months": months,
+                "fingerprint": self.fingerprint(),
+            }
+        )
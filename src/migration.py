@@ -0,0 +1,292 @@
+from argparse import ArgumentParser
+from collections.abc import Callable, Generator, Iterator
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from functools import partial
+from heapq import merge
+from itertools import chain, groupby
+from json import dumps
+from operator import itemgetter
+from os import chmod, fsync, path, remove, replace, stat
+from tempfile import TemporaryDirectory
+from typing import IO, Any
+
+from src.database import Database
+from src.schema import DatabaseEntry
+from src.streaming import ChunkReader
+
+# Size of the chunks that the databases are read in.
+CHUNK_SIZE = 64 * 1024
+
+# The version is kept in its own file, as the website reads every key of the progress database as a date.
+SCHEMA_FILENAME = "schema.json"
+SOURCE_NAME = "duolingo-progress"
+
+# One day of data, as the values of every database that it is stored in, keyed by the database name.
+Record = dict[str, Any]
+
+
+@dataclass
+class Migration:
+    version: int
+    description: str
+    migrate: Callable[[str, Record], Record]
+
+
+def nest_progression(date: str, record: Record) -> Record:
+    # The experience and the session information are grouped as the progression, and the number of
+    # learned words is dropped.
+    entry = record[SOURCE_NAME]
+    return {
+        **record,
+        SOURCE_NAME: {
+            "date": entry["date"],
+            "progression": {
+                "experience": entry["experience"],
+                "session_information": entry["session_information"],
+            },
+            "streak_information": {
+                "site_streak": entry["streak_information"]["site_streak"]
+            },
+            "time": entry["time"],
+        },
+    }
+
+
+def split_statistics(date: str, record: Record) -> Record:
+    # The progression is flattened and keyed by date, and the time of the run moves into the statistics.
+    entry = record[SOURCE_NAME]
+    return {
+        **record,
+        SOURCE_NAME: DatabaseEntry(
+            xp_today=entry["progression"]["experience"]["xp_today"],
+            number_of_sessions=entry["progression"]["session_information"][
+                "number_of_sessions"
+            ],
+            session_time=entry["progression"]["session_information"]["session_time"],
+            streak=entry["streak_information"]["site_streak"],
+        ).model_dump(),
+        "statistics": entry["time"],
+    }
+
+
+# Every migration upgrades the data from the previous version to its own version, in this order.
+MIGRATIONS = [
+    Migration(
+        2, "Group the experience and sessions as the progression.", nest_progression
+    ),
+    Migration(
+        3, "Key the progression by date, and split the statistics.", split_statistics
+    ),
+]
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+@dataclass
+class MigrationResult:
+    directory: str
+    from_version: int
+    to_version: int
+    records: int
+
+
+@dataclass
+class JSONObjectWriter:
+    file: IO[str]
+    batch_size: int = 1024
+    last_key: str | None = None
+    started: bool = False
+    pending: dict[str, Any] = field(default_factory=dict)
+
+    def write(self, key: str, value: Any) -> None:
+        # The output is the same as `write_atomically`, which sorts the keys, so the records have to
+        # arrive in order. Records are encoded in batches, as every call to the encoder is expensive.
+        if self.last_key is not None and key <= self.last_key:
+            raise ValueError(
+                f"Records have to be ordered by date, but '{key}' came after '{self.last_key}'."
+            )
+
+        self.pending[key] = value
+        self.last_key = key
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.pending:
+            return
+
+        text = dumps(self.pending, ensure_ascii=False, indent=2, sort_keys=True)
+        self.file.write((",\n" if self.started else "{\n") + text[2:-2])
+        self.started = True
+        self.pending.clear()
+
+    def close(self) -> None:
+        self.flush()
+        self.file.write("\n}" if self.started else "{}")
+        self.file.flush()
+        fsync(self.file.fileno())
+
+
+def iterate_database_entries(
+    filename: str,
+) -> Generator[tuple[str, Any], None, None]:
+    # The old layouts are lists of entries that carry their own date, while the current one is an
+    # object keyed by date. Both are read one entry at a time.
+    with open(filename, "rb") as file:
+        reader = ChunkReader(iter(partial(file.read, CHUNK_SIZE), b""))
+        if reader.peek() == "[":
+            for entry in reader.iterate_array():
+                yield entry["date"], entry
+        else:
+            for date in reader.iterate_object_keys():
+                yield date, reader.decode()
+
+
+def detect_schema_version(entry: Any | None) -> int:
+    # Data from before the schema file is recognized by the layout of its entries.
+    if entry is None:
+        return LATEST_VERSION
+    if "experience" in entry:
+        return 1
+    if "progression" in entry:
+        return 2
+
+    return 3
+
+
+def diff_databases(old_filename: str, new_filename: str) -> Iterator[str]:
+    # Both databases are ordered by date, so they are merge-joined while being streamed.
+    def format_value(value: Any) -> str:
+        return dumps(value, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+
+    old_entries = (
+        iterate_database_entries(old_filename)
+        if path.exists(old_filename)
+        else iter(())
+    )
+    new_entries = iterate_database_entries(new_filename)
+    tagged_entries = merge(
+        ((date, "old", value) for date, value in old_entries),
+        ((date, "new", value) for date, value in new_entries),
+        key=itemgetter(0),
+    )
+    for date, group in groupby(tagged_entries, key=itemgetter(0)):
+        versions = {side: value for _, side, value in group}
+        if "new" not in versions:
+            yield f"- {date}"
+        elif "old" not in versions:
+            yield f"+ {date} {format_value(versions['new'])}"
+        elif versions["old"] != versions["new"]:
+            yield f"~ {date} {format_value(versions['old'])} -> {format_value(versions['new'])}"
+
+
+def migrate_directory(
+    directory: str,
+    dry_run: bool = False,
+    on_change: Callable[[str], None] | None = None,
+    migrations: list[Migration] = MIGRATIONS,
+) -> MigrationResult:
+    schema_filename = path.join(directory, SCHEMA_FILENAME)
+    entries = iterate_database_entries(path.join(directory, f"{SOURCE_NAME}.json"))
+    first_entry = next(entries, None)
+    version = (
+        Database(filename=schema_filename).get()["version"]
+        if path.exists(schema_filename)
+        else detect_schema_version(None if first_entry is None else first_entry[1])
+    )
+    target_version = migrations[-1].version
+    pending_migrations = [
+        migration for migration in migrations if migration.version > version
+    ]
+    if not pending_migrations or first_entry is None:
+        entries.close()
+        return MigrationResult(directory, version, version, 0)
+
+    # Every record goes through the whole chain at once, and the results are written to a staging
+    # directory next to the data, so nothing is replaced unless every record could be migrated.
+    with TemporaryDirectory(dir=directory, prefix=".migration-") as staging_directory:
+        records = 0
+        writers: dict[str, JSONObjectWriter] = {}
+        with ExitStack() as stack:
+            for date, entry in chain([first_entry], entries):
+                record: Record = {SOURCE_NAME: entry}
+                for migration in pending_migrations:
+                    record = migration.migrate(date, record)
+
+                for name, value in record.items():
+                    if name not in writers:
+                        writers[name] = JSONObjectWriter(
+                            stack.enter_context(
+                                open(
+                                    path.join(staging_directory, f"{name}.json"),
+                                    "w",
+                                    encoding="UTF-8",
+                                )
+                            )
+                        )
+                    writers[name].write(date, value)
+                records += 1
+
+            for writer in writers.values():
+                writer.close()
+
+        # The source database is replaced last. The schema file is removed before replacing anything,
+        # so if the process dies in between, the version is detected from the layout of the data again.
+        names = sorted(writers, key=lambda name: name == SOURCE_NAME)
+        if dry_run:
+            for name in names:
+                for change in diff_databases(
+                    path.join(directory, f"{name}.json"),
+                    path.join(staging_directory, f"{name}.json"),
+                ):
+                    if on_change is not None:
+                        on_change(f"{name}.json: {change}")
+        else:
+            if path.exists(schema_filename):
+                remove(schema_filename)
+            for name in names:
+                filename = path.join(directory, f"{name}.json")
+                staged_filename = path.join(staging_directory, f"{name}.json")
+                chmod(
+                    staged_filename,
+                    stat(filename).st_mode if path.exists(filename) else 0o644,
+                )
+                replace(staged_filename, filename)
+            Database(filename=schema_filename).set({"version": target_version})
+
+    return MigrationResult(directory, version, target_version, records)
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        description="Upgrade the data directories to the latest schema version."
+    )
+    parser.add_argument(
+        "directories",
+        nargs="*",
+        default=["data"],
+        help="data directories to migrate, for example 'data data/accounts/*' (default: data)",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="print the changes of every database instead of writing them",
+    )
+    arguments = parser.parse_args()
+
+    for directory in arguments.directories:
+        result = migrate_directory(directory, arguments.dry_run, print)
+        if result.from_version == result.to_version:
+            print(f"{directory}: already at version {result.to_version}.")
+            continue
+
+        print(
+            f"{directory}: {'would migrate' if arguments.dry_run else 'migrated'} {result.records} records from version {result.from_version} to {result.to_version}."
+        )
+        for migration in MIGRATIONS:
+            if result.from_version < migration.version <= result.to_version:
+                print(f"  {migration.version}: {migration.description}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+from argparse import ArgumentParser
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from math import ceil
+from multiprocessing import get_context
+from os import cpu_count, path
+from sys import stderr
+from time import perf_counter
+
+from src.database import (
+    check_database_exists,
+    list_database_files,
+    open_databases,
+)
+from src.digest import DigestIndex, compute_month_digests
+from src.schema import dump_database_entries, parse_database_entries
+from src.synchronizer import (
+    check_database_change,
+    date_to_ordinal,
+    merge_summaries_with_history,
+    ordinal_to_date,
+    sync_database_with_summaries,
+)
+
+DATABASE_NAME = "duolingo-progress"
+
+# Number of chunks that every worker gets on average. More chunks balance uneven databases better, while
+# fewer chunks spend less time on sending the tasks and results between the processes.
+CHUNKS_PER_WORKER = 4
+
+
+@dataclass
+class ResyncResult:
+    directory: str
+    succeeded: bool
+    changed: bool
+    entries: int
+    message: str
+    duration: float
+
+
+def resync_directory(
+    directory: str, storage: str = "json", check: bool = False
+) -> ResyncResult:
+    # Every stored day with a streak came from a summary, so the summaries are rebuilt from the database
+    # itself, and synchronized again from scratch. Every failure is isolated to its own directory, and
+    # any exception counts, so a broken database never stops the others. Only the changed days are
+    # written, through the storage of the directory, so a journal or SQLite database is not shadowed by
+    # a rewritten snapshot, and the digest index is rebuilt after them.
+    start = perf_counter()
+    try:
+        check_database_exists(directory, DATABASE_NAME, storage)
+        with open_databases(directory, [DATABASE_NAME], storage) as [database]:
+            raw_entries = database.get()
+            entries = parse_database_entries(raw_entries)
+            synchronized_entries = (
+                sync_database_with_summaries(
+                    entries,
+                    merge_summaries_with_history(
+                        entries,
+                        [],
+                        ordinal_to_date(date_to_ordinal(max(entries)) + 1),
+                    ),
+                )
+                if entries
+                else entries
+            )
+            changed = check_database_change(entries, synchronized_entries)
+            if changed and not check:
+                raw_database = dump_database_entries(synchronized_entries)
+                database.write_changes(
+                    raw_database,
+                    [
+                        date
+                        for date, entry in raw_database.items()
+                        if raw_entries.get(date) != entry
+                    ]
+                    + [date for date in raw_entries if date not in raw_database],
+                )
+                DigestIndex(
+                    path.join(directory, f"{DATABASE_NAME}.digest.json"),
+                    list_database_files(directory, DATABASE_NAME, storage),
+                ).set(compute_month_digests(raw_database))
+    except Exception as error:  # noqa: BLE001
+        return ResyncResult(
+            directory=directory,
+            succeeded=False,
+            changed=False,
+            entries=0,
+            message=f"{error.__class__.__name__}: {error}",
+            duration=perf_counter() - start,
+        )
+
+    return ResyncResult(
+        directory=directory,
+        succeeded=True,
+        changed=changed,
+        entries=len(synchronized_entries),
+        message=(
+            ("Would change." if check else "Changed.") if changed else "Unchanged."
+        ),
+        duration=perf_counter() - start,
+    )
+
+
+def find_chunksize(directories: int, workers: int) -> int:
+    return max(ceil(directories / (workers * CHUNKS_PER_WORKER)), 1)
+
+
+def resync_directories(
+    directories: list[str],
+    workers: int,
+    chunksize: int | None = None,
+    check: bool = False,
+    storage: str = "json",
+) -> Iterator[ResyncResult]:
+    # The directories are spread over a pool of processes, so the validation scales with the cores
+    # instead of being held by one interpreter. Only the paths and the small results cross the
+    # processes. The results keep the order of the directories, and are yielded as soon as they are
+    # ready. The processes are spawned instead of forked, as forking a process with running threads can
+    # deadlock the children.
+    task = partial(resync_directory, storage=storage, check=check)
+    if workers == 1:
+        yield from map(task, directories)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=get_context("spawn")
+    ) as executor:
+        yield from executor.map(
+            task,
+            directories,
+            chunksize=chunksize or find_chunksize(len(directories), workers),
+        )
+
+
+def format_progress(
+    done: int, total: int, failed: int, elapsed: float, width: int = 30
+) -> str:
+    filled = width * done // total if total else width
+    rate = done / elapsed if elapsed > 0 else 0.0
+    return f"[{'#' * filled}{'.' * (width - filled)}] {done}/{total} databases, {failed} failed, {rate:.1f} databases/s"
+
+
+def report_progress(
+    results: Iterator[ResyncResult],
+    total: int,
+    write: Callable[[str], object] = stderr.write,
+) -> list[ResyncResult]:
+    # The progress bar is redrawn on the same line after every database.
+    start = perf_counter()
+    collected: list[ResyncResult] = []
+    failed = 0
+    for result in results:
+        collected.append(result)
+        failed += not result.succeeded
+        write(
+            f"\r{format_progress(len(collected), total, failed, perf_counter() - start)}"
+        )
+    write("\n")
+    return collected
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        description="Validate and synchronize the progress databases again, spread over all cores."
+    )
+    parser.add_argument(
+        "directories",
+        nargs="*",
+        default=["data"],
+        help="data directories to synchronize, for example 'data data/accounts/*' (default: data)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=cpu_count() or 1,
+        help="number of processes (default: number of cores)",
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        help="number of directories sent to a process at once (default: spread the directories into four chunks per process)",
+    )
+    parser.add_argument(
+        "--storage",
+        choices=["json", "journal", "sqlite"],
+        default="json",
+        help="how the databases are stored, the same as for the synchronization (default: json)",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="only validate the databases and report the ones that would change, without writing them",
+    )
+    arguments = parser.parse_args()
+
+    start = perf_counter()
+    results = report_progress(
+        resync_directories(
+            arguments.directories,
+            arguments.workers,
+            arguments.chunksize,
+            arguments.check,
+            arguments.storage,
+        ),
+        len(arguments.directories),
+    )
+
+    for result in results:
+        if not result.succeeded or result.changed:
+            print(f"{result.directory}: {result.message}")
+
+    failures = sum(not result.succeeded for result in results)
+    changes = sum(result.changed for result in results)
+    print(
+        f"{'Checked' if arguments.check else 'Synchronized'} {len(results)} databases in {perf_counter() - start:.1f} seconds: {changes} {'would change' if arguments.check else 'changed'}, {failures} failed."
+    )
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+from argparse import ArgumentParser
+from typing import Any
+
+from src.database import (
+    Storage,
+    create_missing_databases,
+    open_databases,
+    transaction,
+)
+from src.startup import today
+from src.synchronizer import date_to_ordinal, ordinal_to_date
+
+# Number of days that every run is kept for in the statistics. Older runs are summarized per month.
+RETENTION_DAYS = 90
+
+
+def summarize_times(times: list[str]) -> dict[str, Any]:
+    # Times are formatted as `%H:%M:%S`, so they sort in chronological order. The median is the lower
+    # one, so it is always a time that a run actually started at.
+    ordered = sorted(times)
+    return {
+        "runs": len(ordered),
+        "earliest": ordered[0],
+        "latest": ordered[-1],
+        "median": ordered[(len(ordered) - 1) // 2],
+    }
+
+
+def merge_summaries(first: dict[str, Any], second: dict[str, Any]) -> dict[str, Any]:
+    # Only happens if runs of a month that has already been summarized are restored. The median cannot
+    # be merged exactly, so the one of the larger group is kept.
+    return {
+        "runs": first["runs"] + second["runs"],
+        "earliest": min(first["earliest"], second["earliest"]),
+        "latest": max(first["latest"], second["latest"]),
+        "median": max(first, second, key=lambda summary: summary["runs"])["median"],
+    }
+
+
+def find_cutoff_month(current_date: str, retention_days: int = RETENTION_DAYS) -> str:
+    # Months before the month of the first retained day are complete, and can be summarized as a whole.
+    # A month is never split between the runs and the summaries.
+    return ordinal_to_date(date_to_ordinal(current_date) - retention_days + 1)[:7]
+
+
+def needs_compaction(statistics: dict[str, Any], cutoff_month: str) -> bool:
+    return any(date[:7] < cutoff_month for date in statistics)
+
+
+def compact_statistics(
+    statistics: dict[str, Any], rollups: dict[str, Any], cutoff_month: str
+) -> tuple[dict[str, Any], dict[str, Any]]:
+    # Split the runs into the retained ones and the ones of the months before the cutoff, which are
+    # summarized and added to the rollups, keyed by `%Y/%m`.
+    retained_statistics: dict[str, Any] = {}
+    expired_times: dict[str, list[str]] = {}
+    for date, time in statistics.items():
+        if date[:7] < cutoff_month:
+            expired_times.setdefault(date[:7], []).append(time)
+        else:
+            retained_statistics[date] = time
+
+    compacted_rollups = dict(rollups)
+    for month, times in expired_times.items():
+        summary = summarize_times(times)
+        compacted_rollups[month] = (
+            merge_summaries(rollups[month], summary) if month in rollups else summary
+        )
+
+    return retained_statistics, dict(sorted(compacted_rollups.items()))
+
+
+def compact_databases(
+    statistics_database: Storage,
+    rollups_database: Storage,
+    statistics: dict[str, Any],
+    cutoff_month: str,
+) -> dict[str, Any]:
+    # Both databases are written in one transaction, if the storage supports it. The rollups are only
+    # read here, which happens once a month.
+    retained_statistics, rollups = compact_statistics(
+        statistics, rollups_database.get(), cutoff_month
+    )
+    with transaction(statistics_database, rollups_database):
+        rollups_database.set(rollups)
+        statistics_database.set(retained_statistics)
+
+    return retained_statistics
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        description="Summarize the runs in the statistics that are older than the retention window."
+    )
+    parser.add_argument(
+        "directories",
+        nargs="*",
+        default=["data"],
+        help="data directories to compact, for example 'data data/accounts/*' (default: data)",
+    )
+    parser.add_argument(
+        "--retention-days",
+        type=int,
+        default=RETENTION_DAYS,
+        help="number of days to keep every run for (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--storage", choices=["json", "journal", "sqlite"], default="json"
+    )
+    arguments = parser.parse_args()
+
+    cutoff_month = find_cutoff_month(today(), arguments.retention_days)
+    for directory in arguments.directories:
+        names = ["statistics", "statistics-rollups"]
+        create_missing_databases(directory, names, arguments.storage)
+        with open_databases(directory, names, arguments.storage) as [
+            statistics_database,
+            rollups_database,
+        ]:
+            statistics = statistics_database.get()
+            retained_statistics = compact_databases(
+                statistics_database, rollups_database, statistics, cutoff_month
+            )
+        print(
+            f"{directory}: kept {len(retained_statistics)} runs, summarized {len(statistics) - len(retained_statistics)} runs before {cutoff_month}."
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,409 @@
+from collections.abc import Iterator
+from contextlib import ExitStack
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from itertools import chain
+from json import loads
+from os import environ, path
+from typing import Any
+
+from requests.adapters import HTTPAdapter
+
+from src.api import (
+    APIClient,
+    ResponseCache,
+    UnauthorizedException,
+    create_session,
+)
+from src.batch import BatchResult, run_concurrently
+from src.cassette import Cassette
+from src.database import (
+    Database,
+    Storage,
+    create_missing_databases,
+    list_database_files,
+    open_databases,
+    transaction,
+)
+from src.day_table import get_day_table
+from src.digest import (
+    DigestIndex,
+    compute_month_digests,
+    compute_root_digest,
+    find_changed_months,
+    update_month_digests,
+)
+from src.retention import (
+    RETENTION_DAYS,
+    compact_databases,
+    find_cutoff_month,
+    needs_compaction,
+)
+from src.schema import (
+    Account,
+    DatabaseEntry,
+    User,
+    dump_database_entries,
+    iterate_summaries,
+    parse_database_entries,
+)
+from src.startup import BASE_API_URL, is_synchronized_today
+from src.synchronizer import (
+    date_to_ordinal,
+    find_overlap_start_date,
+    ordinal_to_date,
+    sync_database_incrementally,
+    sync_database_with_summaries,
+)
+from src.telemetry import record_run
+from src.token_store import TokenStore
+
+
+def authenticate(
+    api: APIClient,
+    username: str,
+    password: str,
+    token_store: TokenStore | None,
+    refresh: bool = False,
+) -> str:
+    # Reuse the stored token of the account while it is valid, and only login when there is none.
+    token = None if token_store is None or refresh else token_store.get(username)
+    if token is None:
+        token = api.login(username, password)
+        if token_store is not None:
+            token_store.put(username, token)
+
+    return token
+
+
+# Databases of every account, in the order they are opened in.
+DATABASE_NAMES = ["duolingo-progress", "statistics", "statistics-rollups"]
+
+
+@dataclass
+class AccountState:
+    # What a long-running process keeps in memory between the runs of an account, so the databases
+    # are only opened, read, and parsed once. Empty fields are read from the data directory. The
+    # databases are opened and closed by the owner of the state.
+    databases: list[Storage] | None = None
+    entries: dict[str, DatabaseEntry] | None = None
+    statistics: dict[str, Any] | None = None
+    month_digests: dict[str, str] | None = None
+
+
+def sync_account(
+    api: APIClient,
+    username: str,
+    credential: str,
+    passwordless: bool,
+    data_directory: str,
+    full_resync: bool = False,
+    overlap_days: int = 14,
+    storage: str = "json",
+    telemetry: bool = True,
+    token_store: TokenStore | None = None,
+    state: AccountState | None = None,
+    retention_days: int = RETENTION_DAYS,
+    timezone: str | None = None,
+) -> tuple[bool, list[str]]:
+    # Every phase of the run, including the requests of the API client, is timed and appended to the
+    # run statistics at the end, even if the run fails.
+    # The timestamps become days in the given timezone, through a table of days that is shared by every
+    # account of the process.
+    state = AccountState() if state is None else state
+    days = get_day_table(timezone)
+    run_statistics_path = path.join(data_directory, "run-statistics.jsonl")
+    with (
+        record_run(run_statistics_path, telemetry, days.timezone) as recorder,
+        ExitStack() as stack,
+    ):
+        api.recorder = recorder
+
+        # Initialize required infrastructures. New accounts start with empty databases. Databases that
+        # are not kept by the caller are closed at the end of the run.
+        databases = state.databases
+        if databases is None:
+            create_missing_databases(data_directory, DATABASE_NAMES, storage)
+            databases = stack.enter_context(
+                open_databases(data_directory, DATABASE_NAMES, storage)
+            )
+        progression_database, statistics_database, rollups_database = databases
+
+        # If the supplied credential is the password, login to Duolingo first, unless there is a
+        # stored token from an earlier login.
+        token, passwordless = (
+            (credential, True)
+            if passwordless
+            else (authenticate(api, username, credential, token_store), False)
+        )
+
+        # Get all existing data from the database, and transform it into our own structure so it's
+        # easier to process. The newest stored date decides how much of the history has to be fetched.
+        with recorder.span("read_database") as attributes:
+            stored_entries = (
+                parse_database_entries(progression_database.get())
+                if state.entries is None
+                else state.entries
+            )
+            attributes["entries"] = len(stored_entries)
+        start_date = (
+            None
+            if full_resync
+            else find_overlap_start_date(stored_entries, overlap_days)
+        )
+
+        # Get the possible data. The API expects the start date to be delimited with dashes. A stored
+        # token can be revoked before it expires, so the password login is retried once. The summaries
+        # are streamed, so they are only read while the synchronizer consumes them.
+        def fetch_data(token: str) -> tuple[Any, Iterator[Any]]:
+            return (
+                api.stream_data(username, token)
+                if start_date is None
+                else api.stream_data(username, token, start_date.replace("/", "-"))
+            )
+
+        try:
+            raw_user, raw_summaries = fetch_data(token)
+        except UnauthorizedException:
+            if passwordless or token_store is None:
+                raise
+            token = authenticate(api, username, credential, token_store, refresh=True)
+            raw_user, raw_summaries = fetch_data(token)
+
+        # Transform them into our internal schema. Only the newest summary is parsed up front, the rest
+        # of them are parsed one by one during the synchronization.
+        with recorder.span("parse"):
+            user = User(**raw_user)
+            summaries = iterate_summaries(raw_summaries, days)
+            newest_summary = next(summaries, None)
+
+        # Add the new data to the end of the database declaratively. The first summary is the newest
+        # one, or today (when the script is run). Without any summary, for example for an account
+        # without any history yet, there is nothing to add.
+        database_entries: dict[str, DatabaseEntry] = {**stored_entries}
+        if newest_summary is not None:
+            database_entries[newest_summary.date] = DatabaseEntry.create(
+                newest_summary, user.site_streak
+            )
+            summaries = chain([newest_summary], summaries)
+
+        # Synchronize the database with the summaries. If only the recent days are fetched, the older
+        # days are kept from our own history and only the fetch window is recomputed, in place of the
+        # copy above, so the stored entries stay intact for the comparison below. Without any summary,
+        # the stored days are kept as they are.
+        with recorder.span("synchronize") as attributes:
+            if newest_summary is None:
+                synchronized_database = database_entries
+            elif start_date is None:
+                synchronized_database = sync_database_with_summaries(
+                    database_entries, summaries
+                )
+            else:
+                synchronized_database = sync_database_incrementally(
+                    database_entries, summaries, start_date
+                )
+            attributes["entries"] = len(synchronized_database)
+
+        # Check whether we have synchronized the data or not with the digest index of the stored
+        # database. Only the months from the fetch window onwards are hashed again, with one more day in
+        # case the first summary falls on the day before the window. Without an index, or with one that
+        # no longer matches the files of the database, the stored database is hashed once to create it.
+        digest_index = DigestIndex(
+            path.join(data_directory, "duolingo-progress.digest.json"),
+            list_database_files(data_directory, "duolingo-progress", storage),
+        )
+        with recorder.span("digest") as attributes:
+            raw_database = dump_database_entries(synchronized_database)
+            stored_index: dict[str, Any] | None = (
+                digest_index.get()
+                if state.month_digests is None
+                else {
+                    "root": compute_root_digest(state.month_digests),
+                    "months": state.month_digests,
+                }
+            )
+            stored_digests = (
+                stored_index["months"]
+                if stored_index is not None
+                else compute_month_digests(dump_database_entries(stored_entries))
+            )
+            month_digests = update_month_digests(
+                raw_database,
+                stored_digests,
+                None
+                if start_date is None
+                else ordinal_to_date(date_to_ordinal(start_date) - 1)[:7],
+            )
+            changed_months = (
+                find_changed_months(stored_digests, month_digests)
+                if stored_index is None
+                or compute_root_digest(month_digests) != stored_index["root"]
+                else []
+            )
+            attributes["changed_months"] = len(changed_months)
+
+            # Only the days of the changed months that actually differ are written, if the storage
+            # supports writing them on their own.
+            changed_dates = [
+                date
+                for date, entry in synchronized_database.items()
+                if date[:7] in changed_months and stored_entries.get(date) != entry
+            ] + [date for date in stored_entries if date not in synchronized_database]
+
+        # On the other hand, get all of the statistics of the cron run, and then immutably
+        # add the current cron statistics.
+        now = datetime.now(days.timezone)
+        current_date = now.strftime("%Y/%m/%d")
+        current_time = now.strftime("%H:%M:%S")
+        current_statistics = (
+            statistics_database.get() if state.statistics is None else state.statistics
+        )
+        statistics_entries: dict[str, Any] = {
+            **current_statistics,
+            **{current_date: current_time},
+        }
+
+        # Store the synchronized database and the statistics in our repository. If the storage
+        # supports it, all of them are written in one transaction. Only today's run is added to the
+        # statistics, until a whole month has left the retention window and is summarized.
+        cutoff_month = find_cutoff_month(current_date, retention_days)
+        with (
+            recorder.span("write_database"),
+            transaction(progression_database, statistics_database, rollups_database),
+        ):
+            if changed_dates:
+                progression_database.write_changes(raw_database, changed_dates)
+            if needs_compaction(statistics_entries, cutoff_month):
+                statistics_entries = compact_databases(
+                    statistics_database,
+                    rollups_database,
+                    statistics_entries,
+                    cutoff_month,
+                )
+            else:
+                statistics_database.write_changes(statistics_entries, [current_date])
+
+        # The index is written after the database, so it matches the files that were just written.
+        digest_index.set(month_digests)
+
+        # The next run of a long-running process continues from what has just been written.
+        state.entries = synchronized_database
+        state.statistics = statistics_entries
+        state.month_digests = month_digests
+
+    # Return flags from the program to consolidate the print statements in the outer loop,
+    # minimizing side effects.
+    return passwordless, changed_months
+
+
+def run(
+    full_resync: bool = False,
+    overlap_days: int = 14,
+    storage: str = "json",
+    telemetry: bool = True,
+    cache_directory: str | None = None,
+    token_store_path: str | None = None,
+    base_url: str = BASE_API_URL,
+    timezone: str | None = None,
+    cassette: Cassette | None = None,
+    data_directory: str = "data",
+) -> tuple[bool, list[str]]:
+    # Initialize environment.
+    username = environ["DUOLINGO_USERNAME"]
+    credential, passwordless = (
+        (credential, True)
+        if (credential := environ.get("DUOLINGO_JWT")) is not None
+        else (environ["DUOLINGO_PASSWORD"], False)
+    )
+
+    # Synchronize the only account into the data directory.
+    return sync_account(
+        APIClient(
+            base_url=base_url,
+            cache=ResponseCache(cache_directory) if cache_directory else None,
+            cassette=cassette,
+        ),
+        username,
+        credential,
+        passwordless,
+        data_directory,
+        full_resync,
+        overlap_days,
+        storage,
+        telemetry,
+        TokenStore(token_store_path) if token_store_path else None,
+        timezone=timezone,
+    )
+
+
+def run_batch(
+    full_resync: bool = False,
+    overlap_days: int = 14,
+    max_workers: int = 4,
+    storage: str = "json",
+    telemetry: bool = True,
+    cache_directory: str | None = None,
+    token_store_path: str | None = None,
+    base_url: str = BASE_API_URL,
+    force: bool = False,
+    timezone: str | None = None,
+    cassette: Cassette | None = None,
+    data_directory: str = "data",
+) -> list[BatchResult]:
+    # Initialize environment. Every account is stored in its own data directory.
+    accounts = [Account(**account) for account in loads(environ["DUOLINGO_ACCOUNTS"])]
+    accounts_directory = path.join(data_directory, "accounts")
+
+    # All accounts share one pool of keep-alive connections, but each of them gets its own
+    # session, so cookies of one account never leak into the requests of another one.
+    adapter = HTTPAdapter(pool_maxsize=max_workers)
+
+    # The token store is shared as well, so the accounts do not overwrite the tokens of each other.
+    token_store = TokenStore(token_store_path) if token_store_path else None
+
+    def sync(account: Account) -> str:
+        # Accounts that have already been synchronized today are skipped, unless forced.
+        account_directory = path.join(accounts_directory, account.username)
+        if not force and is_synchronized_today(account_directory, storage, timezone):
+            return "Already synchronized today."
+
+        # Every account has its own cache directory, so the cache eviction of one account never
+        # races with another one.
+        cache = (
+            ResponseCache(path.join(cache_directory, account.username))
+            if cache_directory
+            else None
+        )
+
+        credential, passwordless = account.credential()
+        _, changed_months = sync_account(
+            APIClient(
+                base_url=base_url,
+                session=create_session(adapter),
+                cache=cache,
+                cassette=cassette,
+            ),
+            account.username,
+            credential,
+            passwordless,
+            account_directory,
+            full_resync,
+            overlap_days,
+            storage,
+            telemetry,
+            token_store,
+            timezone=timezone,
+        )
+
+        return (
+            f"Synchronized {', '.join(changed_months)}."
+            if changed_months
+            else "Already synchronized."
+        )
+
+    # Run all of the accounts and store the report next to their data.
+    results = run_concurrently(accounts, sync, max_workers)
+    report_database = Database(filename=path.join(accounts_directory, "report.json"))
+    report_database.set({result.username: asdict(result) for result in results})
+
+    return results
@@ -1,6 +1,17 @@
-from datetime import datetime
+from collections.abc import Iterable, Iterator
+from typing import Any
 
-from pydantic import BaseModel, ConfigDict, Field, field_validator
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    TypeAdapter,
+    ValidationInfo,
+    field_validator,
+    model_validator,
+)
+
+from src.day_table import DayBatch, DayTable, get_day_table
 
 
 class BaseSchema(BaseModel):
@@ -15,12 +26,14 @@ class Summary(BaseSchema):
 
     @field_validator("date", mode="before")
     @classmethod
-    def unix_timestamp_transform(cls, raw: int | str) -> str:
-        return (
-            raw
-            if isinstance(raw, str)
-            else datetime.fromtimestamp(raw).strftime("%Y/%m/%d")
-        )
+    def unix_timestamp_transform(cls, raw: int | str, info: ValidationInfo) -> str:
+        # Timestamps are converted to the day in the timezone of the day table or batch that is passed as
+        # the context of the validation, or in the local time by default.
+        if isinstance(raw, str):
+            return raw
+
+        days = info.context.get("days") if isinstance(info.context, dict) else None
+        return (days or get_day_table()).find(raw)
 
     @staticmethod
     def create_default(date: str) -> "Summary":
@@ -59,3 +72,63 @@ class DatabaseEntry(BaseSchema):
             session_time=0,
             streak=streak,
         )
+
+
+# Validating a whole collection with one adapter call is much cheaper than constructing
+# every model one by one, both when loading and when dumping.
+database_entries_adapter = TypeAdapter(dict[str, DatabaseEntry])
+summaries_adapter = TypeAdapter(list[Summary])
+
+
+def parse_database_entries(raw: Any) -> dict[str, DatabaseEntry]:
+    return database_entries_adapter.validate_python(raw)
+
+
+def dump_database_entries(entries: dict[str, DatabaseEntry]) -> dict[str, Any]:
+    dumped_entries: dict[str, Any] = database_entries_adapter.dump_python(entries)
+    return dumped_entries
+
+
+def parse_summaries(raw: Any, days: DayTable | None = None) -> list[Summary]:
+    # The dates of all summaries are converted as one batch, which stores the new days at the end.
+    batch = DayBatch(days or get_day_table())
+    summaries = summaries_adapter.validate_python(raw, context={"days": batch})
+    batch.store()
+    return summaries
+
+
+def iterate_summaries(
+    raw: Iterable[Any], days: DayTable | None = None
+) -> Iterator[Summary]:
+    # Validate the summaries one by one, for example while they are streamed from the API, so the raw
+    # items never have to be held all at once. Their dates are still converted as one batch, which stores
+    # the new days once the summaries are done with, even if they are not read to the end.
+    batch = DayBatch(days or get_day_table())
+    try:
+        for item in raw:
+            yield Summary.model_validate(item, context={"days": batch})
+    finally:
+        batch.store()
+
+
+class Account(BaseSchema):
+    username: str
+    jwt: str | None = None
+    password: str | None = None
+
+    @model_validator(mode="after")
+    def credential_exists(self) -> "Account":
+        self.credential()
+        return self
+
+    def credential(self) -> tuple[str, bool]:
+        # Just like the single account mode, the JWT takes precedence over the password.
+        match self.jwt, self.password:
+            case str(jwt), _:
+                return jwt, True
+            case None, str(password):
+                return password, False
+            case _:
+                raise ValueError(
+                    f"Account '{self.username}' needs either a JWT or a password."
+                )
@@ -0,0 +1,247 @@
+from argparse import ArgumentParser
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import date
+from gzip import compress
+from hashlib import sha256
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from json import dumps
+from mimetypes import guess_type
+from os import path, stat
+from re import fullmatch
+from threading import Lock
+from typing import Any
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from src.database import Database
+from src.date_index import DateIndex
+
+FIELDS = ("xp_today", "session_time", "number_of_sessions")
+
+
+def compute_rollups(raw: dict[str, dict[str, int]]) -> dict[str, Any]:
+    # Totals and the number of days of every month and every year, in one pass over the days.
+    rollups: dict[str, dict[str, dict[str, int]]] = {"months": {}, "years": {}}
+    for date_str, entry in raw.items():
+        for period, key in (("months", date_str[:7]), ("years", date_str[:4])):
+            totals = rollups[period].setdefault(
+                key, {"days": 0, **dict.fromkeys(FIELDS, 0)}
+            )
+            totals["days"] += 1
+            for field_name in FIELDS:
+                totals[field_name] += entry[field_name]
+
+    return rollups
+
+
+def is_valid_date(date_str: str) -> bool:
+    # The format alone lets through dates that do not exist, such as `2024/13/45`.
+    if not fullmatch(r"\d{4}/\d{2}/\d{2}", date_str):
+        return False
+
+    try:
+        date(int(date_str[0:4]), int(date_str[5:7]), int(date_str[8:10]))
+    except ValueError:
+        return False
+
+    return True
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    # Every coding of `Accept-Encoding` can have a weight, and a weight of zero refuses it. The wildcard
+    # stands for the codings that are not listed, and other codings such as `x-gzip` are not gzip.
+    weights: dict[str, float] = {}
+    for coding in accept_encoding.split(","):
+        name, _, parameters = coding.partition(";")
+        weight = 1.0
+        for parameter in parameters.split(";"):
+            key, _, value = parameter.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name.strip().lower()] = weight
+
+    return weights.get("gzip", weights.get("*", 0.0)) > 0
+
+
+@dataclass
+class EncodedResponse:
+    body: bytes
+    etag: str
+
+
+@dataclass
+class ProgressStore:
+    filename: str
+    max_cached_responses: int = 256
+    lock: Lock = field(default_factory=Lock, repr=False, compare=False)
+    version: tuple[int, int] | None = None
+    index: DateIndex = field(default_factory=lambda: DateIndex.create({}))
+    rollups: dict[str, Any] = field(default_factory=dict)
+    responses: dict[tuple[str, bool], EncodedResponse] = field(default_factory=dict)
+
+    def refresh(self) -> None:
+        # The data is only parsed again if the file was replaced or modified since the last request,
+        # which also drops every encoded response.
+        status = stat(self.filename)
+        version = (status.st_mtime_ns, status.st_size)
+        with self.lock:
+            if version == self.version:
+                return
+
+            raw = Database(filename=self.filename).get()
+            self.index = DateIndex.create(raw)
+            self.rollups = compute_rollups(raw)
+            self.responses = {}
+            self.version = version
+
+    def respond(
+        self, key: str, gzip: bool, build: Callable[[], Any]
+    ) -> EncodedResponse:
+        # Responses are encoded once per request and encoding, and then served from memory. Every
+        # encoding is its own representation, so it gets its own entity tag.
+        with self.lock:
+            cached_response = self.responses.get((key, gzip))
+            version = self.version
+        if cached_response is not None:
+            return cached_response
+
+        body = dumps(build(), ensure_ascii=False, separators=(",", ":")).encode()
+        if gzip:
+            body = compress(body, mtime=0)
+        response = EncodedResponse(body=body, etag=f'"{sha256(body).hexdigest()[:32]}"')
+
+        # A response that was built while the data was reloaded is served, but not cached.
+        with self.lock:
+            if version == self.version:
+                if len(self.responses) >= self.max_cached_responses:
+                    self.responses.pop(next(iter(self.responses)))
+                self.responses[(key, gzip)] = response
+
+        return response
+
+
+class DashboardHandler(BaseHTTPRequestHandler):
+    store: ProgressStore
+    web_directory: str
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        match url.path:
+            case "/" | "/index.html":
+                self.send_file(path.join(self.web_directory, "index.html"))
+            # The dashboard fetches the progress from the same path as on GitHub Pages.
+            case (
+                "/api/progress" | "/japanese-duolingo-visualizer/duolingo-progress.json"
+            ):
+                self.send_progress(parse_qs(url.query))
+            case "/api/rollups":
+                self.send_json("rollups", lambda: self.store.rollups)
+            case _:
+                self.send_asset(url.path)
+
+    def send_progress(self, query: dict[str, list[str]]) -> None:
+        # Both ends of the range are inclusive, and default to the whole history.
+        start_date = query.get("from", ["0001/01/01"])[0]
+        end_date = query.get("to", ["9999/12/31"])[0]
+        if not all(is_valid_date(date_str) for date_str in (start_date, end_date)):
+            self.send_error(400, "Dates have to be valid and formatted as YYYY/MM/DD.")
+            return
+
+        self.send_json(
+            f"progress:{start_date}:{end_date}",
+            lambda: self.store.index.range(start_date, end_date).to_dict(),
+        )
+
+    def send_json(self, key: str, build: Callable[[], Any]) -> None:
+        self.store.refresh()
+        gzip = accepts_gzip(self.headers.get("Accept-Encoding", ""))
+        response = self.store.respond(key, gzip, build)
+        if self.headers.get("If-None-Match") == response.etag:
+            self.send_response(304)
+            self.send_header("ETag", response.etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(response.body)))
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("ETag", response.etag)
+        self.send_header("Vary", "Accept-Encoding")
+        if gzip:
+            self.send_header("Content-Encoding", "gzip")
+        self.end_headers()
+        self.wfile.write(response.body)
+
+    def send_asset(self, url_path: str) -> None:
+        # Other files of the web directory, such as the favicon, are served as they are. Paths that
+        # leave the directory are not found.
+        web_directory = path.realpath(self.web_directory)
+        filename = path.realpath(
+            path.join(web_directory, unquote(url_path).lstrip("/"))
+        )
+        if path.commonpath(
+            [web_directory, filename]
+        ) != web_directory or not path.isfile(filename):
+            self.send_error(404)
+            return
+
+        self.send_file(filename)
+
+    def send_file(self, filename: str) -> None:
+        with open(filename, "rb") as file:
+            content = file.read()
+
+        content_type, _ = guess_type(filename)
+        self.send_response(200)
+        self.send_header(
+            "Content-Type",
+            "text/html; charset=UTF-8"
+            if content_type == "text/html"
+            else content_type or "application/octet-stream",
+        )
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+def create_server(
+    store: ProgressStore, web_directory: str, host: str = "127.0.0.1", port: int = 8000
+) -> ThreadingHTTPServer:
+    # Every server gets its own handler class, so several of them can serve different data.
+    handler = type(
+        "BoundDashboardHandler",
+        (DashboardHandler,),
+        {"store": store, "web_directory": web_directory},
+    )
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        description="Serve the dashboard and the progress with range queries."
+    )
+    parser.add_argument("filename", nargs="?", default="data/duolingo-progress.json")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--web-directory", default="web")
+    arguments = parser.parse_args()
+
+    server = create_server(
+        ProgressStore(arguments.filename),
+        arguments.web_directory,
+        arguments.host,
+        arguments.port,
+    )
+    print(f"Serving the dashboard on http://{arguments.host}:{arguments.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+from datetime import datetime
+from json import JSONDecodeError, loads
+from os import path
+from sqlite3 import Error as SQLiteError
+from zoneinfo import ZoneInfo
+
+from src.database import open_databases
+
+# Everything that the entry point needs before it decides whether to synchronize at all. Only the
+# standard library and the databases are imported here, so a run that has nothing to do exits within
+# milliseconds, without importing Pydantic and Requests.
+BASE_API_URL = "https://www.duolingo.com"
+TOKEN_STORE_PATH = path.join(
+    path.expanduser("~"), ".cache", "japanese-duolingo-visualizer", "tokens.json"
+)
+
+
+def today(timezone: str | None = None) -> str:
+    # The same format and timezone as the statistics of the runs, which is the local time of the
+    # machine unless a timezone is given.
+    return datetime.now(ZoneInfo(timezone) if timezone else None).strftime("%Y/%m/%d")
+
+
+def is_synchronized_today(
+    data_directory: str, storage: str = "json", timezone: str | None = None
+) -> bool:
+    # The statistics are written together with the progress at the end of a successful run, so an
+    # entry for today means that the account has already been synchronized today.
+    filename = "duolingo.sqlite3" if storage == "sqlite" else "statistics.json"
+    if not path.exists(path.join(data_directory, filename)):
+        return False
+
+    try:
+        with open_databases(data_directory, ["statistics"], storage) as [
+            statistics_database
+        ]:
+            return today(timezone) in statistics_database.get()
+    except (JSONDecodeError, OSError, SQLiteError):
+        return False
+
+
+def find_batch_directories(accounts: str, accounts_directory: str) -> list[str]:
+    # The data directories of the accounts in the `DUOLINGO_ACCOUNTS` environment variable. The
+    # accounts are only validated when they are synchronized.
+    try:
+        return [
+            path.join(accounts_directory, account["username"])
+            for account in loads(accounts)
+        ]
+    except (JSONDecodeError, KeyError, TypeError):
+        return []
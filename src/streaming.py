@@ -0,0 +1,116 @@
+from codecs import IncrementalDecoder, getincrementaldecoder
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from json import JSONDecodeError, JSONDecoder
+from typing import Any
+
+DECODER = JSONDecoder()
+WHITESPACE = " \t\n\r"
+
+
+@dataclass
+class ChunkReader:
+    chunks: Iterator[bytes]
+    text: str = ""
+    position: int = 0
+    exhausted: bool = False
+    decoder: IncrementalDecoder = field(
+        default_factory=lambda: getincrementaldecoder("UTF-8")()
+    )
+
+    def read(self) -> bool:
+        # Drop the text that has already been consumed and append the next chunk. Characters that are
+        # split between two chunks are kept by the decoder until the rest of them arrives.
+        if self.exhausted:
+            return False
+
+        chunk = next(self.chunks, None)
+        self.exhausted = chunk is None
+        self.text = self.text[self.position :] + self.decoder.decode(
+            chunk or b"", final=self.exhausted
+        )
+        self.position = 0
+        return True
+
+    def peek(self) -> str:
+        # Skip the whitespace, and return the next character without consuming it, or an empty string
+        # at the end of the stream.
+        while True:
+            while (
+                self.position < len(self.text)
+                and self.text[self.position] in WHITESPACE
+            ):
+                self.position += 1
+            if self.position < len(self.text):
+                return self.text[self.position]
+            if not self.read():
+                return ""
+
+    def expect(self, characters: str) -> str:
+        character = self.peek()
+        if not character or character not in characters:
+            raise ValueError(
+                f"Expected one of '{characters}' in the JSON stream, but found '{character}'."
+            )
+
+        self.position += 1
+        return character
+
+    def decode(self) -> Any:
+        # Decode one complete value, reading more chunks while it is cut off. A value that ends exactly
+        # at the end of the text might be a number that continues in the next chunk.
+        self.peek()
+        while True:
+            try:
+                value, end = DECODER.raw_decode(self.text, self.position)
+            except JSONDecodeError:
+                if not self.read():
+                    raise
+                continue
+
+            if end == len(self.text) and self.read():
+                continue
+
+            self.position = end
+            return value
+
+    def iterate_array(self) -> Iterator[Any]:
+        # Yield the items of the array at the current position one by one.
+        self.expect("[")
+        if self.peek() == "]":
+            self.position += 1
+            return
+
+        while True:
+            yield self.decode()
+            if self.expect(",]") == "]":
+                return
+
+    def iterate_object_keys(self) -> Iterator[str]:
+        # Yield the keys of the object at the current position one by one. The caller has to consume
+        # the value of every key, with `decode` or `iterate_array`, before asking for the next one.
+        self.expect("{")
+        if self.peek() == "}":
+            self.position += 1
+            return
+
+        while True:
+            key = self.decode()
+            self.expect(":")
+            yield key
+            if self.expect(",}") == "}":
+                return
+
+
+def iterate_array_items(chunks: Iterable[bytes], key: str) -> Iterator[Any]:
+    # Yield the items of the array under `key` of the top-level object one by one, while the chunks are
+    # still being read, so only one item is held in memory at a time. Other keys are decoded and skipped.
+    reader = ChunkReader(iter(chunks))
+    for name in reader.iterate_object_keys():
+        if name == key:
+            yield from reader.iterate_array()
+            return
+
+        reader.decode()
+
+    raise KeyError(key)
@@ -1,25 +1,39 @@
-from datetime import datetime, timedelta
-from itertools import accumulate, count, takewhile
+from collections.abc import Collection, Iterable
+from collections.abc import Set as AbstractSet
+from datetime import date
+from itertools import accumulate, islice, takewhile
 
 from src.schema import DatabaseEntry, Summary
 
+try:
+    import numpy
+
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+# Below this number of days, the overhead of creating NumPy arrays outweighs the vectorization.
+VECTORIZATION_THRESHOLD = 4096
+
+
+def date_to_ordinal(date_str: str) -> int:
+    # Slicing the fixed-width `%Y/%m/%d` format is much cheaper than `strptime`.
+    return date(int(date_str[0:4]), int(date_str[5:7]), int(date_str[8:10])).toordinal()
 
-def generate_dates_between(start_date_str: str, end_date_str: str) -> list[str]:
-    start_date = datetime.strptime(start_date_str, "%Y/%m/%d")
-    end_date = datetime.strptime(end_date_str, "%Y/%m/%d")
 
-    # Generator to yield dates from start to end, inclusive.
-    date_generator = (start_date + timedelta(days=x) for x in count())
+def ordinal_to_date(ordinal: int) -> str:
+    return date.fromordinal(ordinal).isoformat().replace("-", "/")
 
-    # Collect dates until the end is reached.
-    dates_between = takewhile(lambda date: date <= end_date, date_generator)
 
-    # Convert the date to string format and return it.
-    return [date.strftime("%Y/%m/%d") for date in dates_between]
+def generate_dates_between(start_date_str: str, end_date_str: str) -> list[str]:
+    # Dates are generated from start to end, inclusive, as day ordinals, and are only converted to
+    # the string format at the end.
+    ordinals = range(date_to_ordinal(start_date_str), date_to_ordinal(end_date_str) + 1)
+    return [ordinal_to_date(ordinal) for ordinal in ordinals]
 
 
 def find_start_and_end_dates(
-    database: dict[str, DatabaseEntry], summaries: list[Summary]
+    database: dict[str, DatabaseEntry], summaries: Collection[Summary]
 ) -> tuple[str, str]:
     # Check for invalid inputs at first.
     if not database and not summaries:
@@ -27,23 +41,49 @@ def find_start_and_end_dates(
             "Both database and summaries are empty. Cannot determine start and end dates."
         )
 
-    if not database:
-        summary_dates = [summary.date for summary in summaries]
-        start_date, end_date = min(summary_dates), max(summary_dates)
-        return start_date, end_date
+    # Take the bounds of each of the inputs separately, and then cover both of them. The zero-padded
+    # date format sorts in the same order as the dates themselves.
+    summary_dates = [summary.date for summary in summaries]
+    bounds = [
+        *((min(database), max(database)) if database else ()),
+        *((min(summary_dates), max(summary_dates)) if summary_dates else ()),
+    ]
 
-    if not summaries:
-        database_dates = list(database.keys())
-        start_date, end_date = min(database_dates), max(database_dates)
-        return start_date, end_date
+    return min(bounds), max(bounds)
 
-    # If inputs are valid, cover both dates.
-    database_dates = list(database.keys())
-    summary_dates = [summary.date for summary in summaries]
-    all_dates = database_dates + summary_dates
-    start_date, end_date = min(all_dates), max(all_dates)
 
-    return start_date, end_date
+def find_overlap_start_date(
+    database: dict[str, DatabaseEntry], overlap_days: int
+) -> str | None:
+    # Without any stored history, there is nothing to overlap with, so the caller has
+    # to fetch everything from the beginning.
+    if not database:
+        return None
+
+    # Go back from the newest stored date, so late changes on the API side (for example,
+    # a session that is synchronized a day late) are still picked up.
+    return ordinal_to_date(date_to_ordinal(max(database)) - overlap_days)
+
+
+def merge_summaries_with_history(
+    database: dict[str, DatabaseEntry], summaries: list[Summary], start_date: str
+) -> list[Summary]:
+    # Stored days before the fetch window are transformed back into summaries, so the synchronizer
+    # receives the same input as if the whole history was fetched. After a synchronization, a day
+    # has a non-zero streak if and only if it was present in the summaries.
+    history = [
+        Summary(
+            date=date,
+            gainedXp=entry.xp_today,
+            numSessions=entry.number_of_sessions,
+            totalSessionTime=entry.session_time,
+        )
+        for date, entry in database.items()
+        if date < start_date and entry.streak > 0
+    ]
+
+    # The fetched summaries come first to keep the newest summary at the front of the list.
+    return summaries + history
 
 
 def check_database_change(
@@ -55,36 +95,137 @@ def check_database_change(
     return old_converted != new_converted
 
 
-def sync_database_with_summaries(
-    database: dict[str, DatabaseEntry], summaries: list[Summary]
-) -> dict[str, DatabaseEntry]:
-    # Create a dictionary of summaries keyed by date string.
-    synchronized_record = {summary.date: summary for summary in summaries}
-
-    # Generate all the dates (inclusive) between the start and the end of
-    # the combination of the database and the summary.
-    start_date, end_date = find_start_and_end_dates(database, summaries)
-    dates = generate_dates_between(start_date, end_date)
+def compute_streaks(
+    present: AbstractSet[int],
+    start: int,
+    end: int,
+    initial_streak: int = 0,
+    vectorized: bool | None = None,
+) -> list[int]:
+    # By default, long ranges are vectorized if NumPy is installed. Both paths give identical results.
+    if vectorized is None:
+        vectorized = HAS_NUMPY and end - start + 1 >= VECTORIZATION_THRESHOLD
+    if vectorized:
+        return compute_streaks_vectorized(present, start, end, initial_streak)
 
     # Calculate streaks declaratively to maintain cumulative streaks. If it cannot find
-    # a date in the record, reset back to zero. At the end, `streaks` MUST have the same length
-    # as the dates. Check the tests for more information regarding the supposed behavior of this algorithm.
+    # a day in the record, reset back to zero. At the end, `streaks` MUST have the same length
+    # as the days. Check the tests for more information regarding the supposed behavior of this algorithm.
+    # The initial streak is the streak of the day before the start, and is skipped from the result.
     streaks = accumulate(
-        (1 if date in synchronized_record else 0 for date in dates),
+        (1 if ordinal in present else 0 for ordinal in range(start, end + 1)),
         lambda streak, exists: (streak + 1) if exists else 0,
+        initial=initial_streak,
     )
 
-    # The streak will be synchronized by iterating through all of the dates and trying to find the equivalent
-    # in summaries. If it doesn't exist, then it will set the data to a generic, default zero data. The
-    # generator expression is used to accumulate the count of dates in the record. It will reset to
-    # zero whenever `date` cannot be found in the dates.
+    return list(islice(streaks, 1, None))
+
+
+def compute_streaks_vectorized(
+    present: AbstractSet[int], start: int, end: int, initial_streak: int = 0
+) -> list[int]:
+    # Mark the days that exist in the record, with positions starting from one.
+    positions = numpy.arange(1, end - start + 2)
+    exists = numpy.zeros(len(positions), dtype=bool)
+    offsets = numpy.fromiter(present, dtype=numpy.int64, count=len(present)) - start
+    exists[offsets[(offsets >= 0) & (offsets < len(positions))]] = True
+
+    # A streak is the distance to the last missing day. Before the first missing day, the streak
+    # continues from the initial streak.
+    last_resets = numpy.maximum.accumulate(numpy.where(exists, 0, positions))
+    streaks = positions - last_resets + numpy.where(last_resets == 0, initial_streak, 0)
+
+    result: list[int] = streaks.tolist()
+    return result
+
+
+def synchronize_ordinals(
+    start: int,
+    end: int,
+    synchronized_record: dict[int, Summary],
+    initial_streak: int = 0,
+) -> dict[str, DatabaseEntry]:
+    streaks = compute_streaks(synchronized_record.keys(), start, end, initial_streak)
+
+    # The streak will be synchronized by iterating through all of the days and trying to find the equivalent
+    # in summaries. If it doesn't exist, then it will set the data to a generic, default zero data. Days are
+    # only converted back to date strings here, at the output.
     synchronized_database = {
-        date: (
+        ordinal_to_date(ordinal): (
             DatabaseEntry.create(summary, streak)
-            if (summary := synchronized_record.get(date)) is not None
+            if (summary := synchronized_record.get(ordinal)) is not None
             else DatabaseEntry.create_default(0)
         )
-        for date, streak in zip(dates, streaks)
+        for ordinal, streak in zip(range(start, end + 1), streaks)
     }
 
     return synchronized_database
+
+
+def sync_database_with_summaries(
+    database: dict[str, DatabaseEntry], summaries: Iterable[Summary]
+) -> dict[str, DatabaseEntry]:
+    # Create a dictionary of summaries keyed by the day ordinal of their date. The summaries are only
+    # iterated once, so they can be streamed.
+    synchronized_record = {
+        date_to_ordinal(summary.date): summary for summary in summaries
+    }
+
+    # Synchronize all the days (inclusive) between the start and the end of
+    # the combination of the database and the summary.
+    start_date, end_date = find_start_and_end_dates(
+        database, synchronized_record.values()
+    )
+
+    return synchronize_ordinals(
+        date_to_ordinal(start_date), date_to_ordinal(end_date), synchronized_record
+    )
+
+
+def sync_database_incrementally(
+    database: dict[str, DatabaseEntry],
+    summaries: Iterable[Summary],
+    since: str | None = None,
+) -> dict[str, DatabaseEntry]:
+    # The database is expected to be the result of a previous synchronization, ordered by date, like
+    # the one we store in the repository. `since` is the start of the fetch window: stored days from
+    # that date onwards are recomputed even if the summaries do not mention them anymore. The
+    # summaries are only iterated once, so they can be streamed. The database is updated in place and
+    # returned, so the untouched prefix is never copied.
+    synchronized_record = {
+        date_to_ordinal(summary.date): summary for summary in summaries
+    }
+    touched_ordinals = list(synchronized_record)
+    if since is not None:
+        touched_ordinals.append(date_to_ordinal(since))
+
+    # Without any history, or without anything to synchronize, fall back to the full synchronization.
+    if not database or not touched_ordinals:
+        return sync_database_with_summaries(database, synchronized_record.values())
+
+    # The tail starts at the earliest touched day. If the summaries start after the end of our history,
+    # the days in between have to be filled in as well, so the tail starts right after the last stored day.
+    first_stored = date_to_ordinal(next(iter(database)))
+    last_stored = date_to_ordinal(next(reversed(database)))
+    tail_start = min(min(touched_ordinals), last_stored + 1)
+    if tail_start <= first_stored:
+        return sync_database_with_summaries(database, synchronized_record.values())
+
+    # Keep the untouched prefix as it is. Walking backwards from the newest date keeps this step
+    # proportional to the size of the tail instead of the whole history.
+    tail_start_date = ordinal_to_date(tail_start)
+    for date_str in list(
+        takewhile(lambda date_str: date_str >= tail_start_date, reversed(database))
+    ):
+        del database[date_str]
+
+    # Seed the streak from the day before the tail, and recompute only the tail. Without any summaries,
+    # the tail still runs up to the last stored day.
+    previous_entry = database.get(ordinal_to_date(tail_start - 1))
+    initial_streak = previous_entry.streak if previous_entry is not None else 0
+    tail_end = max([last_stored, *synchronized_record])
+    database.update(
+        synchronize_ordinals(tail_start, tail_end, synchronized_record, initial_streak)
+    )
+
+    return database
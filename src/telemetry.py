@@ -0,0 +1,154 @@
+from argparse import ArgumentParser
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, tzinfo
+from json import dumps, loads
+from math import ceil
+from os import path
+from time import perf_counter
+from typing import Any
+
+from src.database import open_atomically
+
+# Number of runs that are kept in the run statistics, about three months of daily runs. The file is only
+# trimmed once it holds twice as many, so most runs just append a line.
+RUN_RECORDS_LIMIT = 90
+
+
+@dataclass
+class Span:
+    name: str
+    seconds: float
+    attributes: dict[str, int | str] = field(default_factory=dict)
+
+
+@dataclass
+class Recorder:
+    enabled: bool = True
+    spans: list[Span] = field(default_factory=list)
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[dict[str, int | str]]:
+        # The caller can attach attributes, such as byte sizes or entry counts, to the yielded dictionary.
+        # The span is recorded even if the block raises, so failed runs can be analyzed as well.
+        attributes: dict[str, int | str] = {}
+        if not self.enabled:
+            yield attributes
+            return
+
+        start_time = perf_counter()
+        try:
+            yield attributes
+        finally:
+            self.spans.append(Span(name, perf_counter() - start_time, attributes))
+
+    def to_record(self, started_at: str) -> dict[str, Any]:
+        return {
+            "started_at": started_at,
+            "spans": [
+                {"name": span.name, "seconds": span.seconds, **span.attributes}
+                for span in self.spans
+            ],
+        }
+
+
+@contextmanager
+def record_run(
+    filename: str, enabled: bool = True, timezone: tzinfo | None = None
+) -> Iterator[Recorder]:
+    # Record every span of one run, and append them as one record when the run is over. Failed runs
+    # are recorded as well, and marked as such. The start is in the timezone of the days, with its
+    # offset, and in the local time of the machine without one.
+    recorder = Recorder(enabled=enabled)
+    started_at = datetime.now().astimezone(timezone).isoformat(timespec="seconds")
+    succeeded = False
+    try:
+        with recorder.span("total"):
+            yield recorder
+        succeeded = True
+    finally:
+        if enabled:
+            append_run_record(
+                filename, {**recorder.to_record(started_at), "succeeded": succeeded}
+            )
+
+
+def append_run_record(
+    filename: str, record: dict[str, Any], limit: int = RUN_RECORDS_LIMIT
+) -> None:
+    # Every run is appended as one line. The file lives next to the data, which is committed after
+    # every run, so it is trimmed to the newest runs once it grows past twice the limit.
+    with open(filename, "a+", encoding="UTF-8") as file:
+        file.write(f"{dumps(record, ensure_ascii=False, sort_keys=True)}\n")
+        file.seek(0)
+        lines = file.readlines()
+
+    if len(lines) > 2 * limit:
+        with open_atomically(filename) as file:
+            file.writelines(lines[-limit:])
+
+
+def read_run_records(filename: str) -> list[dict[str, Any]]:
+    if not path.exists(filename):
+        return []
+
+    with open(filename, "r", encoding="UTF-8") as file:
+        return [loads(line) for line in file if line.strip()]
+
+
+def percentile(values: Sequence[float], rank: float) -> float:
+    # Nearest-rank percentile, which always returns one of the measured values.
+    ordered = sorted(values)
+    return ordered[max(ceil(rank / 100 * len(ordered)) - 1, 0)]
+
+
+def summarize_spans(
+    records: list[dict[str, Any]], ranks: tuple[float, ...] = (50, 90, 99)
+) -> dict[str, dict[str, float]]:
+    # Group the durations of every span by name across all of the runs, in the order they first appear.
+    durations: dict[str, list[float]] = {}
+    for record in records:
+        for span in record["spans"]:
+            durations.setdefault(span["name"], []).append(span["seconds"])
+
+    return {
+        name: {
+            "count": len(values),
+            **{f"p{rank:g}": percentile(values, rank) for rank in ranks},
+        }
+        for name, values in durations.items()
+    }
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        description="Print percentiles of the run phases across past runs."
+    )
+    parser.add_argument("filename", nargs="?", default="data/run-statistics.jsonl")
+    parser.add_argument(
+        "--window",
+        type=int,
+        action="append",
+        help="only consider the last N runs, can be repeated (default: 7, 30, and all runs)",
+    )
+    arguments = parser.parse_args()
+
+    # Windows that are larger than the history are the same as the whole history, so they are only printed once.
+    records = read_run_records(arguments.filename)
+    windows = dict.fromkeys(
+        min(window, len(records))
+        for window in arguments.window or [7, 30, len(records)]
+    )
+    for window in windows:
+        recent_records = records[-window:] if window else []
+        print(f"Last {len(recent_records)} runs:")
+        for name, summary in summarize_spans(recent_records).items():
+            print(
+                f"  {name:<16} n={summary['count']:<5.0f} p50={summary['p50'] * 1000:>9.1f} ms"
+                f" p90={summary['p90'] * 1000:>9.1f} ms p99={summary['p99'] * 1000:>9.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
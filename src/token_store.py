@@ -0,0 +1,61 @@
+from base64 import urlsafe_b64decode
+from binascii import Error as DecodeError
+from dataclasses import dataclass, field
+from json import dumps, loads
+from os import makedirs, path, replace
+from tempfile import NamedTemporaryFile
+from threading import Lock
+from time import time
+
+
+def decode_expiry(token: str) -> int | None:
+    # The expiry is read from the `exp` claim of the payload. The signature is not verified, as the
+    # expiry is only used to decide when to log in again, and Duolingo still verifies the token.
+    try:
+        payload = token.split(".")[1]
+        claims = loads(urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return int(claims["exp"])
+    except (IndexError, KeyError, TypeError, ValueError, DecodeError):
+        return None
+
+
+@dataclass
+class TokenStore:
+    filename: str
+    leeway: int = 5 * 60
+    lock: Lock = field(default_factory=Lock, repr=False, compare=False)
+
+    def get(self, username: str) -> str | None:
+        # Tokens are only reused until shortly before they expire. Tokens without an expiry are reused
+        # until they are rejected.
+        token = self.read().get(username)
+        if token is None:
+            return None
+
+        expiry = decode_expiry(token)
+        if expiry is not None and expiry - self.leeway <= time():
+            return None
+
+        return token
+
+    def put(self, username: str, token: str) -> None:
+        with self.lock:
+            self.write({**self.read(), username: token})
+
+    def read(self) -> dict[str, str]:
+        if not path.exists(self.filename):
+            return {}
+
+        with open(self.filename, "r", encoding="UTF-8") as file:
+            tokens: dict[str, str] = loads(file.read())
+            return tokens
+
+    def write(self, tokens: dict[str, str]) -> None:
+        # Temporary files are created to be readable by the owner only, and the rename keeps it that way.
+        directory = path.dirname(path.abspath(self.filename))
+        makedirs(directory, mode=0o700, exist_ok=True)
+        with NamedTemporaryFile(
+            "w", encoding="UTF-8", dir=directory, suffix=".tmp", delete=False
+        ) as file:
+            file.write(dumps(tokens, indent=2, sort_keys=True))
+        replace(file.name, self.filename)
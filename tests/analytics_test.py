@@ -0,0 +1,134 @@
+from random import Random
+
+import pytest
+
+from src.analytics import Analytics
+from src.schema import DatabaseEntry, parse_database_entries
+from src.synchronizer import generate_dates_between
+
+
+@pytest.fixture
+def database() -> dict[str, DatabaseEntry]:
+    random = Random(0)
+    streak = 0
+    raw_database = {}
+    for date in generate_dates_between("2024/01/01", "2024/12/31"):
+        active = random.random() < 0.8
+        streak = streak + 1 if active else 0
+        raw_database[date] = {
+            "number_of_sessions": random.randint(1, 10) if active else 0,
+            "session_time": random.randint(60, 3600) if active else 0,
+            "streak": streak,
+            "xp_today": random.randint(1, 500) if active else 0,
+        }
+
+    return parse_database_entries(raw_database)
+
+
+@pytest.mark.parametrize(
+    "start_date, end_date",
+    [
+        ("2024/01/01", "2024/12/31"),
+        ("2024/03/01", "2024/03/31"),
+        ("2024/06/15", "2024/06/15"),
+        ("2023/12/01", "2024/01/10"),
+        ("2024/12/25", "2025/01/10"),
+    ],
+)
+def test_total_and_average_match_naive_sums(database, start_date, end_date):
+    analytics = Analytics.create(database)
+    days = [entry for date, entry in database.items() if start_date <= date <= end_date]
+
+    for field in ("xp_today", "session_time", "number_of_sessions"):
+        expected_total = sum(getattr(entry, field) for entry in days)
+        assert analytics.total(field, start_date, end_date) == expected_total
+        assert analytics.average(field, start_date, end_date) == pytest.approx(
+            expected_total / len(days)
+        )
+
+
+def test_total_outside_of_history(database):
+    analytics = Analytics.create(database)
+    assert analytics.total("xp_today", "2025/01/01", "2025/12/31") == 0
+    assert analytics.average("xp_today", "2023/01/01", "2023/12/31") == 0.0
+
+
+def test_missing_days_count_as_zero():
+    analytics = Analytics.create(
+        {
+            "2024/06/01": DatabaseEntry.create_default(1),
+            "2024/06/03": DatabaseEntry(
+                xp_today=30, number_of_sessions=1, session_time=60, streak=1
+            ),
+        }
+    )
+    assert analytics.days == 3
+    assert analytics.average("xp_today", "2024/06/01", "2024/06/03") == 10.0
+
+
+@pytest.mark.parametrize("window", [1, 7, 30, 90])
+def test_rolling_means_match_naive_means(database, window):
+    values = [entry.xp_today for entry in database.values()]
+    expected_means = [
+        sum(values[max(index + 1 - window, 0) : index + 1]) / min(index + 1, window)
+        for index in range(len(values))
+    ]
+
+    assert Analytics.create(database).rolling_means("xp_today", window) == (
+        pytest.approx(expected_means)
+    )
+
+
+def test_report(database):
+    report = Analytics.create(database).report()
+    streaks = [entry.streak for entry in database.values()]
+    longest_streak = max(streaks)
+
+    assert report["days"] == 366
+    assert report["active_days"] == sum(streak > 0 for streak in streaks)
+    assert report["totals"]["xp_today"] == sum(
+        entry.xp_today for entry in database.values()
+    )
+    assert report["longest_streak"]["length"] == longest_streak
+    assert database[report["longest_streak"]["end_date"]].streak == longest_streak
+    assert database[report["longest_streak"]["start_date"]].streak == 1
+    assert report["current_streak"] == streaks[-1]
+    assert list(report["rolling_means"]) == ["7", "30", "90"]
+    assert report["rolling_means"]["7"]["xp_today"] == pytest.approx(
+        Analytics.create(database).rolling_means("xp_today", 7)[-1]
+    )
+    assert (
+        0
+        < report["percentiles"]["xp_today"]["p50"]
+        <= report["percentiles"]["xp_today"]["p90"]
+        <= 500
+    )
+
+
+def test_report_counts_longest_streak_from_first_day():
+    # The longest streak starts before the analyzed range, and a shorter one is entirely inside it.
+    raw_database = {
+        date: {
+            "number_of_sessions": 1,
+            "session_time": 60,
+            "streak": streak,
+            "xp_today": 10,
+        }
+        for date, streak in zip(
+            generate_dates_between("2024/03/01", "2024/03/08"),
+            [10, 11, 0, 1, 2, 3, 0, 1],
+            strict=True,
+        )
+    }
+    report = Analytics.create(parse_database_entries(raw_database)).report()
+
+    assert report["longest_streak"] == {
+        "length": 3,
+        "start_date": "2024/03/04",
+        "end_date": "2024/03/06",
+    }
+
+
+def test_create_rejects_empty_database():
+    with pytest.raises(ValueError):
+        Analytics.create({})
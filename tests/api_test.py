@@ -1,12 +1,22 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from os import listdir
+from pathlib import Path
+from threading import Thread
+
 import pytest
+from requests import Session
+from requests.adapters import HTTPAdapter
 
 from src.api import (
     APIClient,
     CaptchaException,
     LoginException,
     NotFoundException,
+    ResponseCache,
     UnauthorizedException,
+    create_session,
 )
+from src.telemetry import Recorder
 
 
 @pytest.fixture
@@ -14,6 +24,47 @@ def client():
     return APIClient(base_url="https://example.com")
 
 
+@pytest.fixture
+def stand_in_server():
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.server.received_headers.append(dict(self.headers))
+            if self.headers.get("If-None-Match") == self.server.etag:
+                self.send_response(304)
+                self.send_header("ETag", self.server.etag)
+                self.end_headers()
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(self.server.body)))
+            self.send_header("ETag", self.server.etag)
+            self.end_headers()
+            self.wfile.write(self.server.body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.received_headers = []
+    server.etag, server.body = '"v1"', b'{"id": "1"}'
+    Thread(target=server.serve_forever, args=(0.01,), daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def cached_client(stand_in_server, tmp_path: Path):
+    host, port = stand_in_server.server_address
+    return APIClient(
+        base_url=f"http://{host}:{port}",
+        session=Session(),
+        recorder=Recorder(),
+        cache=ResponseCache(str(tmp_path / "cache")),
+    )
+
+
 def test_login(client, requests_mock):
     mock_response = {"status": "success"}
     mock_response_headers = {"jwt": "fake_jwt_token"}
@@ -58,6 +109,40 @@ def test_fetch_data(client, requests_mock):
     assert raw_summary == {"summaries": []}
 
 
+def test_fetch_data_with_start_date(client, requests_mock):
+    token = "fake_jwt_token"
+    requests_mock.get(
+        "https://example.com/users/my_username",
+        json={"id": "1", "username": "my_username"},
+    )
+
+    mock_summary_response = {"summaries": [{"date": 1717804800}]}
+    requests_mock.get(
+        "https://example.com/2017-06-30/users/1/xp_summaries?startDate=2024-06-01",
+        json=mock_summary_response,
+    )
+
+    _, raw_summary = client.fetch_data("my_username", token, "2024-06-01")
+    assert raw_summary == mock_summary_response
+    assert requests_mock.last_request.qs == {"startdate": ["2024-06-01"]}
+
+
+def test_stream_data(client, requests_mock):
+    requests_mock.get(
+        "https://example.com/users/my_username",
+        json={"id": "1", "username": "my_username"},
+    )
+    mock_summary_response = {"summaries": [{"date": 1717804800}, {"date": 1717718400}]}
+    requests_mock.get(
+        "https://example.com/2017-06-30/users/1/xp_summaries?startDate=2024-06-01",
+        json=mock_summary_response,
+    )
+
+    raw_user, raw_summaries = client.stream_data("my_username", "token", "2024-06-01")
+    assert raw_user == {"id": "1", "username": "my_username"}
+    assert list(raw_summaries) == mock_summary_response["summaries"]
+
+
 @pytest.mark.parametrize(
     "status_code, json_data, expected_exception",
     [
@@ -72,3 +157,123 @@ def test_request_exceptions(
     requests_mock.get("https://example.com", status_code=status_code, json=json_data)
     with pytest.raises(expected_exception):
         client.request("https://example.com")
+
+
+def test_create_session_shares_adapter():
+    adapter = HTTPAdapter(pool_maxsize=4)
+    first_session, second_session = create_session(adapter), create_session(adapter)
+
+    assert first_session.get_adapter("https://example.com") is adapter
+    assert second_session.get_adapter("https://example.com") is adapter
+    assert first_session.cookies is not second_session.cookies
+
+
+def test_request_records_span(requests_mock):
+    client = APIClient(base_url="https://example.com", recorder=Recorder())
+    requests_mock.get("https://example.com/users/my_username", json={"id": "1"})
+
+    client.request("https://example.com/users/my_username", name="user")
+    assert [span.name for span in client.recorder.spans] == ["user"]
+    assert client.recorder.spans[0].attributes == {"status": 200, "bytes": 11}
+
+
+def test_cache_revalidates_with_conditional_request(cached_client, stand_in_server):
+    url = f"{cached_client.base_url}/users/my_username"
+    first_response = cached_client.request(url, "token", name="user")
+    second_response = cached_client.request(url, "token", name="user")
+
+    assert first_response.json() == second_response.json() == {"id": "1"}
+    assert second_response.status_code == 200
+    assert "If-None-Match" not in stand_in_server.received_headers[0]
+    assert stand_in_server.received_headers[1]["If-None-Match"] == '"v1"'
+    assert [span.attributes["status"] for span in cached_client.recorder.spans] == [
+        200,
+        304,
+    ]
+
+
+def test_cache_streams_revalidated_response(cached_client, stand_in_server):
+    stand_in_server.body = b'{"id": "1", "summaries": [{"date": 1}, {"date": 2}]}'
+    url = f"{cached_client.base_url}/users/my_username"
+    cached_client.request(url, "token")
+    chunks = cached_client.stream(url, "token")
+
+    assert stand_in_server.received_headers[1]["If-None-Match"] == '"v1"'
+    assert b"".join(chunks) == stand_in_server.body
+
+
+def test_stream_writes_cache_while_reading(cached_client, stand_in_server):
+    stand_in_server.body = b'{"summaries": [{"date": 1}, {"date": 2}], "more": true}'
+    url = f"{cached_client.base_url}/summaries"
+    key = cached_client.cache.key(url, "token")
+
+    chunks = cached_client.stream(url, "token", name="summaries")
+    assert cached_client.cache.load(key) is None
+    assert b"".join(chunks) == stand_in_server.body
+
+    cached_response = cached_client.cache.load(key)
+    assert cached_response is not None
+    assert cached_response.content == stand_in_server.body
+    assert cached_client.recorder.spans[0].attributes == {
+        "status": 200,
+        "bytes": len(stand_in_server.body),
+    }
+
+
+def test_stream_data_counts_and_caches_whole_body(cached_client, stand_in_server):
+    stand_in_server.body = b'{"id": "1", "summaries": [{"date": 1}, {"date": 2}]}'
+
+    for _ in range(2):
+        _, raw_summaries = cached_client.stream_data("my_username", "token")
+        assert list(raw_summaries) == [{"date": 1}, {"date": 2}]
+
+    assert stand_in_server.received_headers[3]["If-None-Match"] == '"v1"'
+    assert [span.attributes for span in cached_client.recorder.spans] == [
+        {"status": 200, "bytes": len(stand_in_server.body)},
+        {"status": 200, "bytes": len(stand_in_server.body)},
+        {"status": 304, "bytes": 0},
+        {"status": 304, "bytes": 0},
+    ]
+
+
+def test_cache_replaces_modified_response(cached_client, stand_in_server):
+    url = f"{cached_client.base_url}/users/my_username"
+    cached_client.request(url, "token")
+    stand_in_server.etag, stand_in_server.body = '"v2"', b'{"id": "2"}'
+
+    assert cached_client.request(url, "token").json() == {"id": "2"}
+    assert cached_client.request(url, "token").json() == {"id": "2"}
+    assert stand_in_server.received_headers[2]["If-None-Match"] == '"v2"'
+
+
+def test_cache_can_be_bypassed(cached_client, stand_in_server):
+    url = f"{cached_client.base_url}/users/my_username"
+    cached_client.request(url, "token")
+    cached_client.request(url, "token", use_cache=False)
+
+    assert "If-None-Match" not in stand_in_server.received_headers[1]
+
+
+def test_cache_is_private_to_token(cached_client, stand_in_server):
+    url = f"{cached_client.base_url}/users/my_username"
+    cached_client.request(url, "token")
+    cached_client.request(url, "another_token")
+
+    assert "If-None-Match" not in stand_in_server.received_headers[1]
+    assert all(
+        "token" not in Path(cached_client.cache.directory, filename).read_text()
+        for filename in listdir(cached_client.cache.directory)
+        if filename.endswith(".json")
+    )
+
+
+def test_cache_evicts_least_recently_used(cached_client, stand_in_server):
+    url = f"{cached_client.base_url}/users/my_username"
+    cached_client.request(url, "first_token")
+    cached_client.cache.max_bytes = cached_client.cache.size(
+        cached_client.cache.key(url, "first_token")
+    )
+    cached_client.request(url, "second_token")
+
+    assert cached_client.cache.load(cached_client.cache.key(url, "first_token")) is None
+    assert cached_client.cache.load(cached_client.cache.key(url, "second_token"))
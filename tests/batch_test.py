@@ -0,0 +1,67 @@
+from threading import Lock
+from time import sleep
+
+import pytest
+from pydantic import ValidationError
+
+from src.batch import run_concurrently
+from src.schema import Account
+
+
+@pytest.fixture
+def accounts() -> list[Account]:
+    return [Account(username=f"user_{index}", jwt=f"jwt_{index}") for index in range(8)]
+
+
+def test_run_concurrently_isolates_failures(accounts):
+    def task(account: Account) -> str:
+        if account.username == "user_3":
+            raise ValueError("bad credential")
+        return f"hello {account.username}"
+
+    results = run_concurrently(accounts, task, max_workers=4)
+
+    assert [result.username for result in results] == [
+        account.username for account in accounts
+    ]
+    assert [result.succeeded for result in results] == [
+        account.username != "user_3" for account in accounts
+    ]
+    assert results[0].message == "hello user_0"
+    assert results[3].message == "ValueError: bad credential"
+
+
+def test_run_concurrently_bounds_concurrency(accounts):
+    lock = Lock()
+    running, peak = 0, 0
+
+    def task(account: Account) -> str:
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        sleep(0.01)
+        with lock:
+            running -= 1
+        return "done"
+
+    results = run_concurrently(accounts, task, max_workers=3)
+    assert all(result.succeeded for result in results)
+    assert 1 < peak <= 3
+
+
+@pytest.mark.parametrize(
+    "account, expected_credential",
+    [
+        ({"username": "a", "jwt": "token"}, ("token", True)),
+        ({"username": "a", "password": "secret"}, ("secret", False)),
+        ({"username": "a", "jwt": "token", "password": "secret"}, ("token", True)),
+    ],
+)
+def test_account_credential(account, expected_credential):
+    assert Account(**account).credential() == expected_credential
+
+
+def test_account_without_credential():
+    with pytest.raises(ValidationError):
+        Account(username="a")
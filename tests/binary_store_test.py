@@ -0,0 +1,121 @@
+from pathlib import Path
+
+import pytest
+
+from src.binary_store import (
+    HEADER,
+    RECORD,
+    BinaryDatabase,
+    convert_to_binary,
+    convert_to_json,
+    write_binary_database,
+)
+from src.database import Database
+from src.synchronizer import date_to_ordinal, ordinal_to_date
+
+
+@pytest.fixture
+def raw_database() -> dict[str, dict[str, int]]:
+    return {
+        "2024/05/31": {
+            "number_of_sessions": 1,
+            "session_time": 60,
+            "streak": 1,
+            "xp_today": 10,
+        },
+        "2024/06/01": {
+            "number_of_sessions": 2,
+            "session_time": 120,
+            "streak": 2,
+            "xp_today": 20,
+        },
+        "2024/06/05": {
+            "number_of_sessions": 0,
+            "session_time": 0,
+            "streak": 0,
+            "xp_today": 0,
+        },
+    }
+
+
+def test_write_binary_database(tmp_path: Path, raw_database):
+    filename = str(tmp_path / "duolingo-progress.bin")
+
+    assert write_binary_database(filename, raw_database.items()) == 3
+
+    # The four days between the first and the last entry are stored, including the missing ones.
+    assert Path(filename).stat().st_size == HEADER.size + 6 * RECORD.size
+    with BinaryDatabase.open(filename) as database:
+        assert len(database) == 6
+        assert database.to_dict() == raw_database
+
+
+def test_read_days_and_ranges(tmp_path: Path, raw_database):
+    filename = str(tmp_path / "duolingo-progress.bin")
+    write_binary_database(filename, raw_database.items())
+
+    with BinaryDatabase.open(filename) as database:
+        assert database.at("2024/06/01") == raw_database["2024/06/01"]
+        assert database.at("2024/06/05") == raw_database["2024/06/05"]
+        assert database.at("2024/06/02") is None
+        assert database.at("2024/05/30") is None
+        assert database.at("2024/06/06") is None
+        assert [date for date, _ in database.range("2024/06/01", "2024/06/10")] == [
+            "2024/06/01",
+            "2024/06/05",
+        ]
+        assert list(database.range("2024/01/01", "2024/05/30")) == []
+        assert [date for date, _ in database.latest(5)] == ["2024/06/01", "2024/06/05"]
+
+
+def test_write_empty_database(tmp_path: Path):
+    filename = str(tmp_path / "duolingo-progress.bin")
+
+    assert write_binary_database(filename, []) == 0
+
+    with BinaryDatabase.open(filename) as database:
+        assert len(database) == 0
+        assert database.to_dict() == {}
+        assert database.at("2024/06/01") is None
+
+
+def test_write_rejects_unordered_entries(tmp_path: Path, raw_database):
+    filename = tmp_path / "duolingo-progress.bin"
+
+    with pytest.raises(ValueError, match="ordered by date"):
+        write_binary_database(str(filename), reversed(raw_database.items()))
+
+    assert not filename.exists()
+
+
+def test_open_rejects_other_files(tmp_path: Path):
+    filename = tmp_path / "duolingo-progress.json"
+    filename.write_text('{"2024/06/01": {}}', encoding="UTF-8")
+
+    with pytest.raises(ValueError, match="not a binary database"):
+        BinaryDatabase.open(str(filename))
+
+
+def test_convert_back_and_forth(tmp_path: Path):
+    # Thirty years with a missing day every week, so the writer flushes several chunks.
+    first_ordinal = date_to_ordinal("2000/01/01")
+    raw_database = {
+        ordinal_to_date(first_ordinal + day): {
+            "number_of_sessions": day % 40,
+            "session_time": day * 60,
+            "streak": day % 7,
+            "xp_today": day % 1500,
+        }
+        for day in range(30 * 365)
+        if day % 7 != 6
+    }
+    json_filename = str(tmp_path / "duolingo-progress.json")
+    binary_filename = str(tmp_path / "duolingo-progress.bin")
+    Database(filename=json_filename).set(raw_database)
+    original = Path(json_filename).read_bytes()
+
+    assert convert_to_binary(json_filename, binary_filename) == len(raw_database)
+    assert convert_to_json(binary_filename, json_filename) == len(raw_database)
+
+    assert Path(json_filename).read_bytes() == original
+    assert Path(binary_filename).stat().st_size < len(original) / 5
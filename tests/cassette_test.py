@@ -0,0 +1,302 @@
+from gzip import open as open_gzip
+from pathlib import Path
+
+import pytest
+
+import main
+from src.api import APIClient, UnauthorizedException
+from src.cassette import Cassette, CassetteException, Interaction
+from src.database import Database
+from src.runner import sync_account
+from tests.fake_api import FakeAPIConfig, serve_fake_api
+
+
+def record_sync(tmp_path: Path, cassette_path: str, days: int = 40) -> str:
+    # A password login and a full synchronization against the fake API. Returns the token of the login.
+    with serve_fake_api(FakeAPIConfig(days=days, latency=0.02)) as api:
+        client = APIClient(base_url=api.url, cassette=Cassette.record(cassette_path))
+        token = client.login("learner", "secret-password")
+        sync_account(
+            client,
+            "learner",
+            token,
+            True,
+            str(tmp_path / "recorded"),
+            telemetry=False,
+        )
+
+    return token
+
+
+def test_record_redacts_credentials(tmp_path: Path):
+    cassette_path = str(tmp_path / "cassette.jsonl.gz")
+
+    token = record_sync(tmp_path, cassette_path)
+
+    with open_gzip(cassette_path, "rt", encoding="UTF-8") as file:
+        archive = file.read()
+    assert len(archive.splitlines()) == 3
+    assert "secret-password" not in archive
+    assert token not in archive
+    assert '"password":"REDACTED"' in archive
+
+
+def test_replay_reproduces_run_offline(tmp_path: Path):
+    cassette_path = str(tmp_path / "cassette.jsonl.gz")
+    record_sync(tmp_path, cassette_path)
+
+    # Nothing listens on the base URL, so any request that is not replayed fails.
+    client = APIClient(
+        base_url="http://127.0.0.1:9", cassette=Cassette.replay(cassette_path)
+    )
+    token = client.login("learner", "another-password")
+    for _ in range(2):
+        sync_account(
+            client,
+            "learner",
+            token,
+            True,
+            str(tmp_path / "replayed"),
+            full_resync=True,
+            telemetry=False,
+        )
+
+    assert token == "REDACTED"
+    for name in ("duolingo-progress", "statistics"):
+        assert Database(filename=str(tmp_path / "replayed" / f"{name}.json")).get() == (
+            Database(filename=str(tmp_path / "recorded" / f"{name}.json")).get()
+        )
+
+
+def test_replay_waits_for_recorded_latency(tmp_path: Path):
+    cassette_path = str(tmp_path / "cassette.jsonl.gz")
+    record_sync(tmp_path, cassette_path)
+    waits: list[float] = []
+    cassette = Cassette.replay(cassette_path, latency=True)
+    cassette.wait = waits.append
+
+    APIClient(base_url="http://127.0.0.1:9", cassette=cassette).login("learner", "")
+
+    assert len(waits) == 1 and waits[0] >= 0.02
+
+
+def test_replay_raises_on_unrecorded_request(tmp_path: Path):
+    cassette_path = str(tmp_path / "cassette.jsonl.gz")
+    record_sync(tmp_path, cassette_path)
+    client = APIClient(
+        base_url="http://127.0.0.1:9", cassette=Cassette.replay(cassette_path)
+    )
+
+    with pytest.raises(CassetteException, match="GET /users/someone"):
+        client.fetch_data("someone", "token")
+
+
+def test_replay_keeps_recorded_errors(tmp_path: Path):
+    cassette_path = str(tmp_path / "cassette.jsonl.gz")
+    with (
+        serve_fake_api(FakeAPIConfig(failures={"revoked": 401})) as api,
+        pytest.raises(UnauthorizedException),
+    ):
+        APIClient(base_url=api.url, cassette=Cassette.record(cassette_path)).fetch_data(
+            "revoked", "token"
+        )
+
+    with pytest.raises(UnauthorizedException):
+        APIClient(
+            base_url="http://127.0.0.1:9", cassette=Cassette.replay(cassette_path)
+        ).fetch_data("revoked", "token")
+
+
+def test_replay_rejects_request_with_other_query(tmp_path: Path):
+    cassette_path = str(tmp_path / "cassette.jsonl.gz")
+    record_sync(tmp_path, cassette_path)
+    client = APIClient(
+        base_url="http://127.0.0.1:9", cassette=Cassette.replay(cassette_path)
+    )
+
+    with pytest.raises(CassetteException, match="startDate=2024-02-13"):
+        client.fetch_data("learner", "token", "2024-02-13")
+
+
+def test_replay_consumes_each_interaction_once(tmp_path: Path):
+    cassette_path = str(tmp_path / "cassette.jsonl.gz")
+    with open_gzip(cassette_path, "wt", encoding="UTF-8") as file:
+        for content in (b"first", b"second"):
+            interaction = Interaction(
+                "GET", "/users/learner", None, 200, {}, content, 0
+            )
+            file.write(interaction.encode() + "\n")
+    cassette = Cassette.replay(cassette_path)
+    client = APIClient(base_url="http://127.0.0.1:9", cassette=cassette)
+
+    contents = [
+        client.request("http://127.0.0.1:9/users/learner").content for _ in range(3)
+    ]
+
+    assert contents == [b"first", b"second", b"second"]
+    assert cassette.consumed == [True, True]
+
+
+@pytest.fixture
+def recorded_main(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> tuple[str, str]:
+    # Records a full synchronization into the data directory, and returns the cassette and the
+    # recorded progress.
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("DUOLINGO_USERNAME", "learner")
+    monkeypatch.setenv("DUOLINGO_PASSWORD", "password")
+    monkeypatch.delenv("DUOLINGO_JWT", raising=False)
+    cassette_path = str(tmp_path / "cassette.jsonl.gz")
+
+    with serve_fake_api(FakeAPIConfig(days=20)) as api:
+        monkeypatch.setattr(
+            "sys.argv",
+            [
+                "main.py",
+                "--api-url",
+                api.url,
+                "--no-token-store",
+                "--no-telemetry",
+                "--record-cassette",
+                cassette_path,
+            ],
+        )
+        main.main()
+
+    return cassette_path, (tmp_path / "data" / "duolingo-progress.json").read_text()
+
+
+def test_main_replays_into_data_directory(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture,
+    recorded_main: tuple[str, str],
+):
+    cassette_path, recorded_progress = recorded_main
+
+    # Today's run is still recorded in the statistics, but a replay runs anyway.
+    monkeypatch.setattr(
+        "sys.argv",
+        [
+            "main.py",
+            "--no-telemetry",
+            "--replay-cassette",
+            cassette_path,
+            "--data-dir",
+            "replayed",
+        ],
+    )
+    main.main()
+
+    assert "Exception" not in capsys.readouterr().out
+    assert (tmp_path / "replayed" / "duolingo-progress.json").read_text() == (
+        recorded_progress
+    )
+
+
+def test_main_replays_into_copy_of_data(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture,
+    recorded_main: tuple[str, str],
+):
+    cassette_path, _ = recorded_main
+    progress_path = tmp_path / "data" / "duolingo-progress.json"
+    Database(filename=str(progress_path)).set({})
+    (tmp_path / "data" / "duolingo-progress.digest.json").unlink()
+
+    monkeypatch.setattr(
+        "sys.argv",
+        ["main.py", "--no-telemetry", "--replay-cassette", cassette_path],
+    )
+    main.main()
+
+    output = capsys.readouterr().out
+    assert "temporary copy" in output
+    assert "Exception" not in output
+    assert Database(filename=str(progress_path)).get() == {}
+    assert not (tmp_path / "data" / "duolingo-progress.digest.json").exists()
+
+
+def test_main_does_not_replay_other_start_date(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture,
+    recorded_main: tuple[str, str],
+):
+    # The stored history makes the replay fetch only the recent days, which the full recording does not
+    # answer, so nothing is written.
+    cassette_path, recorded_progress = recorded_main
+    monkeypatch.setattr(
+        "sys.argv",
+        [
+            "main.py",
+            "--no-telemetry",
+            "--replay-cassette",
+            cassette_path,
+            "--data-dir",
+            "data",
+        ],
+    )
+    main.main()
+
+    assert "CassetteException" in capsys.readouterr().out
+    assert (tmp_path / "data" / "duolingo-progress.json").read_text() == (
+        recorded_progress
+    )
+
+
+def run_main(monkeypatch: pytest.MonkeyPatch, *arguments: str):
+    monkeypatch.setattr("sys.argv", ["main.py", "--no-telemetry", *arguments])
+    main.main()
+
+
+def test_main_replays_incremental_recording_with_token_store(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture
+):
+    # The first run stores a token and the history, so the recording only fetches the recent days and
+    # would not need to login.
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("DUOLINGO_USERNAME", "learner")
+    monkeypatch.setenv("DUOLINGO_PASSWORD", "password")
+    monkeypatch.delenv("DUOLINGO_JWT", raising=False)
+    cassette_path = str(tmp_path / "cassette.jsonl.gz")
+    token_store = ["--token-store", str(tmp_path / "tokens.json")]
+    with serve_fake_api(FakeAPIConfig(days=40)) as api:
+        run_main(monkeypatch, "--api-url", api.url, *token_store)
+        run_main(
+            monkeypatch,
+            "--api-url",
+            api.url,
+            *token_store,
+            "--force",
+            "--record-cassette",
+            cassette_path,
+        )
+    recorded_progress = (tmp_path / "data" / "duolingo-progress.json").read_text()
+    capsys.readouterr()
+
+    run_main(monkeypatch, *token_store, "--replay-cassette", cassette_path)
+
+    output = capsys.readouterr().out
+    assert "data directory of the recording" in output
+    assert "Exception" not in output
+    with open_gzip(cassette_path, "rt", encoding="UTF-8") as file:
+        assert '"target":"/login"' in file.read()
+    assert (tmp_path / "data" / "duolingo-progress.json").read_text() == (
+        recorded_progress
+    )
+
+
+def test_replay_restores_snapshot(tmp_path: Path):
+    (tmp_path / "data" / "accounts").mkdir(parents=True)
+    (tmp_path / "data" / "accounts" / "report.json").write_bytes(b"{\xff}")
+    cassette_path = str(tmp_path / "cassette.jsonl.gz")
+    Cassette.record(cassette_path, str(tmp_path / "data"))
+
+    cassette = Cassette.replay(cassette_path)
+
+    assert cassette.restore_snapshot(str(tmp_path / "restored"))
+    assert (tmp_path / "restored" / "accounts" / "report.json").read_bytes() == (
+        b"{\xff}"
+    )
+    assert cassette.interactions == []
@@ -0,0 +1,160 @@
+from os import getpid, kill
+from pathlib import Path
+from signal import SIGINT, SIGTERM, getsignal, signal
+from threading import Event
+
+import pytest
+
+from src.api import APIClient
+from src.daemon import (
+    DaemonAccount,
+    Scheduler,
+    create_task,
+    handle_signals,
+    spread_offsets,
+)
+from src.database import Database, JournaledDatabase
+from src.runner import AccountState, sync_account
+from src.schema import Account
+from src.startup import today
+from tests.fake_api import FakeAPIConfig, serve_fake_api
+
+
+def test_spread_offsets():
+    assert spread_offsets(4, 100) == [0, 25, 50, 75]
+    assert spread_offsets(1, 100) == [0]
+
+
+class FakeClock(Event):
+    # Waiting on the stop event advances the clock instead of sleeping, so the schedule is exact.
+    def __init__(self):
+        super().__init__()
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def wait(self, timeout: float | None = None) -> bool:
+        if not self.is_set() and timeout is not None:
+            self.now += timeout
+        return self.is_set()
+
+
+def test_scheduler_spreads_tasks_across_interval():
+    clock = FakeClock()
+    runs: list[tuple[int, float]] = []
+
+    def create(index: int):
+        def task():
+            runs.append((index, clock()))
+            if len(runs) == 6:
+                clock.set()
+
+        return task
+
+    Scheduler(interval=0.2, clock=clock).run(
+        [create(index) for index in range(2)], clock
+    )
+
+    assert [index for index, _ in runs] == [0, 1, 0, 1, 0, 1]
+    assert [elapsed for _, elapsed in runs] == pytest.approx(
+        [0, 0.1, 0.2, 0.3, 0.4, 0.5]
+    )
+
+
+def test_scheduler_skips_missed_runs():
+    clock = FakeClock()
+    runs: list[float] = []
+
+    def task():
+        runs.append(clock())
+        if len(runs) == 1:
+            clock.now += 0.25
+        if len(runs) == 2:
+            clock.set()
+
+    Scheduler(interval=0.1, clock=clock).run([task], clock)
+
+    # The first run took two and a half intervals, so the next one waits for the third interval.
+    assert runs == pytest.approx([0, 0.3])
+
+
+def test_scheduler_stops_before_next_run():
+    stop = Event()
+    stop.set()
+    runs: list[int] = []
+
+    Scheduler(interval=60).run([lambda: runs.append(1)], stop)
+
+    assert runs == []
+
+
+def test_handle_signals():
+    previous_handlers = {number: getsignal(number) for number in (SIGINT, SIGTERM)}
+    stop = Event()
+    try:
+        handle_signals(stop)
+        kill(getpid(), SIGTERM)
+        assert stop.wait(1)
+    finally:
+        for number, handler in previous_handlers.items():
+            signal(number, handler)
+
+
+def test_sync_account_keeps_state_in_memory(tmp_path: Path):
+    data_directory = str(tmp_path)
+    state = AccountState()
+
+    with serve_fake_api(FakeAPIConfig(days=40)) as api:
+        client = APIClient(base_url=api.url)
+        _, changed_months = sync_account(
+            client,
+            "learner",
+            "token",
+            True,
+            data_directory,
+            storage="journal",
+            telemetry=False,
+            state=state,
+        )
+        journal = JournaledDatabase(filename=str(tmp_path / "duolingo-progress.json"))
+        records = len(journal.read_journal())
+
+        # The databases are not read again, so a broken snapshot goes unnoticed.
+        (tmp_path / "duolingo-progress.json").write_text("broken", encoding="UTF-8")
+        _, unchanged_months = sync_account(
+            client,
+            "learner",
+            "token",
+            True,
+            data_directory,
+            storage="journal",
+            telemetry=False,
+            state=state,
+        )
+
+    assert changed_months
+    assert unchanged_months == []
+    assert records == 40
+    assert len(journal.read_journal()) == 40
+    assert state.entries is not None and len(state.entries) == 40
+    assert state.statistics is not None and today() in state.statistics
+
+
+def test_daemon_task_resets_state_after_failure(
+    tmp_path: Path, capsys: pytest.CaptureFixture
+):
+    data_directory = str(tmp_path)
+
+    with serve_fake_api(FakeAPIConfig(days=10, failures={"blocked": 403})) as api:
+        account = DaemonAccount(
+            account=Account(username="blocked", jwt="token"),
+            data_directory=data_directory,
+            api=APIClient(base_url=api.url),
+            state=AccountState(entries={}),
+        )
+        create_task(account, 14, "json", False, None)()
+
+    assert "Account 'blocked' failed: CaptchaException" in capsys.readouterr().out
+    assert account.state.entries is None
+    assert Database(filename=str(tmp_path / "statistics.json")).get() == {}
@@ -1,10 +1,21 @@
 from json import dump, load
 from pathlib import Path
+from sqlite3 import ProgrammingError
 
 import pytest
 from pydantic import JsonValue
 
-from src.database import Database
+from src.database import (
+    Database,
+    JournaledDatabase,
+    SQLiteDatabase,
+    connect_sqlite,
+    export_database,
+    import_json_databases,
+    open_database,
+    open_databases,
+    transaction,
+)
 
 
 @pytest.fixture
@@ -49,3 +60,229 @@ def test_set_overwrites_existing_content(temp_db_file: Path, sample_data: JsonVa
     with open(temp_db_file, "r", encoding="UTF-8") as file:
         data = load(file)
         assert data == sample_data, "Data in the file does not match the expected data"
+
+
+def test_set_skips_unchanged_content(temp_db_file: Path, sample_data: JsonValue):
+    db = Database(filename=str(temp_db_file))
+    db.set(sample_data)
+    inode = temp_db_file.stat().st_ino
+    db.set(sample_data)
+
+    assert temp_db_file.stat().st_ino == inode
+    db.set({**sample_data, "key2": 43})
+    assert temp_db_file.stat().st_ino != inode
+
+
+@pytest.fixture
+def journaled_db(temp_db_file: Path) -> JournaledDatabase:
+    Database(filename=str(temp_db_file)).set({"2024/06/01": {"xp_today": 1}})
+    return JournaledDatabase(filename=str(temp_db_file))
+
+
+def test_set_leaves_no_temporary_files(temp_db_file: Path, sample_data: JsonValue):
+    Database(filename=str(temp_db_file)).set(sample_data)
+    assert [file.name for file in temp_db_file.parent.iterdir()] == [temp_db_file.name]
+
+
+def test_journaled_set_appends_only_changes(journaled_db: JournaledDatabase):
+    journaled_db.set({"2024/06/01": {"xp_today": 1}, "2024/06/02": {"xp_today": 2}})
+    journaled_db.set({"2024/06/01": {"xp_today": 1}, "2024/06/02": {"xp_today": 3}})
+    journaled_db.set({"2024/06/02": {"xp_today": 3}})
+
+    assert journaled_db.read_journal() == [
+        {"key": "2024/06/02", "value": {"xp_today": 2}},
+        {"key": "2024/06/02", "value": {"xp_today": 3}},
+        {"key": "2024/06/01", "deleted": True},
+    ]
+    assert journaled_db.get() == {"2024/06/02": {"xp_today": 3}}
+
+    # The snapshot itself is not rewritten until the journal is compacted.
+    assert Database(filename=journaled_db.filename).get() == {
+        "2024/06/01": {"xp_today": 1}
+    }
+
+
+def test_journaled_set_without_changes(journaled_db: JournaledDatabase):
+    journaled_db.set({"2024/06/01": {"xp_today": 1}})
+    assert not Path(journaled_db.journal_filename).exists()
+
+
+def test_journaled_set_compacts_at_threshold(journaled_db: JournaledDatabase):
+    journaled_db.compaction_threshold = 80
+    journaled_db.set({"2024/06/01": {"xp_today": 1}, "2024/06/02": {"xp_today": 2}})
+    assert Path(journaled_db.journal_filename).exists()
+
+    journaled_db.set({"2024/06/01": {"xp_today": 1}, "2024/06/02": {"xp_today": 4}})
+    assert not Path(journaled_db.journal_filename).exists()
+    assert Database(filename=journaled_db.filename).get() == {
+        "2024/06/01": {"xp_today": 1},
+        "2024/06/02": {"xp_today": 4},
+    }
+
+
+def test_journaled_write_changes_appends_only_given_keys(
+    journaled_db: JournaledDatabase,
+):
+    data = {"2024/06/01": {"xp_today": 1}, "2024/06/02": {"xp_today": 2}}
+    journaled_db.write_changes(data, ["2024/06/02", "2024/05/31"])
+
+    assert journaled_db.read_journal() == [
+        {"key": "2024/06/02", "value": {"xp_today": 2}},
+        {"key": "2024/05/31", "deleted": True},
+    ]
+
+
+def test_journaled_get_ignores_torn_record(journaled_db: JournaledDatabase):
+    journaled_db.set({"2024/06/01": {"xp_today": 1}, "2024/06/02": {"xp_today": 2}})
+    with open(journaled_db.journal_filename, "a", encoding="UTF-8") as file:
+        file.write('{"key": "2024/06/03", "val')
+
+    assert journaled_db.get() == {
+        "2024/06/01": {"xp_today": 1},
+        "2024/06/02": {"xp_today": 2},
+    }
+
+    # The next write starts on a new line, so the torn record does not hide it.
+    journaled_db.set({"2024/06/03": {"xp_today": 3}})
+    assert journaled_db.get() == {"2024/06/03": {"xp_today": 3}}
+
+
+def test_journaled_export_matches_database_layout(
+    journaled_db: JournaledDatabase, tmp_path: Path
+):
+    data = {"2024/06/02": {"xp_today": 2}, "2024/06/01": {"xp_today": 1}}
+    journaled_db.set(data)
+    journaled_db.export(str(tmp_path / "export.json"))
+
+    expected_file = tmp_path / "expected.json"
+    Database(filename=str(expected_file)).set(data)
+    assert (tmp_path / "export.json").read_text() == expected_file.read_text()
+
+
+def test_export_database_includes_journal(tmp_path: Path):
+    data = {"2024/06/01": {"xp_today": 1}, "2024/06/02": {"xp_today": 2}}
+    database = JournaledDatabase(filename=str(tmp_path / "duolingo-progress.json"))
+    Database(filename=database.filename).set({})
+    database.set(data)
+
+    export_database(
+        str(tmp_path),
+        "duolingo-progress",
+        "journal",
+        str(tmp_path / "build" / "progress.json"),
+    )
+
+    assert (tmp_path / "duolingo-progress.json.journal").exists()
+    assert Database(filename=str(tmp_path / "build" / "progress.json")).get() == data
+
+
+def test_open_database(temp_db_file: Path):
+    assert isinstance(open_database(str(temp_db_file)), Database)
+    assert isinstance(open_database(str(temp_db_file), "journal"), JournaledDatabase)
+    with pytest.raises(ValueError):
+        open_database(str(temp_db_file), "unknown")
+
+
+@pytest.fixture
+def sqlite_connection(tmp_path: Path):
+    connection = connect_sqlite(str(tmp_path / "test_db.sqlite3"))
+    yield connection
+    connection.close()
+
+
+def test_sqlite_set_and_get(sqlite_connection):
+    db = SQLiteDatabase(connection=sqlite_connection, namespace="progress")
+    db.set({"2024/06/02": {"xp_today": 2}, "2024/06/01": {"xp_today": 1}})
+    db.set({"2024/06/02": {"xp_today": 3}, "2024/06/03": {"xp_today": 4}})
+
+    assert db.get() == {"2024/06/02": {"xp_today": 3}, "2024/06/03": {"xp_today": 4}}
+    assert SQLiteDatabase(connection=sqlite_connection, namespace="other").get() == {}
+
+
+def test_sqlite_write_changes(sqlite_connection):
+    db = SQLiteDatabase(connection=sqlite_connection, namespace="progress")
+    db.set({"2024/06/01": {"xp_today": 1}, "2024/06/02": {"xp_today": 2}})
+    db.write_changes(
+        {"2024/06/02": {"xp_today": 3}, "2024/06/03": {"xp_today": 4}},
+        ["2024/06/01", "2024/06/03"],
+    )
+
+    # Keys that are not given are left alone, even if the data differs.
+    assert db.get() == {"2024/06/02": {"xp_today": 2}, "2024/06/03": {"xp_today": 4}}
+
+
+def test_sqlite_upsert_and_range(sqlite_connection):
+    db = SQLiteDatabase(connection=sqlite_connection, namespace="progress")
+    for day in range(1, 10):
+        db.upsert(f"2024/06/0{day}", {"xp_today": day})
+    db.upsert("2024/06/05", {"xp_today": 50})
+
+    assert db.range("2024/06/04", "2024/06/06") == {
+        "2024/06/04": {"xp_today": 4},
+        "2024/06/05": {"xp_today": 50},
+        "2024/06/06": {"xp_today": 6},
+    }
+    assert db.range("2024/07/01", "2024/07/31") == {}
+
+
+def test_sqlite_range_uses_index(sqlite_connection):
+    plan = sqlite_connection.execute(
+        "EXPLAIN QUERY PLAN SELECT date, value FROM records WHERE namespace = ? AND date BETWEEN ? AND ?",
+        ("progress", "2024/06/01", "2024/06/30"),
+    ).fetchall()
+    assert "USING PRIMARY KEY" in plan[0][-1]
+
+
+def test_sqlite_transaction_rolls_back_every_database(sqlite_connection):
+    progress = SQLiteDatabase(connection=sqlite_connection, namespace="progress")
+    statistics = SQLiteDatabase(connection=sqlite_connection, namespace="statistics")
+
+    with pytest.raises(RuntimeError), transaction(progress, statistics):
+        progress.set({"2024/06/01": {"xp_today": 1}})
+        statistics.set({"2024/06/01": "20:15:00"})
+        raise RuntimeError("crash before commit")
+
+    assert progress.get() == {}
+    assert statistics.get() == {}
+
+
+def test_import_json_databases(tmp_path: Path):
+    progress_file = tmp_path / "duolingo-progress.json"
+    statistics_file = tmp_path / "statistics.json"
+    Database(filename=str(progress_file)).set({"2024/06/01": {"xp_today": 1}})
+    Database(filename=str(statistics_file)).set({"2024/06/01": "20:15:00"})
+
+    connection = connect_sqlite(str(tmp_path / "duolingo.sqlite3"))
+    import_json_databases([str(progress_file), str(statistics_file)], connection)
+    connection.close()
+
+    with open_databases(
+        str(tmp_path), ["duolingo-progress", "statistics"], "sqlite"
+    ) as [progress, statistics]:
+        assert progress.get() == {"2024/06/01": {"xp_today": 1}}
+        assert statistics.get() == {"2024/06/01": "20:15:00"}
+
+
+def test_open_databases_closes_sqlite_connection(tmp_path: Path):
+    with open_databases(str(tmp_path), ["statistics"], "sqlite") as [statistics]:
+        statistics.set({"2024/06/01": "20:15:00"})
+
+    assert isinstance(statistics, SQLiteDatabase)
+    with pytest.raises(ProgrammingError):
+        statistics.get()
+
+
+def test_export_database_from_sqlite(tmp_path: Path):
+    data = {"2024/06/02": {"xp_today": 2}, "2024/06/01": {"xp_today": 1}}
+    export_path = tmp_path / "build" / "progress.json"
+    with pytest.raises(FileNotFoundError):
+        export_database(str(tmp_path), "duolingo-progress", "sqlite", str(export_path))
+    assert list(tmp_path.iterdir()) == []
+
+    with open_databases(str(tmp_path), ["duolingo-progress"], "sqlite") as [progress]:
+        progress.set(data)
+    export_database(str(tmp_path), "duolingo-progress", "sqlite", str(export_path))
+
+    expected_file = tmp_path / "expected.json"
+    Database(filename=str(expected_file)).set(data)
+    assert export_path.read_text() == expected_file.read_text()
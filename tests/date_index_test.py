@@ -0,0 +1,74 @@
+import pytest
+
+from src.date_index import DateIndex
+
+
+@pytest.fixture
+def raw_database() -> dict[str, dict[str, int]]:
+    return {
+        "2024/06/03": {"streak": 1, "xp_today": 30},
+        "2024/05/31": {"streak": 1, "xp_today": 10},
+        "2024/06/01": {"streak": 2, "xp_today": 20},
+        "2024/06/05": {"streak": 1, "xp_today": 50},
+    }
+
+
+def test_create_sorts_dates(raw_database):
+    index = DateIndex.create(raw_database)
+    assert list(index.view().dates()) == sorted(raw_database)
+    assert index.view().to_dict() == raw_database
+
+
+@pytest.mark.parametrize(
+    "start_date, end_date, expected_dates",
+    [
+        ("2024/06/01", "2024/06/03", ["2024/06/01", "2024/06/03"]),
+        ("2024/06/02", "2024/06/04", ["2024/06/03"]),
+        (
+            "2024/01/01",
+            "2024/12/31",
+            ["2024/05/31", "2024/06/01", "2024/06/03", "2024/06/05"],
+        ),
+        ("2024/06/06", "2024/12/31", []),
+        ("2024/06/03", "2024/06/01", []),
+    ],
+)
+def test_range(raw_database, start_date, end_date, expected_dates):
+    view = DateIndex.create(raw_database).range(start_date, end_date)
+    assert list(view.dates()) == expected_dates
+    assert len(view) == len(expected_dates)
+
+
+@pytest.mark.parametrize(
+    "count, expected_dates",
+    [
+        (0, []),
+        (2, ["2024/06/03", "2024/06/05"]),
+        (10, ["2024/05/31", "2024/06/01", "2024/06/03", "2024/06/05"]),
+    ],
+)
+def test_latest(raw_database, count, expected_dates):
+    assert list(DateIndex.create(raw_database).latest(count).dates()) == expected_dates
+
+
+def test_at(raw_database):
+    index = DateIndex.create(raw_database)
+    assert index.at("2024/06/01") == {"streak": 2, "xp_today": 20}
+    assert index.at("2024/06/02") is None
+    assert index.at("2024/07/01") is None
+
+
+def test_view_column_shares_memory(raw_database):
+    index = DateIndex.create(raw_database)
+    column = index.range("2024/06/01", "2024/06/05").column("xp_today")
+    assert column.tolist() == [20, 30, 50]
+
+    index.columns["xp_today"][1] = 21
+    assert column.tolist() == [21, 30, 50]
+
+
+def test_empty_index():
+    index = DateIndex.create({})
+    assert len(index) == 0
+    assert index.at("2024/06/01") is None
+    assert list(index.latest(7)) == []
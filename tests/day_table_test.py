@@ -0,0 +1,133 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from src.day_table import DayTable, get_day_table
+from src.schema import parse_summaries
+
+# 2024/06/08 00:00:00 in UTC.
+TIMESTAMP = 1717804800
+
+
+@pytest.mark.parametrize(
+    "timezone, expected_date",
+    [
+        ("UTC", "2024/06/08"),
+        ("Asia/Jakarta", "2024/06/08"),
+        ("America/New_York", "2024/06/07"),
+    ],
+)
+def test_find_in_timezone(timezone, expected_date):
+    assert DayTable(ZoneInfo(timezone)).find(TIMESTAMP) == expected_date
+
+
+def test_find_stores_every_day_once():
+    table = DayTable(ZoneInfo("Asia/Jakarta"))
+
+    dates = table.convert(range(TIMESTAMP, TIMESTAMP + 2 * 86400, 600))
+
+    assert sorted(set(dates)) == ["2024/06/08", "2024/06/09", "2024/06/10"]
+    assert [date_str for _, _, date_str in table.days] == sorted(set(dates))
+    assert table.find(TIMESTAMP + 3600) == "2024/06/08"
+    assert len(table.days) == 3
+
+
+@pytest.mark.parametrize(
+    "timezone",
+    ["Europe/Berlin", "America/Santiago", "Asia/Kathmandu", "Australia/Lord_Howe"],
+)
+def test_convert_matches_per_timestamp_conversion(timezone):
+    # Every 15 minutes over two years, across the clock changes, in both directions. The clocks of
+    # Santiago change at midnight, so some of its days do not start at midnight.
+    zone = ZoneInfo(timezone)
+    start = int(datetime(2023, 1, 1, tzinfo=zone).timestamp())
+    timestamps = range(start, start + 2 * 366 * 86400, 900)
+
+    assert DayTable(zone).convert(reversed(timestamps)) == [
+        datetime.fromtimestamp(timestamp, zone).strftime("%Y/%m/%d")
+        for timestamp in reversed(timestamps)
+    ]
+
+
+@pytest.mark.parametrize(
+    "timezone",
+    ["Europe/Berlin", "America/Santiago", "Asia/Kathmandu", "Australia/Lord_Howe"],
+)
+@pytest.mark.parametrize("hour", [0, 1, 12, 23])
+def test_convert_stores_only_whole_days(timezone, hour):
+    # One timestamp per day at the same hour, like the summaries of the API, newest first. Every stored
+    # day must cover exactly the seconds of its date.
+    zone = ZoneInfo(timezone)
+    start = int(datetime(2023, 1, 1, hour, 30, tzinfo=zone).timestamp())
+    timestamps = range(start + 2 * 366 * 86400, start, -86400)
+    table = DayTable(zone)
+
+    dates = table.convert(timestamps)
+
+    assert dates == [
+        datetime.fromtimestamp(timestamp, zone).strftime("%Y/%m/%d")
+        for timestamp in timestamps
+    ]
+    for start_of_day, end_of_day, date_str in table.days:
+        assert (
+            datetime.fromtimestamp(start_of_day, zone).strftime("%Y/%m/%d %H:%M")
+            == f"{date_str} 00:00"
+        )
+        assert datetime.fromtimestamp(end_of_day - 1, zone).strftime("%Y/%m/%d") == (
+            date_str
+        )
+        assert datetime.fromtimestamp(end_of_day, zone).strftime("%Y/%m/%d") != date_str
+    assert table.convert(timestamps) == dates
+
+
+def test_day_table_is_shared_between_threads():
+    zone = ZoneInfo("Europe/Berlin")
+    start = int(datetime(2023, 1, 1, 12, tzinfo=zone).timestamp())
+    table = DayTable(zone)
+    expected = [
+        datetime.fromtimestamp(timestamp, zone).strftime("%Y/%m/%d")
+        for timestamp in range(start, start + 730 * 86400, 86400)
+    ]
+
+    def convert(offset: int) -> bool:
+        # Every thread starts on another day, and some of them search one day at a time.
+        timestamps = range(start + offset * 86400, start + 730 * 86400, 86400)
+        dates = (
+            table.convert(timestamps)
+            if offset % 2
+            else [table.find(timestamp) for timestamp in timestamps]
+        )
+        return dates == expected[offset:]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        assert all(executor.map(convert, range(0, 64, 4)))
+
+    # Only the days on which the clocks change are not stored.
+    starts = [start_of_day for start_of_day, _, _ in table.days]
+    assert starts == sorted(set(starts))
+    assert {date_str for _, _, date_str in table.days} <= set(expected)
+    assert len(table.days) >= len(expected) - 4
+
+
+def test_get_day_table_is_shared():
+    assert get_day_table("Asia/Jakarta") is get_day_table("Asia/Jakarta")
+    assert get_day_table().timezone is None
+
+
+def test_parse_summaries_in_timezone():
+    raw_summaries = [
+        {
+            "date": TIMESTAMP,
+            "gainedXp": 10,
+            "numSessions": 1,
+            "totalSessionTime": 60,
+        }
+    ]
+
+    [summary] = parse_summaries(raw_summaries, get_day_table("America/New_York"))
+    [local_summary] = parse_summaries(raw_summaries)
+
+    assert summary.date == "2024/06/07"
+    assert local_summary.date == datetime.fromtimestamp(TIMESTAMP).strftime("%Y/%m/%d")
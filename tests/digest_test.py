@@ -0,0 +1,95 @@
+from pathlib import Path
+
+import pytest
+
+from src.database import Database
+from src.digest import (
+    DigestIndex,
+    compute_month_digests,
+    compute_root_digest,
+    find_changed_months,
+    update_month_digests,
+)
+
+
+@pytest.fixture
+def raw_database() -> dict[str, dict[str, int]]:
+    return {
+        "2024/05/30": {"streak": 1, "xp_today": 10},
+        "2024/05/31": {"streak": 2, "xp_today": 20},
+        "2024/06/01": {"streak": 3, "xp_today": 30},
+        "2024/07/01": {"streak": 0, "xp_today": 0},
+    }
+
+
+def test_compute_month_digests(raw_database):
+    digests = compute_month_digests(raw_database)
+    assert list(digests) == ["2024/05", "2024/06", "2024/07"]
+
+    changed_database = {**raw_database, "2024/06/01": {"streak": 3, "xp_today": 31}}
+    changed_digests = compute_month_digests(changed_database)
+    assert find_changed_months(digests, changed_digests) == ["2024/06"]
+    assert compute_root_digest(digests) != compute_root_digest(changed_digests)
+
+
+def test_compute_month_digests_since_month(raw_database):
+    assert compute_month_digests(raw_database, "2024/06") == {
+        month: digest
+        for month, digest in compute_month_digests(raw_database).items()
+        if month >= "2024/06"
+    }
+
+
+def test_update_month_digests_matches_full_computation(raw_database):
+    previous = compute_month_digests(raw_database)
+    updated_database = {**raw_database, "2024/07/02": {"streak": 1, "xp_today": 5}}
+
+    assert update_month_digests(
+        updated_database, previous, "2024/07"
+    ) == compute_month_digests(updated_database)
+    assert update_month_digests(updated_database, {}, "2024/07") == (
+        compute_month_digests(updated_database)
+    )
+
+
+@pytest.mark.parametrize(
+    "old, new, expected",
+    [
+        ({"2024/05": "a"}, {"2024/05": "a"}, []),
+        ({"2024/05": "a"}, {"2024/05": "a", "2024/06": "b"}, ["2024/06"]),
+        ({"2024/05": "a", "2024/06": "b"}, {"2024/06": "c"}, ["2024/05", "2024/06"]),
+    ],
+)
+def test_find_changed_months(old, new, expected):
+    assert find_changed_months(old, new) == expected
+
+
+def test_digest_index(tmp_path: Path, raw_database):
+    database = Database(filename=str(tmp_path / "duolingo-progress.json"))
+    database.set(raw_database)
+    index = DigestIndex(
+        filename=str(tmp_path / "duolingo-progress.digest.json"),
+        database_filenames=[database.filename, f"{database.filename}.journal"],
+    )
+    assert index.get() is None
+
+    digests = compute_month_digests(raw_database)
+    index.set(digests)
+    assert index.get() == {
+        "root": compute_root_digest(digests),
+        "months": digests,
+        "fingerprint": index.fingerprint(),
+    }
+
+
+def test_digest_index_ignores_changed_database(tmp_path: Path, raw_database):
+    database = Database(filename=str(tmp_path / "duolingo-progress.json"))
+    database.set(raw_database)
+    index = DigestIndex(
+        filename=str(tmp_path / "duolingo-progress.digest.json"),
+        database_filenames=[database.filename],
+    )
+    index.set(compute_month_digests(raw_database))
+
+    database.set({**raw_database, "2024/07/02": {"streak": 1, "xp_today": 10}})
+    assert index.get() is None
@@ -0,0 +1,219 @@
+from datetime import datetime
+from json import dumps
+from pathlib import Path
+
+import pytest
+
+import main
+from src.api import APIClient, CaptchaException
+from src.database import Database
+from src.runner import run, run_batch
+from src.startup import today
+from tests.fake_api import FakeAPIConfig, serve_fake_api
+
+
+@pytest.fixture
+def workspace(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    # The script reads and writes the data folder relative to the working directory.
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    for filename in ("duolingo-progress.json", "statistics.json"):
+        Database(filename=str(tmp_path / "data" / filename)).set({})
+
+    return tmp_path
+
+
+def test_fake_api_streams_summaries():
+    with serve_fake_api(FakeAPIConfig(days=5000)) as api:
+        client = APIClient(base_url=api.url)
+        token = client.login("learner", "password")
+        user, summaries = client.stream_data("learner", token)
+
+        assert user["username"] == "learner"
+        assert len(list(summaries)) == 5000
+
+
+def test_fake_api_filters_summaries_by_start_date():
+    with serve_fake_api(FakeAPIConfig(days=30)) as api:
+        client = APIClient(base_url=api.url)
+        token = client.login("learner", "password")
+        _, everything = client.fetch_data("learner", token)
+        start_date = everything["summaries"][9]["date"]
+        _, recent = client.fetch_data(
+            "learner", token, datetime.fromtimestamp(start_date).strftime("%Y-%m-%d")
+        )
+
+        assert recent["summaries"] == everything["summaries"][:10]
+
+
+def test_fake_api_injects_captcha():
+    with serve_fake_api(FakeAPIConfig(failures={"blocked": 403})) as api:
+        with pytest.raises(CaptchaException):
+            APIClient(base_url=api.url).login("blocked", "password")
+
+        assert api.requests[("login", 403)] == 1
+
+
+def test_run_against_fake_api(workspace: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("DUOLINGO_USERNAME", "learner")
+    monkeypatch.setenv("DUOLINGO_PASSWORD", "password")
+    monkeypatch.delenv("DUOLINGO_JWT", raising=False)
+    token_store_path = str(workspace / "tokens.json")
+
+    with serve_fake_api(FakeAPIConfig(days=60)) as api:
+        passwordless, changed_months = run(
+            telemetry=False, token_store_path=token_store_path, base_url=api.url
+        )
+        _, unchanged_months = run(
+            telemetry=False, token_store_path=token_store_path, base_url=api.url
+        )
+
+        # The second run reuses the stored token, and finds nothing to synchronize.
+        assert api.requests[("login", 200)] == 1
+        assert api.requests[("summaries", 200)] == 2
+
+    progress = Database(filename=str(workspace / "data" / "duolingo-progress.json"))
+    assert passwordless is False
+    assert changed_months
+    assert unchanged_months == []
+    assert len(progress.get()) == 60
+
+
+def test_run_without_summaries(workspace: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("DUOLINGO_USERNAME", "learner")
+    monkeypatch.setenv("DUOLINGO_PASSWORD", "password")
+    monkeypatch.delenv("DUOLINGO_JWT", raising=False)
+
+    with serve_fake_api(FakeAPIConfig(days=0)) as api:
+        _, changed_months = run(telemetry=False, base_url=api.url)
+
+    progress = Database(filename=str(workspace / "data" / "duolingo-progress.json"))
+    assert changed_months == []
+    assert progress.get() == {}
+
+
+def test_run_ignores_stale_digest_index(
+    workspace: Path, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setenv("DUOLINGO_USERNAME", "learner")
+    monkeypatch.setenv("DUOLINGO_PASSWORD", "password")
+    monkeypatch.delenv("DUOLINGO_JWT", raising=False)
+    progress = Database(filename=str(workspace / "data" / "duolingo-progress.json"))
+
+    with serve_fake_api(FakeAPIConfig(days=60)) as api:
+        run(telemetry=False, base_url=api.url)
+
+        # The newest day is lost behind the back of the script, while its digest index stays.
+        entries = progress.get()
+        del entries[max(entries)]
+        progress.set(entries)
+        _, changed_months = run(telemetry=False, base_url=api.url)
+
+    assert changed_months
+    assert len(progress.get()) == 60
+
+
+def test_run_batch_isolates_injected_errors(
+    workspace: Path, monkeypatch: pytest.MonkeyPatch
+):
+    accounts = [
+        {"username": "learner", "password": "password"},
+        {"username": "captcha", "password": "password"},
+        {"username": "missing", "jwt": "token"},
+        {"username": "revoked", "jwt": "token"},
+    ]
+    monkeypatch.setenv("DUOLINGO_ACCOUNTS", dumps(accounts))
+    config = FakeAPIConfig(
+        days=30, failures={"captcha": 403, "missing": 404, "revoked": 401}
+    )
+
+    with serve_fake_api(config) as api:
+        results = run_batch(telemetry=False, base_url=api.url)
+
+    assert [result.succeeded for result in results] == [True, False, False, False]
+    assert [result.message.split(":")[0] for result in results[1:]] == [
+        "CaptchaException",
+        "NotFoundException",
+        "UnauthorizedException",
+    ]
+
+
+def test_main_skips_run_synchronized_today(
+    workspace: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture
+):
+    monkeypatch.setenv("DUOLINGO_USERNAME", "learner")
+    monkeypatch.setenv("DUOLINGO_PASSWORD", "password")
+    Database(filename=str(workspace / "data" / "statistics.json")).set(
+        {today(): "20:15:00"}
+    )
+
+    with serve_fake_api() as api:
+        arguments = ["main.py", "--api-url", api.url, "--no-token-store"]
+        monkeypatch.setattr("sys.argv", arguments)
+        main.main()
+        skipped_requests = sum(api.requests.values())
+
+        monkeypatch.setattr("sys.argv", [*arguments, "--force"])
+        main.main()
+        forced_requests = sum(api.requests.values())
+
+    assert "already synchronized your data today" in capsys.readouterr().out
+    assert skipped_requests == 0
+    assert forced_requests == 3
+
+
+@pytest.mark.parametrize("storage", ["json", "journal", "sqlite"])
+def test_main_exports_progress(
+    workspace: Path, monkeypatch: pytest.MonkeyPatch, storage: str
+):
+    monkeypatch.setenv("DUOLINGO_USERNAME", "learner")
+    monkeypatch.setenv("DUOLINGO_PASSWORD", "password")
+    monkeypatch.delenv("DUOLINGO_JWT", raising=False)
+    export_path = workspace / "build" / "duolingo-progress.json"
+
+    with serve_fake_api(FakeAPIConfig(days=30)) as api:
+        arguments = [
+            "main.py",
+            "--api-url",
+            api.url,
+            "--no-token-store",
+            "--no-telemetry",
+            "--storage",
+            storage,
+            "--export",
+            str(export_path),
+        ]
+        monkeypatch.setattr("sys.argv", arguments)
+        main.main()
+        exported_progress = export_path.read_text()
+        export_path.unlink()
+
+        # A skipped run still exports the stored progress.
+        main.main()
+        assert sum(api.requests.values()) == 3
+
+    assert len(Database(filename=str(export_path)).get()) == 30
+    assert export_path.read_text() == exported_progress
+
+
+def test_run_batch_skips_accounts_synchronized_today(
+    workspace: Path, monkeypatch: pytest.MonkeyPatch
+):
+    accounts = [
+        {"username": "learner", "password": "password"},
+        {"username": "synchronized", "password": "password"},
+    ]
+    monkeypatch.setenv("DUOLINGO_ACCOUNTS", dumps(accounts))
+    synchronized_directory = workspace / "data" / "accounts" / "synchronized"
+    synchronized_directory.mkdir(parents=True)
+    Database(filename=str(synchronized_directory / "statistics.json")).set(
+        {today(): "20:15:00"}
+    )
+
+    with serve_fake_api(FakeAPIConfig(days=30)) as api:
+        results = run_batch(telemetry=False, base_url=api.url)
+
+        assert api.requests[("login", 200)] == 1
+
+    assert results[0].message.startswith("Synchronized ")
+    assert results[1].message == "Already synchronized today."
@@ -0,0 +1,255 @@
+# A stand-in for the parts of the Duolingo API that the script uses, for end-to-end tests and load
+# benchmarks without a network. It serves `/login`, `/users/{username}` and
+# `/2017-06-30/users/{id}/xp_summaries` with a configurable latency, payload size, and injected errors.
+#
+#   with serve_fake_api(FakeAPIConfig(days=3650, latency=0.05)) as api:
+#       APIClient(base_url=api.url).login("username", "password")
+
+from base64 import urlsafe_b64encode
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from json import dumps, loads
+from random import Random
+from re import fullmatch
+from threading import Lock, Thread
+from time import sleep, time
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+# Size of the chunks that the summaries are written in, so clients can stream them.
+CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class FakeAPIConfig:
+    # Number of days of history of every user, which decides the size of the summaries.
+    days: int = 365
+    # Seconds before every response, and a random extra of up to `jitter` seconds.
+    latency: float = 0.0
+    jitter: float = 0.0
+    # Every request of these users fails with the status: 401 (unauthorized), 403 (captcha), or 404.
+    failures: dict[str, int] = field(default_factory=dict)
+    # Share of all other requests that fail with `error_status`, at random.
+    error_rate: float = 0.0
+    error_status: int = 401
+    # Seconds until the issued tokens expire.
+    token_lifetime: int = 3600
+    seed: int = 0
+
+
+def encode_token(claims: dict[str, Any]) -> str:
+    # Tokens have the layout of a JWT, so the token store can read their expiry. They are not signed.
+    def encode(value: dict[str, Any]) -> str:
+        return urlsafe_b64encode(dumps(value).encode()).rstrip(b"=").decode()
+
+    return f"{encode({'alg': 'none', 'typ': 'JWT'})}.{encode(claims)}.fake"
+
+
+def generate_summaries(days: int, seed: int, today: datetime) -> list[dict[str, Any]]:
+    # The history of a user, newest first. Like the API, every day is in the summaries, dated with a
+    # timestamp from the middle of the day, and the inactive days have zero sessions.
+    random = Random(seed)
+    summaries = []
+    for offset in range(days):
+        active = random.random() < 0.9
+        summaries.append(
+            {
+                "date": int((today - timedelta(days=offset)).timestamp()),
+                "gainedXp": random.randint(10, 1500) if active else 0,
+                "numSessions": random.randint(1, 40) if active else 0,
+                "totalSessionTime": random.randint(60, 10000) if active else 0,
+            }
+        )
+
+    return summaries
+
+
+@dataclass
+class FakeAPI:
+    config: FakeAPIConfig
+    server: ThreadingHTTPServer
+    lock: Lock = field(default_factory=Lock)
+    random: Random = field(default_factory=Random)
+    # Number of requests per endpoint and status, for example `("summaries", 200)`.
+    requests: Counter[tuple[str, int]] = field(default_factory=Counter)
+    user_ids: dict[str, int] = field(default_factory=dict)
+    summaries: dict[int, list[dict[str, Any]]] = field(default_factory=dict)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def user_id(self, username: str) -> int:
+        with self.lock:
+            return self.user_ids.setdefault(username, len(self.user_ids) + 1)
+
+    def username(self, user_id: int) -> str | None:
+        with self.lock:
+            return next(
+                (
+                    name
+                    for name, known_id in self.user_ids.items()
+                    if known_id == user_id
+                ),
+                None,
+            )
+
+    def user_summaries(self, user_id: int) -> list[dict[str, Any]]:
+        # The history of every user is generated once, and keeps its dates while the server runs.
+        with self.lock:
+            if user_id not in self.summaries:
+                today = datetime.now().replace(hour=12, minute=0, second=0)
+                self.summaries[user_id] = generate_summaries(
+                    self.config.days, self.config.seed + user_id, today
+                )
+            return self.summaries[user_id]
+
+    def injected_status(self, username: str | None) -> int | None:
+        if username is not None and username in self.config.failures:
+            return self.config.failures[username]
+
+        with self.lock:
+            failed = self.random.random() < self.config.error_rate
+        return self.config.error_status if failed else None
+
+    def delay(self) -> None:
+        with self.lock:
+            jitter = self.random.uniform(0, self.config.jitter)
+        if self.config.latency or jitter:
+            sleep(self.config.latency + jitter)
+
+    def count(self, endpoint: str, status: int) -> None:
+        with self.lock:
+            self.requests[(endpoint, status)] += 1
+
+
+class FakeAPIHandler(BaseHTTPRequestHandler):
+    # Keep-alive connections, like the real API.
+    protocol_version = "HTTP/1.1"
+    server: "FakeAPIServer"
+
+    def do_POST(self) -> None:
+        api = self.server.api
+        api.delay()
+        body = loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        if urlsplit(self.path).path != "/login":
+            self.send_json("unknown", 404, {})
+            return
+
+        username = body["login"]
+        if (status := api.injected_status(username)) is not None:
+            self.send_failure("login", status)
+            return
+
+        token = encode_token(
+            {
+                "sub": api.user_id(username),
+                "exp": int(time()) + api.config.token_lifetime,
+            }
+        )
+        self.send_json("login", 200, {"user_id": api.user_id(username)}, {"jwt": token})
+
+    def do_GET(self) -> None:
+        api = self.server.api
+        api.delay()
+        url = urlsplit(self.path)
+        authorized = self.headers.get("Authorization", "").startswith("Bearer ")
+        if match := fullmatch(r"/users/([^/]+)", url.path):
+            username = match.group(1)
+            if not authorized:
+                self.send_failure("user", 401)
+            elif (status := api.injected_status(username)) is not None:
+                self.send_failure("user", status)
+            else:
+                self.send_json(
+                    "user",
+                    200,
+                    {
+                        "id": api.user_id(username),
+                        "username": username,
+                        "siteStreak": api.config.days,
+                    },
+                )
+        elif match := fullmatch(r"/2017-06-30/users/(\d+)/xp_summaries", url.path):
+            user_id = int(match.group(1))
+            if not authorized:
+                self.send_failure("summaries", 401)
+            elif (status := api.injected_status(api.username(user_id))) is not None:
+                self.send_failure("summaries", status)
+            else:
+                self.send_summaries(user_id, parse_qs(url.query))
+        else:
+            self.send_json("unknown", 404, {})
+
+    def send_summaries(self, user_id: int, query: dict[str, list[str]]) -> None:
+        # Only the days from the start date onwards are sent, and the body is written in chunks.
+        start_date = datetime.strptime(
+            query.get("startDate", ["1970-01-01"])[0], "%Y-%m-%d"
+        )
+        summaries = [
+            summary
+            for summary in self.server.api.user_summaries(user_id)
+            if summary["date"] >= start_date.timestamp()
+        ]
+        body = dumps({"summaries": summaries}).encode()
+
+        self.server.api.count("summaries", 200)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        for offset in range(0, len(body), CHUNK_SIZE):
+            self.wfile.write(body[offset : offset + CHUNK_SIZE])
+
+    def send_failure(self, endpoint: str, status: int) -> None:
+        # A captcha is a 403 with the script that the browser would have to run.
+        self.send_json(
+            endpoint,
+            status,
+            {"blockScript": "https://example.com/captcha.js"} if status == 403 else {},
+        )
+
+    def send_json(
+        self,
+        endpoint: str,
+        status: int,
+        data: Any,
+        headers: dict[str, str] | None = None,
+    ) -> None:
+        body = dumps(data).encode()
+        self.server.api.count(endpoint, status)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class FakeAPIServer(ThreadingHTTPServer):
+    api: FakeAPI
+
+
+@contextmanager
+def serve_fake_api(
+    config: FakeAPIConfig | None = None, host: str = "127.0.0.1", port: int = 0
+) -> Iterator[FakeAPI]:
+    # The server runs in a background thread until the block ends. Port 0 picks a free port.
+    config = config or FakeAPIConfig()
+    server = FakeAPIServer((host, port), FakeAPIHandler)
+    server.api = FakeAPI(config=config, server=server, random=Random(config.seed))
+    Thread(target=server.serve_forever, args=(0.01,), daemon=True).start()
+    try:
+        yield server.api
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,168 @@
+from json import dump
+from pathlib import Path
+
+import pytest
+
+from src.database import Database
+from src.migration import (
+    LATEST_VERSION,
+    MIGRATIONS,
+    JSONObjectWriter,
+    Migration,
+    diff_databases,
+    migrate_directory,
+)
+
+
+def create_v1_entry(date: str, xp_today: int, streak: int) -> dict:
+    return {
+        "date": date,
+        "experience": {"xp_goal": 50, "xp_today": xp_today},
+        "number_of_learned_words": 100,
+        "session_information": {"number_of_sessions": 2, "session_time": 600},
+        "streak_information": {"site_streak": streak},
+        "time": "20:15:00",
+    }
+
+
+@pytest.fixture
+def v1_directory(tmp_path: Path) -> Path:
+    with open(tmp_path / "duolingo-progress.json", "w", encoding="UTF-8") as file:
+        dump(
+            [
+                create_v1_entry("2023/08/01", 10, 1),
+                create_v1_entry("2023/08/02", 20, 2),
+            ],
+            file,
+        )
+
+    return tmp_path
+
+
+def test_migrate_directory_from_first_version(v1_directory: Path):
+    result = migrate_directory(str(v1_directory))
+
+    assert (result.from_version, result.to_version, result.records) == (1, 3, 2)
+    assert Database(str(v1_directory / "duolingo-progress.json")).get() == {
+        "2023/08/01": {
+            "number_of_sessions": 2,
+            "session_time": 600,
+            "streak": 1,
+            "xp_today": 10,
+        },
+        "2023/08/02": {
+            "number_of_sessions": 2,
+            "session_time": 600,
+            "streak": 2,
+            "xp_today": 20,
+        },
+    }
+    assert Database(str(v1_directory / "statistics.json")).get() == {
+        "2023/08/01": "20:15:00",
+        "2023/08/02": "20:15:00",
+    }
+    assert Database(str(v1_directory / "schema.json")).get() == {
+        "version": LATEST_VERSION
+    }
+    assert sorted(path.name for path in v1_directory.iterdir()) == [
+        "duolingo-progress.json",
+        "schema.json",
+        "statistics.json",
+    ]
+
+
+def test_migrate_directory_is_idempotent(v1_directory: Path):
+    migrate_directory(str(v1_directory))
+    content = (v1_directory / "duolingo-progress.json").read_text()
+    result = migrate_directory(str(v1_directory))
+
+    assert (result.from_version, result.to_version, result.records) == (3, 3, 0)
+    assert (v1_directory / "duolingo-progress.json").read_text() == content
+
+
+def test_migrate_directory_dry_run(v1_directory: Path):
+    content = (v1_directory / "duolingo-progress.json").read_text()
+    changes: list[str] = []
+    result = migrate_directory(
+        str(v1_directory), dry_run=True, on_change=changes.append
+    )
+
+    assert result.to_version == LATEST_VERSION
+    assert (v1_directory / "duolingo-progress.json").read_text() == content
+    assert sorted(path.name for path in v1_directory.iterdir()) == [
+        "duolingo-progress.json"
+    ]
+    assert [change.split(" ")[:3] for change in changes] == [
+        ["statistics.json:", "+", "2023/08/01"],
+        ["statistics.json:", "+", "2023/08/02"],
+        ["duolingo-progress.json:", "~", "2023/08/01"],
+        ["duolingo-progress.json:", "~", "2023/08/02"],
+    ]
+
+
+def test_migrate_directory_keeps_data_on_failure(tmp_path: Path):
+    Database(str(tmp_path / "duolingo-progress.json")).set(
+        {"2024/06/01": {"xp_today": 1}, "2024/06/02": {"xp_today": 2}}
+    )
+    Database(str(tmp_path / "schema.json")).set({"version": 3})
+
+    def fail_on_second_day(date: str, record: dict) -> dict:
+        if date == "2024/06/02":
+            raise ValueError("Broken record.")
+        return record
+
+    with pytest.raises(ValueError):
+        migrate_directory(
+            str(tmp_path),
+            migrations=[*MIGRATIONS, Migration(4, "Fail.", fail_on_second_day)],
+        )
+
+    assert Database(str(tmp_path / "duolingo-progress.json")).get()["2024/06/01"] == {
+        "xp_today": 1
+    }
+    assert Database(str(tmp_path / "schema.json")).get() == {"version": 3}
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "duolingo-progress.json",
+        "schema.json",
+    ]
+
+
+@pytest.mark.parametrize(
+    "data",
+    [{}, {"2024/06/01": {"xp_today": 1}, "2024/06/02": {"nested": ["日本語", 1.5]}}],
+)
+@pytest.mark.parametrize("batch_size", [1, 1024])
+def test_json_object_writer_matches_database_layout(
+    tmp_path: Path, data: dict, batch_size: int
+):
+    with open(tmp_path / "streamed.json", "w", encoding="UTF-8") as file:
+        writer = JSONObjectWriter(file, batch_size)
+        for key, value in data.items():
+            writer.write(key, value)
+        writer.close()
+    Database(str(tmp_path / "expected.json")).set(data)
+
+    assert (tmp_path / "streamed.json").read_text() == (
+        tmp_path / "expected.json"
+    ).read_text()
+
+
+def test_json_object_writer_requires_order(tmp_path: Path):
+    with open(tmp_path / "streamed.json", "w", encoding="UTF-8") as file:
+        writer = JSONObjectWriter(file)
+        writer.write("2024/06/02", 1)
+        with pytest.raises(ValueError):
+            writer.write("2024/06/01", 1)
+
+
+def test_diff_databases(tmp_path: Path):
+    Database(str(tmp_path / "old.json")).set({"a": 1, "b": 2, "c": 3})
+    Database(str(tmp_path / "new.json")).set({"b": 2, "c": 4, "d": 5})
+
+    assert list(
+        diff_databases(str(tmp_path / "old.json"), str(tmp_path / "new.json"))
+    ) == [
+        "- a",
+        "~ c 3 -> 4",
+        "+ d 5",
+    ]
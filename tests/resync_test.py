@@ -0,0 +1,174 @@
+from pathlib import Path
+
+import pytest
+
+from src.database import Database, JournaledDatabase, open_databases
+from src.digest import DigestIndex, compute_month_digests
+from src.resync import (
+    find_chunksize,
+    format_progress,
+    report_progress,
+    resync_directories,
+    resync_directory,
+)
+
+
+def create_entry(xp_today: int, streak: int) -> dict[str, int]:
+    return {
+        "number_of_sessions": 1 if streak else 0,
+        "session_time": 60 if streak else 0,
+        "streak": streak,
+        "xp_today": xp_today,
+    }
+
+
+@pytest.fixture
+def synchronized_database() -> dict[str, dict[str, int]]:
+    return {
+        "2024/06/01": create_entry(10, 1),
+        "2024/06/02": create_entry(20, 2),
+        "2024/06/03": create_entry(0, 0),
+        "2024/06/04": create_entry(40, 1),
+    }
+
+
+def create_directories(tmp_path: Path, databases: dict[str, object]) -> list[str]:
+    directories = []
+    for name, database in databases.items():
+        filename = tmp_path / name / "duolingo-progress.json"
+        filename.parent.mkdir()
+        if isinstance(database, str):
+            filename.write_text(database, encoding="UTF-8")
+        else:
+            Database(filename=str(filename)).set(database)
+        directories.append(str(filename.parent))
+
+    return directories
+
+
+@pytest.fixture
+def broken_database(synchronized_database) -> dict[str, dict[str, int]]:
+    return {
+        **synchronized_database,
+        "2024/06/02": create_entry(20, 7),
+        "2024/06/04": create_entry(40, 2),
+    }
+
+
+def test_resync_directory_keeps_synchronized_database(
+    tmp_path: Path, synchronized_database
+):
+    [directory] = create_directories(tmp_path, {"learner": synchronized_database})
+
+    result = resync_directory(directory)
+
+    assert result.succeeded and not result.changed
+    assert result.entries == 4
+    assert (
+        Database(filename=f"{directory}/duolingo-progress.json").get()
+        == synchronized_database
+    )
+
+
+def test_resync_directory_repairs_streaks(
+    tmp_path: Path, synchronized_database, broken_database
+):
+    [directory] = create_directories(tmp_path, {"learner": broken_database})
+    database = Database(filename=f"{directory}/duolingo-progress.json")
+
+    assert resync_directory(directory, check=True).message == "Would change."
+    assert database.get() == broken_database
+
+    result = resync_directory(directory)
+
+    assert result.succeeded and result.changed
+    assert database.get() == synchronized_database
+    digest_index = DigestIndex(
+        f"{directory}/duolingo-progress.digest.json", [database.filename]
+    ).get()
+    assert digest_index is not None
+    assert digest_index["months"] == compute_month_digests(synchronized_database)
+
+
+def test_resync_directory_writes_journal(
+    tmp_path: Path, synchronized_database, broken_database
+):
+    [directory] = create_directories(tmp_path, {"learner": {}})
+    database = JournaledDatabase(filename=f"{directory}/duolingo-progress.json")
+    database.set(broken_database)
+
+    result = resync_directory(directory, "journal")
+
+    assert result.succeeded and result.changed
+    assert database.get() == synchronized_database
+
+
+def test_resync_directory_writes_sqlite(
+    tmp_path: Path, synchronized_database, broken_database
+):
+    with open_databases(str(tmp_path), ["duolingo-progress"], "sqlite") as [database]:
+        database.set(broken_database)
+
+    result = resync_directory(str(tmp_path), "sqlite")
+
+    assert result.succeeded and result.changed
+    with open_databases(str(tmp_path), ["duolingo-progress"], "sqlite") as [database]:
+        assert database.get() == synchronized_database
+
+
+def test_resync_directory_does_not_create_sqlite_database(tmp_path: Path):
+    result = resync_directory(str(tmp_path), "sqlite")
+
+    assert not result.succeeded
+    assert result.message.startswith("FileNotFoundError")
+    assert not (tmp_path / "duolingo.sqlite3").exists()
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_resync_directories_isolates_failures(
+    tmp_path: Path, synchronized_database, workers: int
+):
+    directories = create_directories(
+        tmp_path,
+        {
+            "first": synchronized_database,
+            "broken": "{",
+            "invalid": {"2024/06/01": {"streak": "long"}},
+            "empty": {},
+            "last": synchronized_database,
+        },
+    )
+
+    results = list(resync_directories(directories, workers, chunksize=2))
+
+    assert [result.directory for result in results] == directories
+    assert [result.succeeded for result in results] == [
+        True,
+        False,
+        False,
+        True,
+        True,
+    ]
+    assert results[1].message.startswith("JSONDecodeError")
+    assert results[2].message.startswith("ValidationError")
+
+
+def test_find_chunksize():
+    assert find_chunksize(1000, 4) == 63
+    assert find_chunksize(3, 4) == 1
+
+
+def test_report_progress(tmp_path: Path, synchronized_database):
+    directories = create_directories(
+        tmp_path, {"first": synchronized_database, "bad": "["}
+    )
+    output: list[str] = []
+
+    results = report_progress(resync_directories(directories, 1), 2, output.append)
+
+    assert len(results) == 2
+    assert output[-2].startswith("\r[" + "#" * 30 + "] 2/2 databases, 1 failed")
+    assert output[-1] == "\n"
+    assert format_progress(1, 4, 0, 2.0, width=8) == (
+        "[##......] 1/4 databases, 0 failed, 0.5 databases/s"
+    )
@@ -0,0 +1,122 @@
+from pathlib import Path
+
+import pytest
+
+from src.api import APIClient
+from src.database import Database, create_missing_databases, open_databases
+from src.retention import (
+    compact_databases,
+    compact_statistics,
+    find_cutoff_month,
+    needs_compaction,
+    summarize_times,
+)
+from src.runner import sync_account
+from src.startup import today
+from src.synchronizer import date_to_ordinal, ordinal_to_date
+from tests.fake_api import FakeAPIConfig, serve_fake_api
+
+
+def test_summarize_times():
+    assert summarize_times(["20:15:00", "13:00:00", "23:59:00", "20:16:00"]) == {
+        "runs": 4,
+        "earliest": "13:00:00",
+        "latest": "23:59:00",
+        "median": "20:15:00",
+    }
+
+
+@pytest.mark.parametrize(
+    "current_date, retention_days, expected_month",
+    [
+        ("2026/10/18", 90, "2026/07"),
+        ("2026/10/18", 18, "2026/10"),
+        ("2026/10/18", 19, "2026/09"),
+        ("2026/01/05", 30, "2025/12"),
+    ],
+)
+def test_find_cutoff_month(current_date, retention_days, expected_month):
+    assert find_cutoff_month(current_date, retention_days) == expected_month
+
+
+def test_compact_statistics():
+    statistics = {
+        "2026/06/01": "20:00:00",
+        "2026/06/02": "21:00:00",
+        "2026/06/03": "22:00:00",
+        "2026/07/01": "19:00:00",
+        "2026/08/01": "20:15:00",
+    }
+    rollups = {
+        "2026/07": {
+            "runs": 3,
+            "earliest": "18:00:00",
+            "latest": "20:00:00",
+            "median": "19:30:00",
+        }
+    }
+
+    assert needs_compaction(statistics, "2026/08")
+    retained_statistics, compacted_rollups = compact_statistics(
+        statistics, rollups, "2026/08"
+    )
+
+    assert retained_statistics == {"2026/08/01": "20:15:00"}
+    assert compacted_rollups == {
+        "2026/06": {
+            "runs": 3,
+            "earliest": "20:00:00",
+            "latest": "22:00:00",
+            "median": "21:00:00",
+        },
+        "2026/07": {
+            "runs": 4,
+            "earliest": "18:00:00",
+            "latest": "20:00:00",
+            "median": "19:30:00",
+        },
+    }
+    assert not needs_compaction(retained_statistics, "2026/08")
+
+
+@pytest.mark.parametrize("storage", ["json", "journal", "sqlite"])
+def test_compact_databases(tmp_path: Path, storage: str):
+    names = ["statistics", "statistics-rollups"]
+    create_missing_databases(str(tmp_path), names, storage)
+    with open_databases(str(tmp_path), names, storage) as [
+        statistics_database,
+        rollups_database,
+    ]:
+        statistics = {"2026/06/01": "20:00:00", "2026/08/01": "20:15:00"}
+        statistics_database.set(statistics)
+
+        compact_databases(statistics_database, rollups_database, statistics, "2026/07")
+
+        assert statistics_database.get() == {"2026/08/01": "20:15:00"}
+        assert list(rollups_database.get()) == ["2026/06"]
+
+
+def test_sync_account_keeps_statistics_within_window(tmp_path: Path):
+    # Two years of daily runs, written before the retention existed.
+    first_ordinal = date_to_ordinal(today()) - 730
+    Database(filename=str(tmp_path / "statistics.json")).set(
+        {ordinal_to_date(first_ordinal + day): "20:15:00" for day in range(730)}
+    )
+
+    with serve_fake_api(FakeAPIConfig(days=10)) as api:
+        sync_account(
+            APIClient(base_url=api.url),
+            "learner",
+            "token",
+            True,
+            str(tmp_path),
+            telemetry=False,
+            retention_days=30,
+        )
+
+    statistics = Database(filename=str(tmp_path / "statistics.json")).get()
+    rollups = Database(filename=str(tmp_path / "statistics-rollups.json")).get()
+    assert today() in statistics
+    assert len(statistics) <= 31 + 30
+    assert min(statistics)[:7] == find_cutoff_month(today(), 30)
+    assert sum(summary["runs"] for summary in rollups.values()) + len(statistics) == 731
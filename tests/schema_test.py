@@ -0,0 +1,62 @@
+import pytest
+from pydantic import ValidationError
+
+from src.schema import (
+    DatabaseEntry,
+    Summary,
+    dump_database_entries,
+    iterate_summaries,
+    parse_database_entries,
+    parse_summaries,
+)
+
+
+@pytest.fixture
+def raw_database() -> dict[str, dict[str, int]]:
+    return {
+        "2024/06/01": {
+            "number_of_sessions": 1,
+            "session_time": 60,
+            "streak": 1,
+            "xp_today": 10,
+        },
+        "2024/06/02": {
+            "number_of_sessions": 0,
+            "session_time": 0,
+            "streak": 0,
+            "xp_today": 0,
+        },
+    }
+
+
+def test_parse_database_entries_matches_per_entry_parsing(raw_database):
+    assert parse_database_entries(raw_database) == {
+        key: DatabaseEntry(**entry) for key, entry in raw_database.items()
+    }
+
+
+def test_dump_database_entries_matches_per_entry_dumping(raw_database):
+    entries = parse_database_entries(raw_database)
+    assert dump_database_entries(entries) == {
+        key: entry.model_dump() for key, entry in entries.items()
+    }
+    assert dump_database_entries(entries) == raw_database
+
+
+def test_parse_database_entries_rejects_invalid_data(raw_database):
+    raw_database["2024/06/02"]["streak"] = "not a number"
+    with pytest.raises(ValidationError):
+        parse_database_entries(raw_database)
+
+
+def test_parse_summaries_matches_per_summary_parsing():
+    raw_summaries = [
+        {"date": 1717804800, "gainedXp": 10, "numSessions": 1, "totalSessionTime": 60},
+        {"date": "2024/06/09", "gainedXp": 0, "numSessions": 0, "totalSessionTime": 0},
+    ]
+    assert parse_summaries(raw_summaries) == [
+        Summary(**summary) for summary in raw_summaries
+    ]
+    assert list(iterate_summaries(iter(raw_summaries))) == parse_summaries(
+        raw_summaries
+    )
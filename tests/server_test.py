@@ -0,0 +1,196 @@
+from gzip import decompress
+from http.client import HTTPConnection
+from json import loads
+from os import utime
+from pathlib import Path
+from threading import Thread
+
+import pytest
+
+from src.database import Database
+from src.server import ProgressStore, accepts_gzip, compute_rollups, create_server
+
+PROGRESS = {
+    "2024/12/31": {
+        "number_of_sessions": 1,
+        "session_time": 60,
+        "streak": 1,
+        "xp_today": 10,
+    },
+    "2025/01/01": {
+        "number_of_sessions": 2,
+        "session_time": 120,
+        "streak": 2,
+        "xp_today": 20,
+    },
+    "2025/01/02": {
+        "number_of_sessions": 3,
+        "session_time": 180,
+        "streak": 3,
+        "xp_today": 30,
+    },
+}
+
+
+@pytest.fixture
+def progress_filename(tmp_path: Path):
+    filename = str(tmp_path / "duolingo-progress.json")
+    Database(filename=filename).set(PROGRESS)
+    return filename
+
+
+@pytest.fixture
+def server(progress_filename: str, tmp_path: Path):
+    web_directory = tmp_path / "web"
+    web_directory.mkdir()
+    (web_directory / "index.html").write_text("<html></html>", encoding="UTF-8")
+    (web_directory / "favicon.png").write_bytes(b"\x89PNG")
+
+    server = create_server(ProgressStore(progress_filename), str(web_directory), port=0)
+    server.RequestHandlerClass.log_message = lambda *args: None
+    Thread(target=server.serve_forever, args=(0.01,), daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def get(server, url: str, headers: dict[str, str] | None = None):
+    connection = HTTPConnection(*server.server_address)
+    connection.request("GET", url, headers=headers or {})
+    response = connection.getresponse()
+    body = response.read()
+    connection.close()
+    return response, body
+
+
+def test_compute_rollups():
+    rollups = compute_rollups(PROGRESS)
+
+    assert rollups["years"] == {
+        "2024": {
+            "days": 1,
+            "xp_today": 10,
+            "session_time": 60,
+            "number_of_sessions": 1,
+        },
+        "2025": {
+            "days": 2,
+            "xp_today": 50,
+            "session_time": 300,
+            "number_of_sessions": 5,
+        },
+    }
+    assert list(rollups["months"]) == ["2024/12", "2025/01"]
+
+
+def test_serves_dashboard(server):
+    response, body = get(server, "/")
+
+    assert response.status == 200
+    assert body == b"<html></html>"
+
+
+def test_serves_progress_range(server):
+    response, body = get(server, "/api/progress?from=2025/01/01&to=2025/01/31")
+
+    assert response.status == 200
+    assert response.getheader("Content-Type") == "application/json; charset=UTF-8"
+    assert loads(body) == {
+        "2025/01/01": PROGRESS["2025/01/01"],
+        "2025/01/02": PROGRESS["2025/01/02"],
+    }
+
+
+def test_serves_progress_on_the_dashboard_path(server):
+    _, body = get(server, "/japanese-duolingo-visualizer/duolingo-progress.json")
+
+    assert loads(body) == PROGRESS
+
+
+def test_rejects_malformed_dates(server):
+    response, _ = get(server, "/api/progress?from=2025-01-01")
+
+    assert response.status == 400
+
+
+def test_rejects_impossible_dates(server):
+    response, _ = get(server, "/api/progress?from=2024/13/45")
+
+    assert response.status == 400
+
+
+def test_compresses_responses(server):
+    response, body = get(server, "/api/progress", {"Accept-Encoding": "gzip"})
+
+    assert response.getheader("Content-Encoding") == "gzip"
+    assert response.getheader("Vary") == "Accept-Encoding"
+    assert loads(decompress(body)) == PROGRESS
+
+
+def test_does_not_compress_refused_gzip(server):
+    response, body = get(server, "/api/progress", {"Accept-Encoding": "gzip;q=0, br"})
+
+    assert response.getheader("Content-Encoding") is None
+    assert loads(body) == PROGRESS
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        ("", False),
+        ("gzip", True),
+        ("deflate, GZIP;q=0.5", True),
+        ("gzip;q=0", False),
+        ("gzip; q=0.0, *", False),
+        ("x-gzip", False),
+        ("br, *;q=0.1", True),
+        ("*;q=0", False),
+    ],
+)
+def test_accepts_gzip(accept_encoding: str, expected: bool):
+    assert accepts_gzip(accept_encoding) is expected
+
+
+def test_revalidates_with_etag(server):
+    response, _ = get(server, "/api/rollups")
+    etag = response.getheader("ETag")
+    revalidated_response, body = get(server, "/api/rollups", {"If-None-Match": etag})
+
+    assert revalidated_response.status == 304
+    assert revalidated_response.getheader("ETag") == etag
+    assert body == b""
+
+
+def test_reloads_changed_file(server, progress_filename: str):
+    response, _ = get(server, "/api/progress")
+    Database(filename=progress_filename).set(
+        {**PROGRESS, "2025/01/03": PROGRESS["2025/01/02"]}
+    )
+    # The modification time might not change within the resolution of the file system.
+    utime(progress_filename, ns=(0, 0))
+    reloaded_response, body = get(
+        server, "/api/progress", {"If-None-Match": response.getheader("ETag")}
+    )
+
+    assert reloaded_response.status == 200
+    assert "2025/01/03" in loads(body)
+
+
+def test_unknown_path(server):
+    response, _ = get(server, "/missing")
+
+    assert response.status == 404
+
+
+def test_serves_static_assets(server):
+    response, body = get(server, "/favicon.png")
+
+    assert response.status == 200
+    assert response.getheader("Content-Type") == "image/png"
+    assert body == b"\x89PNG"
+
+
+def test_does_not_serve_files_outside_web_directory(server):
+    response, _ = get(server, "/%2E%2E/progress.json")
+
+    assert response.status == 404
@@ -0,0 +1,54 @@
+from pathlib import Path
+
+import pytest
+
+from src.database import Database, connect_sqlite, open_databases
+from src.startup import find_batch_directories, is_synchronized_today, today
+
+
+@pytest.mark.parametrize("storage", ["json", "journal", "sqlite"])
+def test_is_synchronized_today(tmp_path: Path, storage: str):
+    assert not is_synchronized_today(str(tmp_path), storage)
+
+    # File based databases start from an empty snapshot, like in batch mode.
+    if storage != "sqlite":
+        Database(filename=str(tmp_path / "statistics.json")).set({})
+    with open_databases(str(tmp_path), ["statistics"], storage) as [
+        statistics_database
+    ]:
+        statistics_database.set({"2020/01/01": "20:15:00"})
+        assert not is_synchronized_today(str(tmp_path), storage)
+
+        statistics_database.set({"2020/01/01": "20:15:00", today(): "20:15:00"})
+        assert is_synchronized_today(str(tmp_path), storage)
+
+
+def test_is_synchronized_today_with_broken_statistics(tmp_path: Path):
+    (tmp_path / "statistics.json").write_text('{"2020/01/01": ', encoding="UTF-8")
+
+    assert not is_synchronized_today(str(tmp_path))
+
+
+def test_is_synchronized_today_does_not_create_database(tmp_path: Path):
+    is_synchronized_today(str(tmp_path), "sqlite")
+
+    assert list(tmp_path.iterdir()) == []
+    connect_sqlite(str(tmp_path / "duolingo.sqlite3")).close()
+    assert not is_synchronized_today(str(tmp_path), "sqlite")
+    Database(filename=str(tmp_path / "statistics.json")).set({today(): "20:15:00"})
+    assert not is_synchronized_today(str(tmp_path), "sqlite")
+
+
+@pytest.mark.parametrize(
+    "accounts, expected_directories",
+    [
+        (
+            '[{"username": "a", "jwt": "token"}, {"username": "b", "password": "secret"}]',
+            ["data/accounts/a", "data/accounts/b"],
+        ),
+        ("", []),
+        ('[{"jwt": "token"}]', []),
+    ],
+)
+def test_find_batch_directories(accounts: str, expected_directories: list[str]):
+    assert find_batch_directories(accounts, "data/accounts") == expected_directories
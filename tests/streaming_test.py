@@ -0,0 +1,59 @@
+from json import dumps
+
+import pytest
+
+from src.streaming import iterate_array_items
+
+
+def split_into_chunks(text: str, size: int) -> list[bytes]:
+    data = text.encode()
+    return [data[index : index + size] for index in range(0, len(data), size)]
+
+
+DOCUMENT = {
+    "before": {"nested": ["[", "]", '"{'], "number": 1.5},
+    "summaries": [
+        {"date": 1717804800, "gainedXp": 12345, "note": "日本語 ,]}"},
+        123456789,
+        [],
+        None,
+        {"date": 1717718400, "gainedXp": 0},
+    ],
+    "after": True,
+}
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 4096])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_iterate_array_items_across_chunk_boundaries(size: int, indent: int | None):
+    chunks = split_into_chunks(dumps(DOCUMENT, ensure_ascii=False, indent=indent), size)
+
+    assert list(iterate_array_items(chunks, "summaries")) == DOCUMENT["summaries"]
+
+
+def test_iterate_array_items_is_lazy():
+    def generate_chunks():
+        yield b'{"summaries": [{"date": 1}, '
+        raise AssertionError("The stream was read too far.")
+
+    items = iterate_array_items(generate_chunks(), "summaries")
+    assert next(items) == {"date": 1}
+
+
+@pytest.mark.parametrize("text", ['{"summaries": []}', '{"summaries" : [ ] }'])
+def test_iterate_array_items_empty(text: str):
+    assert list(iterate_array_items(split_into_chunks(text, 3), "summaries")) == []
+
+
+@pytest.mark.parametrize("text", ["{}", '{"other": []}'])
+def test_iterate_array_items_missing_key(text: str):
+    with pytest.raises(KeyError):
+        list(iterate_array_items([text.encode()], "summaries"))
+
+
+@pytest.mark.parametrize(
+    "text", ['["summaries"]', '{"summaries": {}}', '{"summaries": [1 2]}']
+)
+def test_iterate_array_items_invalid(text: str):
+    with pytest.raises(ValueError):
+        list(iterate_array_items([text.encode()], "summaries"))
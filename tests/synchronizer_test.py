@@ -1,10 +1,19 @@
+from datetime import date, timedelta
+from random import Random
+
 import pytest
 
 from src.schema import DatabaseEntry, Summary
 from src.synchronizer import (
     check_database_change,
+    compute_streaks,
+    date_to_ordinal,
+    find_overlap_start_date,
     find_start_and_end_dates,
     generate_dates_between,
+    merge_summaries_with_history,
+    ordinal_to_date,
+    sync_database_incrementally,
     sync_database_with_summaries,
 )
 
@@ -252,3 +261,216 @@ def test_find_start_and_end_dates_if_empty():
 )
 def test_check_database_change(old_database, new_database, expected):
     assert check_database_change(old_database, new_database) == expected
+
+
+@pytest.mark.parametrize(
+    "database, overlap_days, expected_start_date",
+    [
+        ({}, 14, None),
+        (
+            {
+                "2024/06/01": DatabaseEntry.create_default(1),
+                "2024/06/20": DatabaseEntry.create_default(1),
+            },
+            14,
+            "2024/06/06",
+        ),
+        ({"2024/03/01": DatabaseEntry.create_default(1)}, 1, "2024/02/29"),
+        ({"2024/03/01": DatabaseEntry.create_default(1)}, 0, "2024/03/01"),
+    ],
+)
+def test_find_overlap_start_date(database, overlap_days, expected_start_date):
+    assert find_overlap_start_date(database, overlap_days) == expected_start_date
+
+
+def test_merge_summaries_with_history_matches_full_history():
+    full_summaries = [
+        Summary(date="2024/06/01", gainedXp=10, numSessions=1, totalSessionTime=60),
+        Summary(date="2024/06/02", gainedXp=20, numSessions=2, totalSessionTime=120),
+        Summary(date="2024/06/04", gainedXp=40, numSessions=4, totalSessionTime=240),
+        Summary(date="2024/06/05", gainedXp=50, numSessions=5, totalSessionTime=300),
+        Summary(date="2024/06/06", gainedXp=60, numSessions=6, totalSessionTime=360),
+    ]
+    database = sync_database_with_summaries({}, full_summaries[:4])
+
+    # Only the summaries inside the window are fetched, the rest comes from the database.
+    fetched_summaries = [
+        summary for summary in full_summaries if summary.date >= "2024/06/04"
+    ]
+    merged_summaries = merge_summaries_with_history(
+        database, fetched_summaries, "2024/06/04"
+    )
+
+    assert merged_summaries[: len(fetched_summaries)] == fetched_summaries
+    assert sync_database_with_summaries(
+        database, merged_summaries
+    ) == sync_database_with_summaries(database, full_summaries)
+
+
+def generate_random_summaries(
+    random: Random, start: date, number_of_days: int
+) -> list[Summary]:
+    days = (start + timedelta(days=offset) for offset in range(number_of_days))
+    return [
+        Summary(
+            date=day.strftime("%Y/%m/%d"),
+            gainedXp=random.randint(1, 500),
+            numSessions=random.randint(1, 10),
+            totalSessionTime=random.randint(60, 3600),
+        )
+        for day in days
+        if random.random() < 0.8
+    ]
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_sync_database_incrementally_matches_full_sync(seed):
+    random = Random(seed)
+    start = date(2024, 1, 1)
+    history_length = random.randint(1, 60)
+    window_length = random.randint(0, 30)
+    overlap_days = random.randint(0, history_length + 5)
+
+    # Build a synchronized database from an old history, then fetch a window of new summaries
+    # that overlaps with the end of it and possibly extends past it.
+    history = generate_random_summaries(random, start, history_length)
+    database = sync_database_with_summaries(
+        {start.strftime("%Y/%m/%d"): DatabaseEntry.create_default(0)}, history
+    )
+    since = find_overlap_start_date(database, overlap_days)
+    window = generate_random_summaries(
+        random,
+        start + timedelta(days=history_length - overlap_days),
+        overlap_days + window_length,
+    )
+
+    expected_database = sync_database_with_summaries(
+        database, merge_summaries_with_history(database, window, since)
+    )
+    actual_database = sync_database_incrementally(database, window, since)
+
+    assert actual_database == expected_database
+    assert list(actual_database) == list(expected_database)
+    assert sync_database_incrementally(database, iter(window), since) == actual_database
+
+
+def test_sync_database_incrementally_keeps_prefix():
+    database = sync_database_with_summaries(
+        {},
+        [
+            Summary.create_default("2024/06/01"),
+            Summary.create_default("2024/06/02"),
+            Summary.create_default("2024/06/03"),
+        ],
+    )
+    summaries = [
+        Summary.create_default("2024/06/03"),
+        Summary.create_default("2024/06/05"),
+    ]
+
+    actual_database = sync_database_incrementally(database, summaries, "2024/06/03")
+    assert actual_database["2024/06/01"] is database["2024/06/01"]
+    assert actual_database == {
+        "2024/06/01": DatabaseEntry.create_default(1),
+        "2024/06/02": DatabaseEntry.create_default(2),
+        "2024/06/03": DatabaseEntry.create_default(3),
+        "2024/06/04": DatabaseEntry.create_default(0),
+        "2024/06/05": DatabaseEntry.create_default(1),
+    }
+
+
+def test_sync_database_incrementally_with_empty_window():
+    # Nothing was fetched, but the days from `since` onwards are still recomputed from the summaries.
+    database = sync_database_with_summaries(
+        {},
+        [
+            Summary.create_default("2024/06/01"),
+            Summary.create_default("2024/06/02"),
+        ],
+    )
+
+    assert sync_database_incrementally(database, [], "2024/06/02") == {
+        "2024/06/01": DatabaseEntry.create_default(1),
+        "2024/06/02": DatabaseEntry.create_default(0),
+    }
+
+
+def test_sync_database_incrementally_updates_in_place():
+    database = sync_database_with_summaries({}, [Summary.create_default("2024/06/01")])
+
+    actual_database = sync_database_incrementally(
+        database, [Summary.create_default("2024/06/02")], "2024/06/02"
+    )
+
+    assert actual_database is database
+    assert list(database) == ["2024/06/01", "2024/06/02"]
+
+
+@pytest.mark.parametrize(
+    "database, summaries",
+    [
+        ({}, [Summary.create_default("2024/06/01")]),
+        ({"2024/06/02": DatabaseEntry.create_default(1)}, []),
+        (
+            {"2024/06/02": DatabaseEntry.create_default(1)},
+            [Summary.create_default("2024/06/01")],
+        ),
+    ],
+)
+def test_sync_database_incrementally_falls_back_to_full_sync(database, summaries):
+    assert sync_database_incrementally(
+        database, summaries
+    ) == sync_database_with_summaries(database, summaries)
+    assert sync_database_incrementally(
+        database, iter(summaries)
+    ) == sync_database_with_summaries(database, iter(summaries))
+
+
+@pytest.mark.parametrize(
+    "date_str", ["0001/01/01", "1970/01/01", "2024/02/29", "2024/12/31", "9999/12/31"]
+)
+def test_date_ordinal_round_trip(date_str):
+    assert ordinal_to_date(date_to_ordinal(date_str)) == date_str
+    assert date_to_ordinal(date_str) == date(*map(int, date_str.split("/"))).toordinal()
+
+
+@pytest.mark.parametrize("vectorized", [False, True])
+@pytest.mark.parametrize(
+    "present, initial_streak, expected_streaks",
+    [
+        ({0, 1, 3}, 0, [1, 2, 0, 1, 0]),
+        ({0, 1, 3}, 5, [6, 7, 0, 1, 0]),
+        (set(), 5, [0, 0, 0, 0, 0]),
+        ({0, 1, 2, 3, 4}, 2, [3, 4, 5, 6, 7]),
+    ],
+)
+def test_compute_streaks(present, initial_streak, expected_streaks, vectorized):
+    if vectorized:
+        pytest.importorskip("numpy")
+
+    assert (
+        compute_streaks(present, 0, 4, initial_streak, vectorized) == expected_streaks
+    )
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_compute_streaks_vectorized_matches_pure_python(seed):
+    pytest.importorskip("numpy")
+    random = Random(seed)
+    start, end = 730000, 730000 + random.randint(0, 20000)
+    present = {day for day in range(start - 10, end + 10) if random.random() < 0.9}
+    initial_streak = random.randint(0, 100)
+
+    assert compute_streaks(
+        present, start, end, initial_streak, vectorized=True
+    ) == compute_streaks(present, start, end, initial_streak, vectorized=False)
+
+
+def test_compute_streaks_on_long_history():
+    present = {day for day in range(200_000) if day % 97}
+
+    streaks = compute_streaks(present, 0, 199_999)
+
+    assert len(streaks) == 200_000
+    assert streaks[:3] == [0, 1, 2]
+    assert max(streaks) == 96
@@ -0,0 +1,109 @@
+from datetime import datetime
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from src.telemetry import (
+    Recorder,
+    append_run_record,
+    percentile,
+    read_run_records,
+    record_run,
+    summarize_spans,
+)
+
+
+def test_recorder_records_spans_with_attributes():
+    recorder = Recorder()
+    with recorder.span("parse") as attributes:
+        attributes["summaries"] = 3
+
+    assert [span.name for span in recorder.spans] == ["parse"]
+    assert recorder.spans[0].seconds >= 0
+    assert recorder.spans[0].attributes == {"summaries": 3}
+
+
+def test_disabled_recorder_records_nothing():
+    recorder = Recorder(enabled=False)
+    with recorder.span("parse") as attributes:
+        attributes["summaries"] = 3
+
+    assert recorder.spans == []
+
+
+def test_record_run_appends_failed_runs(tmp_path: Path):
+    filename = str(tmp_path / "run-statistics.jsonl")
+    with record_run(filename) as recorder, recorder.span("read_database"):
+        pass
+
+    with (
+        pytest.raises(RuntimeError),
+        record_run(filename) as recorder,
+        recorder.span("login"),
+    ):
+        raise RuntimeError("captcha")
+
+    records = read_run_records(filename)
+    assert [record["succeeded"] for record in records] == [True, False]
+    assert [span["name"] for span in records[0]["spans"]] == ["read_database", "total"]
+    assert [span["name"] for span in records[1]["spans"]] == ["login", "total"]
+
+
+def test_record_run_starts_in_timezone(tmp_path: Path):
+    filename = str(tmp_path / "run-statistics.jsonl")
+    with record_run(filename, timezone=ZoneInfo("Asia/Jakarta")):
+        pass
+    with record_run(filename):
+        pass
+
+    [jakarta_record, local_record] = read_run_records(filename)
+    assert jakarta_record["started_at"].endswith("+07:00")
+    assert datetime.fromisoformat(local_record["started_at"]).tzinfo is not None
+
+
+def test_append_run_record_keeps_newest_runs(tmp_path: Path):
+    filename = str(tmp_path / "run-statistics.jsonl")
+    for run in range(9):
+        append_run_record(filename, {"run": run, "spans": []}, limit=4)
+        assert len(read_run_records(filename)) <= 8
+
+    assert [record["run"] for record in read_run_records(filename)] == [5, 6, 7, 8]
+
+
+def test_record_run_can_be_disabled(tmp_path: Path):
+    filename = tmp_path / "run-statistics.jsonl"
+    with (
+        record_run(str(filename), enabled=False) as recorder,
+        recorder.span("read_database"),
+    ):
+        pass
+
+    assert not filename.exists()
+
+
+@pytest.mark.parametrize(
+    "rank, expected", [(0, 1.0), (50, 5.0), (90, 9.0), (99, 10.0), (100, 10.0)]
+)
+def test_percentile(rank, expected):
+    assert percentile([float(value) for value in range(10, 0, -1)], rank) == expected
+
+
+def test_summarize_spans(tmp_path: Path):
+    filename = str(tmp_path / "run-statistics.jsonl")
+    for seconds in [1.0, 2.0, 3.0, 4.0]:
+        append_run_record(
+            filename,
+            {
+                "started_at": "2024-06-01T20:15:00",
+                "spans": [
+                    {"name": "user", "seconds": seconds, "bytes": 100},
+                    {"name": "summaries", "seconds": seconds * 10},
+                ],
+            },
+        )
+
+    assert summarize_spans(read_run_records(filename)) == {
+        "user": {"count": 4, "p50": 2.0, "p90": 4.0, "p99": 4.0},
+        "summaries": {"count": 4, "p50": 20.0, "p90": 40.0, "p99": 40.0},
+    }
@@ -0,0 +1,48 @@
+from base64 import urlsafe_b64encode
+from json import dumps
+from pathlib import Path
+from stat import S_IMODE
+from time import time
+
+import pytest
+
+from src.token_store import TokenStore, decode_expiry
+
+
+def create_token(claims: dict[str, int]) -> str:
+    payload = urlsafe_b64encode(dumps(claims).encode()).rstrip(b"=").decode()
+    return f"header.{payload}.signature"
+
+
+@pytest.mark.parametrize(
+    "token, expected",
+    [
+        (create_token({"exp": 1700000000}), 1700000000),
+        (create_token({"sub": 1}), None),
+        ("not-a-token", None),
+        ("header.!!!.signature", None),
+    ],
+)
+def test_decode_expiry(token: str, expected: int | None):
+    assert decode_expiry(token) == expected
+
+
+def test_token_store_reuses_valid_tokens(tmp_path: Path):
+    token = create_token({"exp": int(time()) + 3600})
+    filename = tmp_path / "tokens.json"
+    TokenStore(str(filename)).put("user", token)
+
+    assert TokenStore(str(filename)).get("user") == token
+    assert TokenStore(str(filename)).get("someone-else") is None
+    assert S_IMODE(filename.stat().st_mode) == 0o600
+
+
+def test_token_store_skips_expiring_tokens(tmp_path: Path):
+    store = TokenStore(str(tmp_path / "tokens.json"), leeway=300)
+    store.put("expired", create_token({"exp": int(time()) - 1}))
+    store.put("expiring", create_token({"exp": int(time()) + 60}))
+    store.put("unknown", create_token({"sub": 1}))
+
+    assert store.get("expired") is None
+    assert store.get("expiring") is None
+    assert store.get("unknown") is not None